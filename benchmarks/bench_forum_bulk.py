@@ -0,0 +1,75 @@
+"""
+Forum post ingestion rate: POST /forum once per post versus POST /forum/bulk.
+
+Both run through the real routers against a file-backed SQLite database. The
+single-post path pays an INSERT, a COMMIT and a refresh per post; the bulk path
+validates the whole body at once and inserts FORUM_BULK_CHUNK_SIZE rows per
+INSERT ... RETURNING and commit.
+
+    poetry run python benchmarks/bench_forum_bulk.py --posts 50000 --single-posts 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import jwt_module
+from demo_auth_svc import config
+from demo_auth_svc.app import app
+from demo_auth_svc.models.base import Base, engine_options, get_async_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000, help="posts sent through /forum/bulk")
+    parser.add_argument("--single-posts", type=int, default=2000, help="posts sent one by one through /forum")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        sync_engine = create_engine(url, **engine_options(url))
+        Base.metadata.create_all(sync_engine)
+        sync_engine.dispose()
+        async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        factory = async_sessionmaker(bind=create_async_engine(async_url, **engine_options(async_url)),
+                                     expire_on_commit=False)
+
+        async def override_async_session():
+            async with factory() as session:
+                yield session
+
+        app.dependency_overrides[get_async_db] = override_async_session
+        # Keep background jobs off the benchmark database.
+        config.CALENDAR_WORKER_IN_PROCESS = False
+        config.GOOGLE_JWKS_PREFETCH = False
+        config.FORUM_COUNT_RECONCILE_SECONDS = 0
+        # Startup validates the OAuth client settings.
+        config.GOOGLE_CLIENT_ID = config.GOOGLE_CLIENT_ID or "bench"
+        config.GOOGLE_CLIENT_SECRET = config.GOOGLE_CLIENT_SECRET or "bench"
+        config.GOOGLE_REDIRECT_URI = config.GOOGLE_REDIRECT_URI or "http://localhost/callback"
+        headers = {"Authorization": f"Bearer {jwt_module.create_token({'google_id': 'bench', 'email': 'b@example.com'})}"}
+        results = {}
+        with TestClient(app) as client:
+            start = time.perf_counter()
+            for i in range(args.single_posts):
+                client.post("/forum", json={"user_id": 1, "content": f"single {i}"}, headers=headers)
+            elapsed = time.perf_counter() - start
+            results["single_post"] = {"posts": args.single_posts, "rows_per_second": round(args.single_posts / elapsed)}
+
+            body = [{"user_id": 1, "content": f"bulk {i}", "additional_metadata": {"i": i}} for i in range(args.posts)]
+            start = time.perf_counter()
+            response = client.post("/forum/bulk", json=body, headers=headers)
+            elapsed = time.perf_counter() - start
+            assert response.json()["inserted"] == args.posts
+            results["bulk"] = {"posts": args.posts, "rows_per_second": round(args.posts / elapsed)}
+        app.dependency_overrides.pop(get_async_db, None)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
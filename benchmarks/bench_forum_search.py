@@ -0,0 +1,77 @@
+"""
+Forum search latency: the FTS5 backend versus a LIKE scan.
+
+Seeds a file-backed SQLite database with --rows posts of random words (the
+FTS5 index is filled by the sync triggers as rows are inserted), then runs the
+same queries through both search backends and reports per-query latency.
+
+    poetry run python benchmarks/bench_forum_search.py --rows 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from demo_auth_svc import search
+from demo_auth_svc.models.base import Base
+from demo_auth_svc.models.forum_post import ForumPost
+
+QUERIES = ["meeting", "quarterly budget", "plan*", "office lunch thursday", "zebra"]
+
+
+def seed(url: str, rows: int, rng: random.Random) -> None:
+    vocabulary = [f"word{i}" for i in range(5000)] + ["meeting", "quarterly", "budget", "planning", "office",
+                                                      "lunch", "thursday", "plan", "planned"]
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for start in range(0, rows, 10000):
+            batch = [{"user_id": rng.randint(1, 1000), "content": " ".join(rng.choices(vocabulary, k=rng.randint(8, 40)))}
+                     for _ in range(min(10000, rows - start))]
+            connection.execute(insert(ForumPost), batch)
+    engine.dispose()
+
+
+async def time_backend(url: str, backend: search.SearchBackend, repeat: int) -> dict:
+    engine = create_async_engine(url)
+    factory = async_sessionmaker(bind=engine)
+    results = {}
+    async with factory() as db:
+        for q in QUERIES:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await backend.search(db, search.parse_terms(q), 11)
+                timings.append(time.perf_counter() - start)
+            results[q] = round(statistics.median(timings) * 1000, 2)
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        seed(f"sqlite:///{path}", args.rows, random.Random(args.seed))
+        results = {"rows": args.rows, "seed_seconds": round(time.perf_counter() - start, 1), "median_ms": {}}
+        for backend in (search.FTS5Backend(), search.LikeBackend()):
+            results["median_ms"][backend.name] = asyncio.run(
+                time_backend(f"sqlite+aiosqlite:///{path}", backend, args.repeat))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
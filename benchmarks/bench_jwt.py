@@ -0,0 +1,66 @@
+"""
+JWT verifications per second for each supported algorithm.
+
+"cold" verifies a distinct token every time, so every call does the signature
+check; "hot" verifies the same token repeatedly and is served from the key
+ring's verified-token LRU.
+
+    poetry run python benchmarks/bench_jwt.py --tokens 2000 --seconds 1
+"""
+import argparse
+import json
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from jwt_module import KeyRing, SigningKey
+
+
+def build_key(algorithm: str) -> SigningKey:
+    if algorithm == "HS256":
+        return SigningKey.from_secret("bench", b"benchmark-secret")
+    if algorithm == "RS256":
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private = ec.generate_private_key(ec.SECP256R1())
+    pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption())
+    return SigningKey.from_pem("bench", algorithm, pem)
+
+
+def rate(fn, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        fn()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000, help="distinct tokens for the cold run")
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration of each measurement")
+    args = parser.parse_args()
+
+    results = {}
+    for algorithm in ("HS256", "RS256", "ES256"):
+        key = build_key(algorithm)
+        signer = KeyRing(key, cache_size=0)
+        tokens = [signer.sign({"sub": str(i), "exp": time.time() + 3600}) for i in range(args.tokens)]
+
+        cold = KeyRing(key, cache_size=0)
+        position = iter(range(10 ** 12))
+        cold_rate = rate(lambda: cold.verify(tokens[next(position) % len(tokens)]), args.seconds)
+
+        hot = KeyRing(key)
+        hot_rate = rate(lambda: hot.verify(tokens[0]), args.seconds)
+
+        results[algorithm] = {"cold_verifications_per_s": round(cold_rate), "hot_verifications_per_s": round(hot_rate)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
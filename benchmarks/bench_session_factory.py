@@ -0,0 +1,77 @@
+"""
+Per-request session overhead of the get_db dependency.
+
+Compares the previous implementation, which built a new sessionmaker and
+scoped_session registry for every request, with the single module-level
+SessionLocal factory. Each iteration opens a session, runs SELECT 1 and closes
+it, as a request handler would.
+
+    poetry run python benchmarks/bench_session_factory.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from demo_auth_svc.models.base import engine_options
+
+
+def per_request_factory(engine):
+    def get_db():
+        session = scoped_session(sessionmaker(bind=engine))
+        try:
+            yield session
+        finally:
+            session.close()
+    return get_db
+
+
+def shared_factory(engine):
+    session_local = sessionmaker(bind=engine)
+
+    def get_db():
+        session = session_local()
+        try:
+            yield session
+        finally:
+            session.close()
+    return get_db
+
+
+def run(get_db, iterations: int, query: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        dependency = get_db()
+        session = next(dependency)
+        if query:
+            session.execute(text("SELECT 1"))
+        dependency.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url, **engine_options(url))
+        results = {}
+        for name, factory in (("per_request_sessionmaker", per_request_factory), ("shared_sessionmaker", shared_factory)):
+            get_db = factory(engine)
+            run(get_db, 1000, query=True)  # warm up the pool
+            for query in (False, True):
+                elapsed = run(get_db, args.iterations, query)
+                key = f"{name}{'_select1' if query else ''}"
+                results[key] = {"us_per_request": round(elapsed / args.iterations * 1e6, 2)}
+        engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
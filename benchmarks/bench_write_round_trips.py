@@ -0,0 +1,119 @@
+"""
+Database round trips and latency of forum post / meeting writes.
+
+"orm" is the previous pattern: SELECT the object, mutate or delete it,
+commit, then refresh (a SELECT) for the response. "returning" is the pattern
+the routers use now: a single UPDATE ... RETURNING or DELETE with the 404 taken
+from the result, then commit. Round trips count every statement sent to the
+database plus the COMMIT.
+
+    poetry run python benchmarks/bench_write_round_trips.py --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, delete, event, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from demo_auth_svc.models.base import Base
+from demo_auth_svc.models.forum_post import ForumPost
+from demo_auth_svc.models.meeting import Meeting
+
+
+async def orm_update_post(db, post_id, i):
+    post = (await db.execute(select(ForumPost).where(ForumPost.post_id == post_id))).scalars().first()
+    post.content = f"edit {i}"
+    await db.commit()
+    await db.refresh(post)
+
+
+async def returning_update_post(db, post_id, i):
+    (await db.execute(update(ForumPost).where(ForumPost.post_id == post_id).values(content=f"edit {i}")
+                      .returning(ForumPost.post_id, ForumPost.user_id, ForumPost.content, ForumPost.timestamp)
+                      .execution_options(synchronize_session=False))).first()
+    await db.commit()
+
+
+async def orm_delete_post(db, post_id, i):
+    post = (await db.execute(select(ForumPost).where(ForumPost.post_id == post_id))).scalars().first()
+    await db.delete(post)
+    await db.commit()
+
+
+async def returning_delete_post(db, post_id, i):
+    await db.execute(delete(ForumPost).where(ForumPost.post_id == post_id).execution_options(synchronize_session=False))
+    await db.commit()
+
+
+async def orm_update_meeting(db, meeting_id, i):
+    meeting = (await db.execute(select(Meeting).where(Meeting.meeting_id == meeting_id))).scalars().first()
+    meeting.location = f"Room {i}"
+    await db.commit()
+    await db.refresh(meeting)
+
+
+async def returning_update_meeting(db, meeting_id, i):
+    (await db.execute(update(Meeting).where(Meeting.meeting_id == meeting_id).values(location=f"Room {i}")
+                      .returning(Meeting).execution_options(synchronize_session=False))).first()
+    await db.commit()
+
+
+async def run(url, iterations):
+    engine = create_async_engine(url)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    trips = [0]
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: trips.__setitem__(0, trips[0] + 1))
+    event.listen(engine.sync_engine, "commit", lambda *args: trips.__setitem__(0, trips[0] + 1))
+
+    results = {}
+    cases = [
+        ("update_post", ForumPost, orm_update_post, returning_update_post),
+        ("delete_post", ForumPost, orm_delete_post, returning_delete_post),
+        ("update_meeting", Meeting, orm_update_meeting, returning_update_meeting),
+    ]
+    for name, model, *variants in cases:
+        for variant in variants:
+            async with factory() as db:
+                if model is ForumPost:
+                    rows = [{"user_id": 1, "content": "x"} for _ in range(iterations)]
+                    ids = (await db.execute(insert(ForumPost).returning(ForumPost.post_id), rows)).scalars().all()
+                else:
+                    rows = [{"user_id": 1, "time": datetime(2024, 1, 1, 9, 0), "location": "A", "participants": ""}
+                            for _ in range(iterations)]
+                    ids = (await db.execute(insert(Meeting).returning(Meeting.meeting_id), rows)).scalars().all()
+                await db.commit()
+            trips[0] = 0
+            start = time.perf_counter()
+            for i, row_id in enumerate(ids):
+                async with factory() as db:
+                    await variant(db, row_id, i)
+            elapsed = time.perf_counter() - start
+            results.setdefault(name, {})[variant.__name__.split("_")[0]] = {
+                "round_trips_per_op": round(trips[0] / iterations, 2),
+                "us_per_op": round(elapsed / iterations * 1e6, 1),
+            }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        results = asyncio.run(run(f"sqlite+aiosqlite:///{path}", args.iterations))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
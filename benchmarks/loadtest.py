@@ -0,0 +1,260 @@
+"""
+HTTP load test of the forum and meeting endpoints.
+
+Seeds a file-backed SQLite database with --users users, --posts forum posts and
+--meetings meetings (see demo_auth_svc.seed), starts demo_auth_svc.app:app under
+uvicorn in a separate process (Google Calendar is replaced by a local fake, so
+the in-process calendar worker runs against it), then drives each endpoint with
+--concurrency concurrent clients. Throughput and p50/p95/p99 latency per endpoint are printed as JSON and
+optionally written to --output.
+
+Pass the JSON of an earlier run as --baseline to compare: the run fails (exit
+status 1) when an endpoint's p95 grows, or its throughput drops, by more than
+--tolerance, or when any request errors.
+
+    poetry run python benchmarks/loadtest.py --requests 2000 --concurrency 32 --output before.json
+    poetry run python benchmarks/loadtest.py --requests 2000 --concurrency 32 --baseline before.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+class FakeGoogle:
+    """Answers Calendar event inserts, single or batched, after --google-latency-ms."""
+
+    def __init__(self, latency: float) -> None:
+        fake = self
+        self.latency = latency
+        self.events = itertools.count(1)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle(self):
+                # The service may drop connections when it is stopped mid-request.
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                time.sleep(fake.latency)
+                if self.path.startswith("/batch"):
+                    boundary = "fake_batch"
+                    items = body.count("Content-ID: <item-")
+                    parts = "".join(
+                        f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-item-{i}>\r\n\r\n"
+                        f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+                        f"{json.dumps({'id': f'evt-{next(fake.events)}'})}\r\n" for i in range(items))
+                    self.reply(f"{parts}--{boundary}--\r\n".encode(), f"multipart/mixed; boundary={boundary}")
+                else:
+                    self.reply(json.dumps({"id": f"evt-{next(fake.events)}"}).encode(), "application/json")
+
+            def reply(self, payload, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def scenarios(args, rng: random.Random):
+    """Endpoint name -> function returning (method, path, json body) for one request."""
+    from demo_auth_svc.seed import WORDS
+
+    return {
+        "forum_list": lambda: ("GET", f"/forum?page={rng.randint(1, 50)}", None),
+        "forum_get": lambda: ("GET", f"/forum/{rng.randint(1, args.posts)}", None),
+        "forum_search": lambda: ("GET", f"/forum/search?q={rng.choice(WORDS)}", None),
+        "forum_create": lambda: ("POST", "/forum", {"user_id": rng.randint(1, args.users),
+                                                    "content": " ".join(rng.choices(WORDS, k=12))}),
+        "meeting_get": lambda: ("GET", f"/meetings/{rng.randint(1, args.meetings)}", None),
+        "meetings_by_user": lambda: ("GET", f"/meetings/user/{rng.randint(1, args.users)}?limit=50", None),
+        "meeting_create": lambda: ("POST", "/meetings", {
+            "meeting_time": "2025-03-01T10:00:00", "location": "Room 1",
+            "participants": ["a@example.com", "b@example.com"], "oauth_token": "load-test"}),
+    }
+
+
+async def drive(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    remaining = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(remaining) < total:
+            method, path, body = make_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def run_load(base_url: str, token: str, args, rng: random.Random) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"},
+                                 limits=limits, timeout=60) as client:
+        results = {}
+        for name, make_request in scenarios(args, rng).items():
+            if args.endpoints and name not in args.endpoints:
+                continue
+            await drive(client, make_request, args.warmup, args.concurrency)
+            results[name] = await drive(client, make_request, args.requests, args.concurrency)
+        return results
+
+
+def start_server(env: dict, workers: int) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "demo_auth_svc.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The service did not start within 30 seconds")
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for name, current in results["endpoints"].items():
+        if current["errors"]:
+            failures.append(f"{name}: {current['errors']} failed requests")
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            failures.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--meetings", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--google-latency-ms", type=float, default=50)
+    parser.add_argument("--endpoints", nargs="*", help="only run these endpoints")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput regression (fraction)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    google = FakeGoogle(args.google_latency_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])),
+            "DATABASE_URL": database_url,
+            "JWT_SECRET": secrets.token_hex(32),
+            "GOOGLE_CALENDAR_API_BASE": f"{google.url}/calendar/v3",
+            "GOOGLE_CALENDAR_BATCH_URL": f"{google.url}/batch/calendar/v3",
+            "CALENDAR_WORKER_POLL_SECONDS": "0.2",
+            # Only Calendar is faked; no login goes through Google's keys.
+            "GOOGLE_JWKS_PREFETCH": "false",
+            "CLIENT_ID": "load-test",
+            "CLIENT_SECRET": "load-test",
+            "REDIRECT_URI": "http://localhost/callback",
+        }
+        # config is read at import, so the load generator shares the server's settings.
+        os.environ.update(env)
+        sys.path.insert(0, SRC)
+        import jwt_module
+        from demo_auth_svc import seed
+
+        engine = seed.bulk_load_engine(database_url)
+        seed.seed(engine, args.users, args.posts, args.meetings, seed=args.seed)
+        engine.dispose()
+        token = jwt_module.create_token({"google_id": "g1", "email": "user1@example.com"})
+        process, base_url = start_server(env, args.workers)
+        try:
+            endpoints = asyncio.run(run_load(base_url, token, args, rng))
+        finally:
+            process.terminate()
+            process.wait()
+            google.close()
+
+    results = {
+        "run": {"users": args.users, "posts": args.posts, "meetings": args.meetings, "requests": args.requests,
+                "concurrency": args.concurrency, "workers": args.workers,
+                "google_latency_ms": args.google_latency_ms},
+        "endpoints": endpoints,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.tolerance)
+        if failures:
+            print("Regressions against " + args.baseline + ":\n  " + "\n  ".join(failures), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""add row_counters table
+
+Revision ID: 3f6c2d8e91ab
+Revises: a18ab4ab5fdf
+Create Date: 2026-10-17 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2d8e91ab'
+down_revision: Union[str, None] = 'a18ab4ab5fdf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('row_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed the forum post counter from the existing rows.
+    op.execute("INSERT INTO row_counters (name, value) SELECT 'forum_posts', COUNT(*) FROM forum_posts")
+
+
+def downgrade() -> None:
+    op.drop_table('row_counters')
@@ -0,0 +1,42 @@
+"""add calendar_jobs table
+
+Revision ID: 7b41e0c2d5f3
+Revises: 3f6c2d8e91ab
+Create Date: 2026-10-17 11:03:52.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b41e0c2d5f3'
+down_revision: Union[str, None] = '3f6c2d8e91ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('calendar_jobs',
+    sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('meeting_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('oauth_token', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('event_id', sa.String(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('available_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['meeting_id'], ['meetings.meeting_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id'),
+    sa.UniqueConstraint('meeting_id')
+    )
+    op.create_index('ix_calendar_jobs_status_available_at', 'calendar_jobs', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calendar_jobs_status_available_at', table_name='calendar_jobs')
+    op.drop_table('calendar_jobs')
@@ -0,0 +1,54 @@
+"""add meeting_participants table
+
+Revision ID: c5a9e3f17d20
+Revises: 7b41e0c2d5f3
+Create Date: 2026-10-17 13:26:08.511734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9e3f17d20'
+down_revision: Union[str, None] = '7b41e0c2d5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    participants_table = op.create_table('meeting_participants',
+    sa.Column('meeting_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['meeting_id'], ['meetings.meeting_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('meeting_id', 'email')
+    )
+    op.create_index('ix_meeting_participants_email', 'meeting_participants', ['email'], unique=False)
+
+    # Backfill from the comma-joined column; splitting is done here rather than in
+    # dialect-specific SQL.
+    meetings = sa.table('meetings', sa.column('meeting_id', sa.Integer()), sa.column('participants', sa.Text()))
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(meetings.c.meeting_id, meetings.c.participants).order_by(meetings.c.meeting_id)
+        if last_id is not None:
+            query = query.where(meetings.c.meeting_id > last_id)
+        rows = bind.execute(query.limit(BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            break
+        batch = []
+        for meeting_id, participants in rows:
+            emails = {email.strip().lower() for email in (participants or "").split(",") if email.strip()}
+            batch.extend({"meeting_id": meeting_id, "email": email} for email in sorted(emails))
+        if batch:
+            op.bulk_insert(participants_table, batch)
+        last_id = rows[-1].meeting_id
+
+def downgrade() -> None:
+    op.drop_index('ix_meeting_participants_email', table_name='meeting_participants')
+    op.drop_table('meeting_participants')
@@ -0,0 +1,52 @@
+"""add forum_posts full-text index
+
+Revision ID: e0b7d2c48a61
+Revises: e82f4b6a9c17
+Create Date: 2026-10-17 15:18:44.270391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0b7d2c48a61'
+down_revision: Union[str, None] = 'e82f4b6a9c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite only; other databases are served by their own search backend.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE forum_posts_fts USING fts5("
+        "content, content='forum_posts', content_rowid='post_id', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER forum_posts_fts_ai AFTER INSERT ON forum_posts BEGIN "
+        "INSERT INTO forum_posts_fts(rowid, content) VALUES (new.post_id, new.content); END"
+    )
+    op.execute(
+        "CREATE TRIGGER forum_posts_fts_ad AFTER DELETE ON forum_posts BEGIN "
+        "INSERT INTO forum_posts_fts(forum_posts_fts, rowid, content) VALUES ('delete', old.post_id, old.content); END"
+    )
+    op.execute(
+        "CREATE TRIGGER forum_posts_fts_au AFTER UPDATE OF content ON forum_posts BEGIN "
+        "INSERT INTO forum_posts_fts(forum_posts_fts, rowid, content) VALUES ('delete', old.post_id, old.content); "
+        "INSERT INTO forum_posts_fts(rowid, content) VALUES (new.post_id, new.content); END"
+    )
+    # Index the posts that already exist.
+    op.execute("INSERT INTO forum_posts_fts(forum_posts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS forum_posts_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS forum_posts_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS forum_posts_fts_ai")
+    op.execute("DROP TABLE IF EXISTS forum_posts_fts")
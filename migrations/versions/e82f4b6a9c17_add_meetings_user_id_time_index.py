@@ -0,0 +1,26 @@
+"""add meetings (user_id, time) index
+
+Revision ID: e82f4b6a9c17
+Revises: c5a9e3f17d20
+Create Date: 2026-10-17 14:02:37.906215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82f4b6a9c17'
+down_revision: Union[str, None] = 'c5a9e3f17d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_meetings_user_id_time', 'meetings', ['user_id', 'time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meetings_user_id_time', table_name='meetings')
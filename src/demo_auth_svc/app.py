@@ -1,8 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import Response
 
+import jwt_module
+from demo_auth_svc import calendar_worker, config, counters, credentials, http_client, metrics, oauth, query_log
+from demo_auth_svc import google_calendar_integration as gc_integration
 from demo_auth_svc.routers import google_auth, forum, meeting
 
-app = FastAPI(debug=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse JWT key material, OAuth client settings and token keys once, failing startup on bad configuration.
+    jwt_module.get_keyring()
+    credentials.get_cipher()
+    oauth.init_oauth()
+    http_client.get_http_client()
+    if config.GOOGLE_JWKS_PREFETCH:
+        await google_auth.google_jwks.warm_up()
+    tasks = [asyncio.create_task(google_auth.google_jwks.refresh_periodically())]
+    if config.FORUM_COUNT_RECONCILE_SECONDS > 0:
+        tasks.append(asyncio.create_task(counters.reconcile_periodically(config.FORUM_COUNT_RECONCILE_SECONDS)))
+    if config.CALENDAR_WORKER_IN_PROCESS:
+        calendar_worker.in_process_worker = calendar_worker.CalendarJobWorker()
+        tasks.append(asyncio.create_task(calendar_worker.in_process_worker.run()))
+    yield
+    calendar_worker.in_process_worker = None
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await http_client.close_http_client()
+    metrics.mark_process_dead()
+
+
+app = FastAPI(debug=config.DEBUG, lifespan=lifespan)
+
+app.add_middleware(query_log.QueryLogMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics_registry = metrics.build_registry([metrics.SnapshotCollector(
+    caches=lambda: {"forum_post": forum.post_cache.backend, "forum_pages": forum.forum_cache.backend},
+    retriers=lambda: [gc_integration.calendar_retrier],
+)])
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Prometheus exposition of request, database, pool, cache and Google API metrics."""
+    return metrics.render(metrics_registry)
+
 
 app.include_router(google_auth.router)
 app.include_router(forum.router)
@@ -0,0 +1,303 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from demo_auth_svc import config
+
+
+class CacheBackend:
+    """
+    Minimal async key/value interface shared by the response caches.
+
+    Values are bytes. `incr` must be atomic across every process sharing the
+    backend, since it drives invalidation.
+    """
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        """The current value of an `incr` counter, 0 if it was never incremented."""
+        value = await self.get(key)
+        return int(value) if value is not None else 0
+
+    async def set_if_counter(self, key: str, value: bytes, ttl: Optional[float], counter_key: str,
+                             expected: int) -> bool:
+        """
+        Store `value` only while the `counter_key` counter still equals `expected`.
+
+        This generic version stores and then re-reads the counter, deleting the entry
+        if it moved, so a concurrent `incr` never leaves the value behind. Backends
+        that can check and store atomically override it.
+        """
+        if await self.counter(counter_key) != expected:
+            return False
+        await self.set(key, value, ttl)
+        if await self.counter(counter_key) != expected:
+            await self.delete(key)
+            return False
+        return True
+
+
+class MemoryCache(CacheBackend):
+    """
+    A per-process LRU with optional per-entry TTL.
+
+    Holds at most `max_entries` values, evicting the least recently used. Other
+    processes do not see its contents or its counters, so with several workers
+    entries may be stale for up to their TTL; use a shared backend there.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        # Counters are kept apart so they are never evicted or expired.
+        self._counters: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_sync(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set_sync(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._entries[key] = (value, self.clock() + ttl if ttl is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete_sync(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        return self.get_sync(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.set_sync(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self.delete_sync(key)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def counter(self, key: str) -> int:
+        # Not a lookup of a cached value, so it stays out of the hit/miss counts.
+        return self._counters.get(key, 0)
+
+    async def set_if_counter(self, key: str, value: bytes, ttl: Optional[float], counter_key: str,
+                             expected: int) -> bool:
+        # No await between the check and the store, so nothing can interleave.
+        if self._counters.get(counter_key, 0) != expected:
+            return False
+        self.set_sync(key, value, ttl)
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+# KEYS: counter, entry. ARGV: expected counter value, value, TTL in ms (0 for none).
+# Scripts run atomically, so no INCR can land between the check and the SET.
+SET_IF_COUNTER_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+else
+    redis.call('SET', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+
+class RedisCache(CacheBackend):
+    """
+    A cache shared by every process through a Redis-compatible server.
+
+    `client` is anything with the redis.asyncio get/set/delete/incr/eval API (Redis,
+    Valkey, KeyDB, ...); when omitted one is created from `url`, which needs the
+    optional `redis` package.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "demo_auth_svc:") -> None:
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError as e:
+                raise RuntimeError("The Redis cache backend needs the 'redis' package") from e
+            client = redis_asyncio.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self.prefix + key))
+
+    async def set_if_counter(self, key: str, value: bytes, ttl: Optional[float], counter_key: str,
+                             expected: int) -> bool:
+        stored = await self.client.eval(SET_IF_COUNTER_SCRIPT, 2, self.prefix + counter_key, self.prefix + key,
+                                        expected, value, int(ttl * 1000) if ttl else 0)
+        return bool(stored)
+
+
+def build_backend(kind: Optional[str] = None, max_entries: Optional[int] = None,
+                  ttl: Optional[float] = None) -> Optional[CacheBackend]:
+    """
+    The backend selected by `kind` ("memory", "redis" or "none"), or None when caching is off.
+
+    Unset arguments default to the RESPONSE_CACHE_* settings.
+    """
+    kind = config.RESPONSE_CACHE_BACKEND if kind is None else kind
+    if kind == "memory":
+        return MemoryCache(config.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+                           default_ttl=config.RESPONSE_CACHE_TTL_SECONDS if ttl is None else ttl)
+    if kind == "redis":
+        return RedisCache(config.RESPONSE_CACHE_REDIS_URL)
+    return None
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Serialized responses stored under a namespace version.
+
+    Keys embed the namespace's current version, so `invalidate` (called by every
+    write) makes all earlier entries unreachable at once; they age out through the
+    backend's LRU/TTL. Entries are stored with their ETag so a matching
+    If-None-Match can be answered without touching the database.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], namespace: str, ttl: Optional[float] = None) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def version(self) -> int:
+        value = await self.backend.get(f"{self.namespace}:version")
+        return int(value) if value is not None else 0
+
+    async def invalidate(self) -> None:
+        if self.backend is not None:
+            await self.backend.incr(f"{self.namespace}:version")
+
+    async def key(self, params: Dict[str, Any]) -> str:
+        encoded = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{self.namespace}:v{await self.version()}:{encoded}"
+
+    async def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        value = await self.backend.get(key)
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    async def set(self, key: str, body: bytes) -> str:
+        etag = strong_etag(body)
+        await self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+        return etag
+
+
+class ObjectCache:
+    """
+    Serialized objects by id, invalidated one id at a time.
+
+    A reader takes `epoch()` before loading from the database and passes it to
+    `set`, which stores only if no `invalidate` happened in between; the check and
+    the store are one atomic backend operation (CacheBackend.set_if_counter).
+    Since `invalidate` bumps the epoch before deleting, a load that raced a write
+    is either not stored or deleted afterwards. With a shared backend both the
+    entries and the epoch are shared, so a write in one process invalidates the
+    entry for all of them.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], namespace: str, ttl: Optional[float] = None) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, object_id: Any) -> Optional[bytes]:
+        return await self.backend.get(f"{self.namespace}:{object_id}")
+
+    async def epoch(self) -> int:
+        return await self.backend.counter(f"{self.namespace}:epoch")
+
+    async def set(self, object_id: Any, body: bytes, epoch: int) -> bool:
+        return await self.backend.set_if_counter(f"{self.namespace}:{object_id}", body, self.ttl,
+                                                 f"{self.namespace}:epoch", epoch)
+
+    async def invalidate(self, object_id: Any) -> None:
+        if self.backend is not None:
+            await self.backend.incr(f"{self.namespace}:epoch")
+            await self.backend.delete(f"{self.namespace}:{object_id}")
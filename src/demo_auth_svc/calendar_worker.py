@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from demo_auth_svc import config
+from demo_auth_svc.models import base
+from demo_auth_svc.models.calendar_job import CalendarJob, JOB_FAILED, JOB_PENDING, JOB_RUNNING, JOB_SUCCEEDED
+from demo_auth_svc.models.meeting import Meeting
+import demo_auth_svc.google_calendar_integration as gc_integration
+
+
+def utcnow() -> datetime:
+    # Naive UTC, matching CURRENT_TIMESTAMP server defaults.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CalendarJobWorker:
+    """
+    Drains the calendar_jobs outbox, creating Google Calendar events off the request path.
+
+    Jobs are claimed with a conditional UPDATE, so several workers (in-process or
+    separate `demo_auth_svc-calendar-worker` processes) can share the queue without
+    double-sending. Claimed jobs that share an OAuth token are sent as Google batch
+    requests, and at most `concurrency` Calendar calls run at once. Retryable
+    failures are re-queued with a delay until `max_attempts`; jobs left running by a
+    crashed worker are picked up again once their lease expires.
+    """
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None,
+                 concurrency: int = config.CALENDAR_WORKER_CONCURRENCY,
+                 batch_size: int = config.CALENDAR_WORKER_BATCH_SIZE,
+                 poll_interval: float = config.CALENDAR_WORKER_POLL_SECONDS,
+                 max_attempts: int = config.CALENDAR_JOB_MAX_ATTEMPTS,
+                 retry_delay: float = config.CALENDAR_JOB_RETRY_SECONDS,
+                 lease_seconds: int = config.CALENDAR_JOB_LEASE_SECONDS) -> None:
+        self.session_factory = session_factory or base.AsyncSessionLocal
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Wake the worker loop after new jobs were committed."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> List[int]:
+        now = utcnow()
+        async with self.session_factory() as session:
+            candidates = (await session.execute(
+                select(CalendarJob.job_id)
+                .where(or_(
+                    and_(CalendarJob.status == JOB_PENDING, CalendarJob.available_at <= now),
+                    and_(CalendarJob.status == JOB_RUNNING,
+                         CalendarJob.updated_at < now - timedelta(seconds=self.lease_seconds)),
+                ))
+                .order_by(CalendarJob.available_at)
+                .limit(self.batch_size)
+            )).scalars().all()
+            claimed = []
+            for job_id in candidates:
+                result = await session.execute(
+                    update(CalendarJob)
+                    .where(CalendarJob.job_id == job_id,
+                           or_(CalendarJob.status == JOB_PENDING,
+                               CalendarJob.updated_at < now - timedelta(seconds=self.lease_seconds)))
+                    .values(status=JOB_RUNNING, attempts=CalendarJob.attempts + 1, updated_at=now)
+                )
+                if result.rowcount == 1:
+                    claimed.append(job_id)
+            await session.commit()
+        return claimed
+
+    async def _load(self, job_ids: List[int]) -> list:
+        async with self.session_factory() as session:
+            return (await session.execute(
+                select(CalendarJob.job_id, CalendarJob.oauth_token, CalendarJob.attempts, Meeting.time,
+                       Meeting.location, Meeting.participants)
+                .join(Meeting, Meeting.meeting_id == CalendarJob.meeting_id)
+                .where(CalendarJob.job_id.in_(job_ids))
+            )).all()
+
+    async def _process(self, oauth_token: Optional[str], rows: list, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            if oauth_token is None:
+                # The stored token could not be decrypted (see credentials.EncryptedText).
+                results = [{"success": False, "message": "OAuth token unavailable"} for _ in rows]
+            else:
+                # The connection is released during the Google round trip.
+                results = await gc_integration.add_google_calendar_events_batch(
+                    [{"meeting_time": row.time, "location": row.location,
+                      "participants": [email for email in row.participants.split(",") if email]} for row in rows],
+                    oauth_token=oauth_token,
+                )
+            now = utcnow()
+            async with self.session_factory() as session:
+                for row, result in zip(rows, results):
+                    if result.get("success"):
+                        values = {"status": JOB_SUCCEEDED, "event_id": (result.get("response") or {}).get("id"),
+                                  "last_error": None, "oauth_token": None}
+                    elif result.get("retryable") and row.attempts < self.max_attempts:
+                        values = {"status": JOB_PENDING, "last_error": result.get("message"),
+                                  "available_at": now + timedelta(seconds=self.retry_delay * 2 ** (row.attempts - 1))}
+                    else:
+                        values = {"status": JOB_FAILED, "last_error": result.get("message"), "oauth_token": None}
+                    await session.execute(update(CalendarJob).where(CalendarJob.job_id == row.job_id)
+                                          .values(updated_at=now, **values))
+                await session.commit()
+
+    async def run_once(self) -> int:
+        """Claim and process one batch of due jobs. Returns the number of jobs processed."""
+        job_ids = await self._claim()
+        if not job_ids:
+            return 0
+        # Jobs sharing a token go to Google together, in batch requests of up to 50 inserts.
+        by_token = defaultdict(list)
+        for row in await self._load(job_ids):
+            by_token[row.oauth_token].append(row)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        groups = list(by_token.items())
+        results = await asyncio.gather(*(self._process(token, rows, semaphore) for token, rows in groups),
+                                       return_exceptions=True)
+        for (_, rows), outcome in zip(groups, results):
+            if isinstance(outcome, Exception):
+                logging.error(f"Calendar jobs {[row.job_id for row in rows]} crashed: {outcome}", exc_info=outcome)
+        return len(job_ids)
+
+    async def run(self) -> None:
+        """Process jobs until cancelled, sleeping between empty polls unless notified."""
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logging.error(e, exc_info=True)
+                processed = 0
+            if processed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+# The worker running inside the API process, if any; see app.lifespan.
+in_process_worker: Optional[CalendarJobWorker] = None
+
+
+def notify() -> None:
+    """Tell the in-process worker (when there is one) that a job is waiting."""
+    if in_process_worker is not None:
+        in_process_worker.notify()
+
+
+def main() -> None:
+    """Entry point for running the worker as its own process."""
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(CalendarJobWorker().run())
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,131 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///:memory:")
-SERVICE_PORT = os.getenv("SERVICE_PORT", 8000)
\ No newline at end of file
+
+# Async driver used for each sync dialect when ASYNC_DATABASE_URL is not set.
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(DATABASE_URL)
+SERVICE_PORT = os.getenv("SERVICE_PORT", 8000)
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+# Worker processes; 0 starts one per available core
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", 0))
+# "auto" uses uvloop / httptools when installed (the "server" extra), else asyncio / h11
+SERVICE_LOOP = os.getenv("SERVICE_LOOP", "auto")
+SERVICE_HTTP = os.getenv("SERVICE_HTTP", "auto")
+# Longer than the idle timeout of common load balancers (60s), so they never reuse a closed connection
+SERVICE_KEEPALIVE_SECONDS = int(os.getenv("SERVICE_KEEPALIVE_SECONDS", 75))
+SERVICE_BACKLOG = int(os.getenv("SERVICE_BACKLOG", 2048))
+# On shutdown, in-flight requests get this long to finish before they are cancelled
+SERVICE_GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("SERVICE_GRACEFUL_SHUTDOWN_SECONDS", 30))
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+FORUM_COUNT_RECONCILE_SECONDS = int(os.getenv("FORUM_COUNT_RECONCILE_SECONDS", 300))
+FORUM_EXPORT_BATCH_SIZE = int(os.getenv("FORUM_EXPORT_BATCH_SIZE", 1000))
+FORUM_BULK_MAX_ITEMS = int(os.getenv("FORUM_BULK_MAX_ITEMS", 100000))
+FORUM_BULK_CHUNK_SIZE = int(os.getenv("FORUM_BULK_CHUNK_SIZE", 5000))
+# "auto" picks the full-text backend registered for the database dialect; see search.py.
+FORUM_SEARCH_BACKEND = os.getenv("FORUM_SEARCH_BACKEND", "auto")
+
+# Response cache for forum reads: "memory" (per-process LRU), "redis" (shared) or "none".
+# Writes only invalidate other workers' pages through "redis", so a multi-worker server
+# (see SERVICE_WORKERS) turns the memory backend off rather than serve stale pages.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+# Read-through cache of single forum posts: "memory", "redis" or "none", like the response cache.
+# Turned off with several workers unless shared, as above.
+POST_CACHE_BACKEND = os.getenv("POST_CACHE_BACKEND", RESPONSE_CACHE_BACKEND)
+POST_CACHE_MAX_ENTRIES = int(os.getenv("POST_CACHE_MAX_ENTRIES", 10000))
+POST_CACHE_TTL_SECONDS = float(os.getenv("POST_CACHE_TTL_SECONDS", 60))
+
+# Connection pool sizing (ignored for in-memory SQLite, which uses a single connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# JWT issuance and verification
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_SECRET = os.getenv("JWT_SECRET")
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "default")
+# Extra verification-only keys for rotation, as "kid=path/to/public.pem" pairs separated by commas
+JWT_PUBLIC_KEY_FILES = os.getenv("JWT_PUBLIC_KEY_FILES", "")
+JWT_ISSUER = os.getenv("JWT_ISSUER", "demo_auth_svc")
+JWT_TTL_SECONDS = int(os.getenv("JWT_TTL_SECONDS", 3600))
+JWT_VERIFIED_CACHE_SIZE = int(os.getenv("JWT_VERIFIED_CACHE_SIZE", 4096))
+
+# Google OAuth client, loaded and validated at startup (see oauth.py)
+GOOGLE_CLIENT_ID = os.getenv("CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+GOOGLE_REDIRECT_URI = os.getenv("REDIRECT_URI")
+GOOGLE_AUTH_URL = os.getenv("GOOGLE_AUTH_URL", "https://accounts.google.com/o/oauth2/v2/auth")
+# Key for signing OAuth state and deriving PKCE verifiers; derived from CLIENT_SECRET when unset.
+# Every worker must share it.
+OAUTH_STATE_SECRET = os.getenv("OAUTH_STATE_SECRET")
+OAUTH_STATE_TTL_SECONDS = int(os.getenv("OAUTH_STATE_TTL_SECONDS", 600))
+
+# Google ID token verification
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_JWKS_DEFAULT_TTL_SECONDS = int(os.getenv("GOOGLE_JWKS_DEFAULT_TTL_SECONDS", 3600))
+GOOGLE_JWKS_MIN_REFETCH_SECONDS = int(os.getenv("GOOGLE_JWKS_MIN_REFETCH_SECONDS", 60))
+# Fetch the keys during startup so the first Google login does not wait for them
+GOOGLE_JWKS_PREFETCH = os.getenv("GOOGLE_JWKS_PREFETCH", "true").lower() in ("1", "true", "yes")
+
+# Outbound HTTP (Google APIs)
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+GOOGLE_CALENDAR_API_BASE = os.getenv("GOOGLE_CALENDAR_API_BASE", "https://www.googleapis.com/calendar/v3")
+GOOGLE_CALENDAR_BATCH_URL = os.getenv("GOOGLE_CALENDAR_BATCH_URL", "https://www.googleapis.com/batch/calendar/v3")
+# Google accepts at most 50 calls in one Calendar batch request.
+GOOGLE_CALENDAR_BATCH_SIZE = min(int(os.getenv("GOOGLE_CALENDAR_BATCH_SIZE", 50)), 50)
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").lower() in ("1", "true", "yes")
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", 100))
+HTTP_CLIENT_MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", 20))
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", 30))
+HTTP_CLIENT_TIMEOUT = float(os.getenv("HTTP_CLIENT_TIMEOUT", 10))
+
+# Retries and circuit breaking for Google Calendar
+GOOGLE_RETRY_MAX_ATTEMPTS = int(os.getenv("GOOGLE_RETRY_MAX_ATTEMPTS", 3))
+GOOGLE_RETRY_BASE_DELAY = float(os.getenv("GOOGLE_RETRY_BASE_DELAY", 0.5))
+GOOGLE_RETRY_MAX_DELAY = float(os.getenv("GOOGLE_RETRY_MAX_DELAY", 8))
+GOOGLE_RETRY_MAX_RETRY_AFTER = float(os.getenv("GOOGLE_RETRY_MAX_RETRY_AFTER", 30))
+GOOGLE_RETRY_BUDGET_RATIO = float(os.getenv("GOOGLE_RETRY_BUDGET_RATIO", 0.2))
+GOOGLE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GOOGLE_BREAKER_FAILURE_THRESHOLD", 5))
+GOOGLE_BREAKER_RESET_SECONDS = float(os.getenv("GOOGLE_BREAKER_RESET_SECONDS", 30))
+
+# Calendar outbox worker
+CALENDAR_WORKER_IN_PROCESS = os.getenv("CALENDAR_WORKER_IN_PROCESS", "true").lower() in ("1", "true", "yes")
+CALENDAR_WORKER_CONCURRENCY = int(os.getenv("CALENDAR_WORKER_CONCURRENCY", 10))
+CALENDAR_WORKER_POLL_SECONDS = float(os.getenv("CALENDAR_WORKER_POLL_SECONDS", 2))
+CALENDAR_WORKER_BATCH_SIZE = int(os.getenv("CALENDAR_WORKER_BATCH_SIZE", 50))
+CALENDAR_JOB_MAX_ATTEMPTS = int(os.getenv("CALENDAR_JOB_MAX_ATTEMPTS", 5))
+CALENDAR_JOB_RETRY_SECONDS = float(os.getenv("CALENDAR_JOB_RETRY_SECONDS", 30))
+# A running job not finished within this lease is assumed orphaned and re-queued.
+CALENDAR_JOB_LEASE_SECONDS = int(os.getenv("CALENDAR_JOB_LEASE_SECONDS", 300))
+# Comma-separated Fernet keys encrypting queued OAuth tokens; the first encrypts, all decrypt.
+# Derived from JWT_SECRET when unset. The API and every calendar worker must share them.
+CALENDAR_TOKEN_KEYS = os.getenv("CALENDAR_TOKEN_KEYS", "")
+
+# Bulk meeting import
+MEETING_BATCH_MAX_ITEMS = int(os.getenv("MEETING_BATCH_MAX_ITEMS", 1000))
+
+# Slow-query log and N+1 detection (opt-in; see query_log.py)
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_LOG_SLOW_MS = float(os.getenv("QUERY_LOG_SLOW_MS", 100))
+# Executions of one statement within a request that flag it as a likely N+1
+QUERY_LOG_REPEAT_THRESHOLD = int(os.getenv("QUERY_LOG_REPEAT_THRESHOLD", 5))
+# 0 disables the per-request limit; QUERY_LOG_STRICT turns overruns into errors (for test runs)
+QUERY_LOG_MAX_QUERIES = int(os.getenv("QUERY_LOG_MAX_QUERIES", 0))
+QUERY_LOG_STRICT = os.getenv("QUERY_LOG_STRICT", "false").lower() in ("1", "true", "yes")
+
+# Metrics: with several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+# writable directory so /metrics aggregates every worker. prometheus_client reads it
+# at import, so it must be in the environment before the service starts.
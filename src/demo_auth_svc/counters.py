@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from demo_auth_svc.models.base import AsyncSessionLocal
+from demo_auth_svc.models.forum_post import ForumPost
+from demo_auth_svc.models.row_counter import RowCounter
+
+FORUM_POSTS = "forum_posts"
+
+# Counter name -> table whose rows it counts.
+_COUNTED_TABLES = {
+    FORUM_POSTS: ForumPost.__table__,
+}
+
+# Awaited with the counter name whenever reconcile changes a stored value, so
+# caches holding the old total can be dropped.
+_change_listeners: List[Callable[[str], Awaitable[None]]] = []
+
+
+def add_change_listener(listener: Callable[[str], Awaitable[None]]) -> None:
+    """Register a coroutine function called with the name of every counter reconcile corrects."""
+    _change_listeners.append(listener)
+
+
+async def increment(db: AsyncSession, name: str, delta: int = 1) -> None:
+    """
+    Adjust a counter inside the caller's transaction.
+
+    The row is updated atomically (value = value + delta), so it commits or rolls
+    back together with the write it accounts for. A missing counter row is left
+    alone; the next read initialises it from the table.
+    """
+    await db.execute(update(RowCounter).where(RowCounter.name == name).values(value=RowCounter.value + delta))
+
+
+async def get_count(db: AsyncSession, name: str, session_factory: Optional[async_sessionmaker] = None) -> int:
+    """
+    Return the maintained row count for `name` with a single primary-key lookup.
+
+    A missing counter row is initialised on a session of its own (from
+    `session_factory`, default AsyncSessionLocal), so the commit it needs never
+    touches the caller's transaction.
+    """
+    value = (await db.execute(select(RowCounter.value).where(RowCounter.name == name))).scalar_one_or_none()
+    if value is None:
+        async with (session_factory or AsyncSessionLocal)() as session:
+            value = await reconcile(session, name)
+    return value
+
+
+async def reconcile(db: AsyncSession, name: str) -> int:
+    """
+    Recompute a counter from its table and correct any drift.
+
+    The recount runs inside the UPDATE/INSERT statement itself so that writes
+    committed while it runs are not lost. Commits the session, then notifies the
+    change listeners if an existing stored value differed from the recount.
+
+    Returns:
+        int: The corrected count.
+    """
+    table = _COUNTED_TABLES[name]
+    previous = (await db.execute(select(RowCounter.value).where(RowCounter.name == name))).scalar_one_or_none()
+    recount = select(func.count()).select_from(table).scalar_subquery()
+    result = await db.execute(update(RowCounter).where(RowCounter.name == name).values(value=recount))
+    if result.rowcount == 0:
+        try:
+            await db.execute(insert(RowCounter).from_select(
+                ["name", "value"], select(literal(name), func.count()).select_from(table)
+            ))
+        except IntegrityError:
+            # Another request initialised the counter first.
+            await db.rollback()
+    await db.commit()
+    value = (await db.execute(select(RowCounter.value).where(RowCounter.name == name))).scalar_one()
+    # A first initialisation corrects nothing anyone has read.
+    if previous is not None and value != previous:
+        for listener in _change_listeners:
+            try:
+                await listener(name)
+            except Exception as e:
+                logging.error(f"Counter change listener failed for {name}: {e}", exc_info=True)
+    return value
+
+
+async def reconcile_all(db: Optional[AsyncSession] = None) -> None:
+    """Reconcile every maintained counter."""
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            await reconcile_all(session)
+        return
+    for name in _COUNTED_TABLES:
+        count = await reconcile(db, name)
+        logging.info(f"Reconciled counter {name} = {count}")
+
+
+async def reconcile_periodically(interval_seconds: int) -> None:
+    """Background job that reconciles all counters every `interval_seconds`."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await reconcile_all()
+        except Exception as e:
+            logging.error(e, exc_info=True)
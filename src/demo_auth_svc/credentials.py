@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+from typing import Optional, Sequence
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy.types import Text, TypeDecorator
+
+from demo_auth_svc import config
+
+
+class TokenCipher:
+    """
+    Encrypts credentials that must be stored, such as queued Google OAuth tokens.
+
+    Uses Fernet (AES-128-CBC with HMAC-SHA256). The first key encrypts; every key
+    is tried when decrypting, so a new key can be put in front of the old one and
+    the old one dropped once no row needs it.
+    """
+
+    def __init__(self, keys: Sequence[bytes]) -> None:
+        if not keys:
+            raise ValueError("At least one key is required")
+        self._fernet = MultiFernet([Fernet(key) for key in keys])
+
+    def encrypt(self, value: str) -> str:
+        return self._fernet.encrypt(value.encode()).decode()
+
+    def decrypt(self, value: str) -> Optional[str]:
+        """The plaintext, or None when no key can decrypt `value`."""
+        try:
+            return self._fernet.decrypt(value.encode()).decode()
+        except InvalidToken:
+            return None
+
+
+def load_cipher() -> TokenCipher:
+    """Build a TokenCipher from config."""
+    keys = [key.strip().encode() for key in config.CALENDAR_TOKEN_KEYS.split(",") if key.strip()]
+    if not keys:
+        if config.JWT_SECRET:
+            secret = hmac.new(config.JWT_SECRET.encode(), b"demo_auth_svc calendar tokens", hashlib.sha256).digest()
+        else:
+            logging.warning("Neither CALENDAR_TOKEN_KEYS nor JWT_SECRET is set; queued OAuth tokens use a "
+                            "per-process key and other processes cannot read them")
+            secret = secrets.token_bytes(32)
+        keys = [base64.urlsafe_b64encode(secret)]
+    try:
+        return TokenCipher(keys)
+    except ValueError as e:
+        raise ValueError(f"CALENDAR_TOKEN_KEYS must be Fernet keys: {e}") from e
+
+
+_cipher: Optional[TokenCipher] = None
+_cipher_lock = threading.Lock()
+
+
+def get_cipher() -> TokenCipher:
+    """Return the process-wide cipher, building it from config on first use."""
+    global _cipher
+    if _cipher is None:
+        with _cipher_lock:
+            if _cipher is None:
+                _cipher = load_cipher()
+    return _cipher
+
+
+class EncryptedText(TypeDecorator):
+    """
+    A Text column stored encrypted with the process-wide TokenCipher.
+
+    Values that cannot be decrypted (a retired key, or a row written before the
+    column was encrypted) load as None.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return get_cipher().encrypt(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        plaintext = get_cipher().decrypt(value)
+        if plaintext is None:
+            logging.warning("Stored credential could not be decrypted with the configured keys")
+        return plaintext
@@ -1,11 +1,40 @@
+import json
 import logging
-import time
+import uuid
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
 
-def add_google_calendar_event(meeting_time: datetime, location: str, participants: List[str], oauth_token: str) -> Dict[str, Any]:
+from demo_auth_svc import config, http_client
+from demo_auth_svc.retry import RETRYABLE_STATUSES, CircuitBreaker, CircuitOpenError, Retrier, RetryBudget
+
+# Shared by every Calendar call in this process so the breaker sees all failures.
+calendar_retrier = Retrier(
+    "google_calendar",
+    max_attempts=config.GOOGLE_RETRY_MAX_ATTEMPTS,
+    base_delay=config.GOOGLE_RETRY_BASE_DELAY,
+    max_delay=config.GOOGLE_RETRY_MAX_DELAY,
+    max_retry_after=config.GOOGLE_RETRY_MAX_RETRY_AFTER,
+    breaker=CircuitBreaker(
+        "google_calendar",
+        failure_threshold=config.GOOGLE_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=config.GOOGLE_BREAKER_RESET_SECONDS,
+    ),
+    budget=RetryBudget(ratio=config.GOOGLE_RETRY_BUDGET_RATIO),
+)
+
+def _event_data(iso_meeting_time: str, location: str, participants: List[str]) -> Dict[str, Any]:
+    # Prepare the event data according to Google Calendar API schema
+    return {
+        "start": {"dateTime": iso_meeting_time},
+        "location": location,
+        "attendees": [{"email": email} for email in participants]
+    }
+
+
+async def add_google_calendar_event(meeting_time: datetime, location: str, participants: List[str], oauth_token: str) -> Dict[str, Any]:
     """
     Add an event to Google Calendar using provided meeting details.
 
@@ -17,6 +46,7 @@ def add_google_calendar_event(meeting_time: datetime, location: str, participant
 
     Returns:
         Dict[str, Any]: A dictionary with the success flag and response data or error message.
+            Failures also carry a `retryable` flag telling callers whether trying again later may succeed.
     """
     # Convert meeting_time to ISO 8601 format
     try:
@@ -25,29 +55,151 @@ def add_google_calendar_event(meeting_time: datetime, location: str, participant
         logging.error(e, exc_info=True)
         return {"success": False, "message": "Invalid meeting_time format."}
 
-    # Prepare the event data according to Google Calendar API schema
-    event_data = {
-        "start": {"dateTime": iso_meeting_time},
-        "location": location,
-        "attendees": [{"email": email} for email in participants]
-    }
+    event_data = _event_data(iso_meeting_time, location, participants)
 
     # Set up headers with the OAuth token
     headers = {"Authorization": f"Bearer {oauth_token}"}
     # Google Calendar API endpoint for inserting events
-    url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
+    url = f"{config.GOOGLE_CALENDAR_API_BASE}/calendars/primary/events"
+    client = http_client.get_http_client()
+
+    try:
+        response = await calendar_retrier.send(lambda: client.post(url, json=event_data, headers=headers))
+        response.raise_for_status()  # Raises an exception for 4xx/5xx responses
+        return {"success": True, "response": response.json()}
+    except CircuitOpenError as e:
+        logging.warning(e)
+        return {"success": False, "message": "Google Calendar is temporarily unavailable.", "retryable": True}
+    except httpx.HTTPStatusError as e:
+        logging.error(e, exc_info=True)
+        return {"success": False, "message": str(e), "retryable": e.response.status_code in RETRYABLE_STATUSES}
+    except httpx.TransportError as e:
+        logging.error(e, exc_info=True)
+        return {"success": False, "message": str(e), "retryable": True}
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        return {"success": False, "message": str(e), "retryable": False}
+
+
+def _encode_batch(boundary: str, events: List[Dict[str, Any]]) -> bytes:
+    """Encode event inserts as the parts of a multipart/mixed Google batch request."""
+    path = urlsplit(config.GOOGLE_CALENDAR_API_BASE).path.rstrip("/") + "/calendars/primary/events"
+    parts = []
+    for index, event in enumerate(events):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item-{index}>\r\n\r\n"
+            f"POST {path} HTTP/1.1\r\n"
+            "Content-Type: application/json\r\n\r\n"
+            f"{json.dumps(event)}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode()
 
-    retries = 3
-    wait_seconds = 1
 
-    for attempt in range(retries):
+def _decode_batch(response: httpx.Response) -> Dict[int, Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Split a multipart/mixed batch response into (status, JSON body) per request index.
+
+    Parts are matched to requests by their `Content-ID: <response-item-N>` header,
+    since Google does not guarantee they come back in request order.
+    """
+    content_type = response.headers.get("content-type", "")
+    boundary = None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise ValueError("Batch response has no multipart boundary")
+
+    results = {}
+    text = response.text.replace("\r\n", "\n")
+    for part in text.split(f"--{boundary}"):
+        part = part.strip("\n")
+        if not part or part == "--":
+            continue
+        part_headers, _, http_message = part.partition("\n\n")
+        content_id = None
+        for line in part_headers.split("\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                content_id = value.strip().strip("<>")
+        if content_id is None or not content_id.startswith("response-item-"):
+            continue
+        head, _, body = http_message.partition("\n\n")
+        status_line = head.split("\n", 1)[0].split()
+        status_code = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else 0
         try:
-            response = httpx.post(url, json=event_data, headers=headers, timeout=10.0)
-            response.raise_for_status()  # Raises an exception for 4xx/5xx responses
-            return {"success": True, "response": response.json()}
-        except Exception as e:
-            logging.error(e, exc_info=True)
-            if attempt < retries - 1:
-                time.sleep(wait_seconds)
-            else:
-                return {"success": False, "message": str(e)}
+            payload = json.loads(body) if body.strip() else None
+        except ValueError:
+            payload = None
+        results[int(content_id[len("response-item-"):])] = (status_code, payload)
+    return results
+
+
+def _item_result(status_code: int, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if 200 <= status_code < 300:
+        return {"success": True, "response": payload}
+    message = f"{status_code} error from Google Calendar"
+    if isinstance(payload, dict) and isinstance(payload.get("error"), dict):
+        message = f"{message}: {payload['error'].get('message')}"
+    return {"success": False, "message": message, "retryable": status_code in RETRYABLE_STATUSES}
+
+
+async def _send_batch(events: List[Dict[str, Any]], oauth_token: str) -> List[Dict[str, Any]]:
+    boundary = f"batch_{uuid.uuid4().hex}"
+    body = _encode_batch(boundary, events)
+    headers = {"Authorization": f"Bearer {oauth_token}",
+               "Content-Type": f"multipart/mixed; boundary={boundary}"}
+    client = http_client.get_http_client()
+
+    try:
+        response = await calendar_retrier.send(
+            lambda: client.post(config.GOOGLE_CALENDAR_BATCH_URL, content=body, headers=headers))
+        response.raise_for_status()
+        parts = _decode_batch(response)
+    except CircuitOpenError as e:
+        logging.warning(e)
+        failure = {"success": False, "message": "Google Calendar is temporarily unavailable.", "retryable": True}
+    except httpx.HTTPStatusError as e:
+        logging.error(e, exc_info=True)
+        failure = {"success": False, "message": str(e), "retryable": e.response.status_code in RETRYABLE_STATUSES}
+    except httpx.TransportError as e:
+        logging.error(e, exc_info=True)
+        failure = {"success": False, "message": str(e), "retryable": True}
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        failure = {"success": False, "message": str(e), "retryable": False}
+    else:
+        missing = {"success": False, "message": "Missing from batch response", "retryable": True}
+        return [_item_result(*parts[index]) if index in parts else dict(missing) for index in range(len(events))]
+    # The whole batch failed; every insert shares the outcome.
+    return [dict(failure) for _ in events]
+
+async def add_google_calendar_events_batch(meetings: List[Dict[str, Any]], oauth_token: str) -> List[Dict[str, Any]]:
+    """
+    Add several events to Google Calendar using multipart batch requests.
+
+    Inserts are grouped into batches of up to GOOGLE_CALENDAR_BATCH_SIZE, one HTTP call
+    each, so importing N meetings costs N / 50 round trips instead of N. A single
+    meeting is sent as a plain insert.
+
+    Parameters:
+        meetings (List[Dict[str, Any]]): Meeting details, each with `meeting_time`, `location` and `participants`.
+        oauth_token (str): OAuth token for authentication, shared by every insert.
+
+    Returns:
+        List[Dict[str, Any]]: One result per meeting, in order, shaped like the result of `add_google_calendar_event`.
+    """
+    if len(meetings) == 1:
+        meeting = meetings[0]
+        return [await add_google_calendar_event(meeting["meeting_time"], meeting["location"],
+                                                meeting["participants"], oauth_token)]
+    results = []
+    for start in range(0, len(meetings), config.GOOGLE_CALENDAR_BATCH_SIZE):
+        chunk = meetings[start:start + config.GOOGLE_CALENDAR_BATCH_SIZE]
+        events = [_event_data(m["meeting_time"].isoformat(), m["location"], m["participants"]) for m in chunk]
+        results.extend(await _send_batch(events, oauth_token))
+    return results
@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+
+import httpx
+
+from demo_auth_svc import config, metrics
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_client() -> httpx.AsyncClient:
+    """Create a pooled client configured from config."""
+    http2 = config.HTTP_CLIENT_HTTP2 and _http2_available()
+    if config.HTTP_CLIENT_HTTP2 and not http2:
+        logging.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+    limits = httpx.Limits(
+        max_connections=config.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_CLIENT_MAX_KEEPALIVE,
+        keepalive_expiry=config.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    )
+    # The transport records outbound latency for /metrics.
+    transport = metrics.InstrumentedTransport(http2=http2, limits=limits)
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(config.HTTP_CLIENT_TIMEOUT))
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide client shared by all outbound Google calls.
+
+    It is opened by the app lifespan so connections (and TLS sessions) are kept
+    alive across requests; it is created lazily for use outside the app.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+import jwt_module
+from demo_auth_svc import http_client
+from jwt_module import JWTError, KeyRing, SigningKey
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def cache_ttl(headers: httpx.Headers, default: int) -> int:
+    """
+    Seconds a JWKS response may be cached, from its Cache-Control max-age less Age.
+
+    Falls back to `default` when the response carries no max-age, and returns 0
+    for `no-store` / `no-cache`.
+    """
+    cache_control = headers.get("cache-control", "")
+    if re.search(r"\bno-(store|cache)\b", cache_control, re.IGNORECASE):
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if not match:
+        return default
+    try:
+        age = int(headers.get("age", 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class JWKSCache:
+    """
+    A locally cached JSON Web Key Set used to verify tokens without a network call.
+
+    Keys are refetched when the Cache-Control lifetime runs out (ahead of time when
+    `refresh_periodically` runs in the background) or when a token names an unknown
+    `kid`. Concurrent refetches are collapsed into one request, and unknown-kid
+    refetches are rate limited by `min_refetch_interval` so forged kids cannot
+    hammer the key endpoint. A failed refetch keeps serving the previous keys.
+    """
+
+    def __init__(self, url: str, default_ttl: int = 3600, min_refetch_interval: int = 60,
+                 timeout: float = 5.0) -> None:
+        self.url = url
+        self.default_ttl = default_ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.fetch_count = 0
+        self._ring: Optional[KeyRing] = None
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._inflight: Optional[asyncio.Future] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._ring is not None
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def install(self, jwks: Dict[str, Any], ttl: int) -> None:
+        """Replace the cached keys with the keys of a JWKS document."""
+        ring = KeyRing(None, cache_size=0)
+        for jwk in jwks.get("keys", []):
+            try:
+                ring.add_key(SigningKey.from_jwk(jwk))
+            except JWTError as e:
+                logging.warning(f"Skipping JWK {jwk.get('kid')}: {e}")
+        self._ring = ring
+        self._expires_at = time.monotonic() + ttl
+
+    async def _fetch(self) -> None:
+        self.fetch_count += 1
+        self._last_fetch = time.monotonic()
+        response = await http_client.get_http_client().get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        self.install(response.json(), cache_ttl(response.headers, self.default_ttl))
+
+    async def refresh(self) -> None:
+        """Refetch the key set; concurrent callers share a single request."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future: asyncio.Future) -> None:
+        self._inflight = None
+
+    def _may_refetch(self) -> bool:
+        return time.monotonic() - self._last_fetch >= self.min_refetch_interval
+
+    async def _try_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logging.error(f"JWKS refresh from {self.url} failed: {e}")
+
+    async def get_key(self, kid: Optional[str]) -> SigningKey:
+        if self._ring is None or (self.expired and self._may_refetch()):
+            await self._try_refresh()
+            if self._ring is None:
+                raise JWTError("Signing keys are unavailable")
+        key = self._ring.get_key(kid)
+        if key is None and self._may_refetch():
+            await self._try_refresh()
+            key = self._ring.get_key(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return key
+
+    async def verify(self, token: str, audience: Optional[str] = None,
+                     issuers: Optional[Iterable[str]] = None, leeway: int = 0) -> Dict[str, Any]:
+        """
+        Verify a token against the cached key set and return its claims.
+
+        Raises:
+            JWTError: If the token fails verification.
+        """
+        kid = jwt_module.get_unverified_header(token).get("kid")
+        await self.get_key(kid)
+        claims = self._ring.verify(token, audience=audience, leeway=leeway)
+        if issuers is not None and claims.get("iss") not in issuers:
+            raise JWTError("Invalid issuer")
+        return claims
+
+    async def warm_up(self) -> None:
+        """Fetch the key set once, e.g. at startup; a failure is logged and left to later lookups."""
+        await self._try_refresh()
+
+    async def refresh_periodically(self) -> None:
+        """
+        Background job refreshing loaded keys shortly before they expire.
+
+        Refreshes are at least `min_refetch_interval` apart, even when the key set
+        comes back with no or a very short cache lifetime.
+        """
+        while True:
+            if self._ring is None:
+                await asyncio.sleep(self.min_refetch_interval)
+                continue
+            margin = min(self.min_refetch_interval, (self._expires_at - self._last_fetch) / 10)
+            await asyncio.sleep(max(self._expires_at - time.monotonic() - margin, self.min_refetch_interval))
+            await self._try_refresh()
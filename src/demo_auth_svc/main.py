@@ -1,20 +1,93 @@
+import importlib.util
 import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
 
 import uvicorn
-from demo_auth_svc.app import app
-from demo_auth_svc.config import SERVICE_PORT
+from demo_auth_svc import config
 
+# Workers import the app themselves, so the supervisor never opens database or HTTP pools.
+APP = "demo_auth_svc.app:app"
 
 # Set up logging for the application
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def available_cores() -> int:
+    """Cores this process may run on, which can be fewer than the machine has."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    return config.SERVICE_WORKERS if config.SERVICE_WORKERS > 0 else available_cores()
+
+
+def _implementation(setting: str, fast: str, fallback: str) -> str:
+    if setting != "auto":
+        return setting
+    return fast if importlib.util.find_spec(fast) is not None else fallback
+
+
+def server_options(workers: int) -> Dict[str, Any]:
+    """Keyword arguments for uvicorn.run in production serve mode."""
+    return {
+        "host": config.SERVICE_HOST,
+        "port": int(config.SERVICE_PORT),
+        "workers": workers,
+        "loop": _implementation(config.SERVICE_LOOP, "uvloop", "asyncio"),
+        "http": _implementation(config.SERVICE_HTTP, "httptools", "h11"),
+        "timeout_keep_alive": config.SERVICE_KEEPALIVE_SECONDS,
+        "backlog": config.SERVICE_BACKLOG,
+        "timeout_graceful_shutdown": config.SERVICE_GRACEFUL_SHUTDOWN_SECONDS,
+    }
+
+
+def prepare_workers(workers: int) -> Optional[str]:
+    """
+    Check and prepare process-wide state that several workers must share.
+
+    Without JWT_SECRET each worker would sign with its own random secret and reject
+    tokens issued by the others, so that is refused outright. Per-process forum
+    page and post caches would keep serving what another worker changed, so they
+    are switched off unless they are shared. Metrics are pointed at a fresh multiprocess
+    directory unless PROMETHEUS_MULTIPROC_DIR is set; that directory is returned
+    so it can be removed after shutdown.
+    """
+    if workers < 2:
+        return None
+    if config.JWT_ALGORITHM.startswith("HS") and not config.JWT_SECRET:
+        raise SystemExit("JWT_SECRET must be set to run more than one worker")
+    for setting in ("RESPONSE_CACHE_BACKEND", "POST_CACHE_BACKEND"):
+        if getattr(config, setting) == "memory":
+            logger.warning(f"{setting}=memory cannot see other workers' writes; disabling that cache. "
+                           f"Set {setting}=redis to cache with several workers")
+            # Workers read config from the environment they inherit.
+            os.environ[setting] = "none"
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="demo_auth_svc-metrics-")
+        logger.info(f"Aggregating worker metrics in {os.environ['PROMETHEUS_MULTIPROC_DIR']}")
+        return os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    return None
+
+
 def main():
-    service_port = int(SERVICE_PORT)
-    uvicorn.run(app, host="0.0.0.0", port=service_port)
+    workers = worker_count()
+    metrics_dir = prepare_workers(workers)
+    options = server_options(workers)
+    logger.info(f"Starting {workers} worker(s) with loop={options['loop']} http={options['http']}")
+    try:
+        uvicorn.run(APP, **options)
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
 
 
 if __name__ == "__main__":
     # Entry point for the application
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,231 @@
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Requests that matched no route share one label, so 404 scans cannot blow up cardinality.
+UNMATCHED_ROUTE = "<unmatched>"
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled, by route template and status.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the end of its response.",
+    ["method", "route"], buckets=_LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled.",
+    ["method"], multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed, by engine and statement verb.",
+    ["engine", "operation"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Time spent executing SQL statements.",
+    ["engine", "operation"], buckets=_LATENCY_BUCKETS,
+)
+DB_POOL_EVENTS = Counter(
+    "db_pool_events_total", "Connection pool events (connect, checkout, checkin, invalidate).",
+    ["engine", "event"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.",
+    ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured pool size (persistent connections per process).",
+    ["engine"], multiprocess_mode="livesum",
+)
+GOOGLE_HTTP_DURATION = Histogram(
+    "google_http_request_duration_seconds", "Time until response headers for outbound Google API calls.",
+    ["host", "method", "status"], buckets=_LATENCY_BUCKETS,
+)
+GOOGLE_HTTP_ERRORS = Counter(
+    "google_http_errors_total", "Outbound Google API calls that failed without a response.",
+    ["host", "method"],
+)
+
+
+def multiprocess_enabled() -> bool:
+    """True when uvicorn workers share metrics through PROMETHEUS_MULTIPROC_DIR."""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight requests.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streamed bodies are
+    timed until their last chunk and no extra task is spawned per request. The
+    route label is the matched path template (e.g. /forum/{post_id}), read from
+    the scope after routing.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            HTTP_REQUESTS.labels(method, template, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, template).observe(elapsed)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA") else "OTHER"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count and time statements and pool activity of `engine` under the label `name`."""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        operation = _operation(statement)
+        DB_QUERIES.labels(name, operation).inc()
+        DB_QUERY_DURATION.labels(name, operation).observe(elapsed)
+
+    def handle_error(context):
+        starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    for pool_event in ("connect", "checkout", "checkin", "invalidate"):
+        counter = DB_POOL_EVENTS.labels(name, pool_event)
+        event.listen(engine, pool_event, lambda *args, counter=counter: counter.inc())
+    event.listen(engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine, "checkin", lambda *args: checked_out.dec())
+    size = getattr(engine.pool, "size", None)
+    DB_POOL_SIZE.labels(name).set(size() if callable(size) else 1)
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    The outbound transport, timing each request until its response headers arrive
+    and counting requests that fail without a response.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except httpx.TransportError:
+            GOOGLE_HTTP_ERRORS.labels(request.url.host, request.method).inc()
+            raise
+        GOOGLE_HTTP_DURATION.labels(request.url.host, request.method, str(response.status_code)) \
+            .observe(time.perf_counter() - start)
+        return response
+
+
+class SnapshotCollector(Collector):
+    """
+    Exposes the in-process statistics kept by the caches and retriers.
+
+    These live in process memory, so under multiple workers each scrape reports the
+    worker that served it; samples then carry a `pid` label to keep them apart.
+    `caches` and `retriers` are called on every scrape, so objects swapped at
+    runtime are picked up.
+    """
+
+    def __init__(self, caches: Callable[[], Dict[str, Any]], retriers: Callable[[], Iterable[Any]]) -> None:
+        self.caches = caches
+        self.retriers = retriers
+
+    def collect(self):
+        labels, values = (["pid"], [str(os.getpid())]) if multiprocess_enabled() else ([], [])
+        entries = GaugeMetricFamily("cache_entries", "Entries held by in-process caches.", labels=["cache"] + labels)
+        lookups = CounterMetricFamily("cache_lookups", "Cache lookups by result.", labels=["cache", "result"] + labels)
+        evictions = CounterMetricFamily("cache_evictions", "Entries evicted to stay within max_entries.",
+                                        labels=["cache"] + labels)
+        for name, backend in self.caches().items():
+            snapshot = getattr(backend, "snapshot", None)
+            if snapshot is None:
+                continue
+            stats = snapshot()
+            entries.add_metric([name] + values, stats["entries"])
+            lookups.add_metric([name, "hit"] + values, stats["hits"])
+            lookups.add_metric([name, "miss"] + values, stats["misses"])
+            evictions.add_metric([name] + values, stats["evictions"])
+        yield from (entries, lookups, evictions)
+
+        calls = CounterMetricFamily("retrier_calls", "Logical calls made through a retrier.",
+                                    labels=["retrier"] + labels)
+        retries = CounterMetricFamily("retrier_retries", "Retry attempts made.", labels=["retrier"] + labels)
+        exhausted = CounterMetricFamily("retrier_budget_exhausted", "Retries skipped because the budget ran out.",
+                                        labels=["retrier"] + labels)
+        breaker = GaugeMetricFamily("circuit_breaker_state", "Circuit state: 0 closed, 1 half-open, 2 open.",
+                                    labels=["retrier"] + labels)
+        for retrier in self.retriers():
+            stats = retrier.snapshot()
+            calls.add_metric([stats["name"]] + values, stats["calls"])
+            retries.add_metric([stats["name"]] + values, stats["retries"])
+            exhausted.add_metric([stats["name"]] + values, stats["budget_exhausted"])
+            if "breaker" in stats:
+                breaker.add_metric([stats["name"]] + values, stats["breaker"]["state_code"])
+        yield from (calls, retries, exhausted, breaker)
+
+
+def build_registry(collectors: Iterable[Collector] = ()) -> CollectorRegistry:
+    """
+    The registry to scrape: this process's metrics, or, when PROMETHEUS_MULTIPROC_DIR
+    is set, the metrics every worker has written to that directory.
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    for collector in collectors:
+        registry.register(collector)
+    return registry
+
+
+def render(registry: CollectorRegistry) -> Response:
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Drop a stopped worker's live gauges from the multiprocess directory."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid or os.getpid())
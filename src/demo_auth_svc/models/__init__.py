@@ -1,4 +1,7 @@
-from .base import Base, get_db
+from .base import Base, get_async_db, get_async_session_factory, get_db
 from .user import User
 from .forum_post import ForumPost
 from .meeting import Meeting
+from .row_counter import RowCounter
+from .calendar_job import CalendarJob
+from .meeting_participant import MeetingParticipant
@@ -1,19 +1,109 @@
+from collections import Counter
+from typing import Any, Dict
+
 from sqlalchemy import Column, PrimaryKeyConstraint, String
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session
 
-from demo_auth_svc.config import DATABASE_URL
+from demo_auth_svc import config, metrics, query_log
+from demo_auth_svc.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Pool settings from config for an engine on `url`.
+
+    In-memory SQLite lives on a single connection, so sizing options do not apply.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolMetrics:
+    """Counts pool events for an engine; combine with `pool_status` for live gauges."""
+
+    EVENTS = ("connect", "checkout", "checkin", "invalidate")
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.counts = Counter({name: 0 for name in self.EVENTS})
+        for name in self.EVENTS:
+            event.listen(engine, name, self._counter(name))
+
+    def _counter(self, name: str):
+        def listener(*args: Any) -> None:
+            self.counts[name] += 1
+        return listener
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**pool_status(self.engine), **{f"{name}s": count for name, count in self.counts.items()}}
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Current pool gauges; QueuePool-only figures are omitted for other pool classes."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for gauge in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, gauge, None)
+        if callable(method):
+            status[gauge] = method()
+    return status
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine)
+pool_metrics = PoolMetrics(engine)
+metrics.instrument_engine(engine, "sync")
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+async_pool_metrics = PoolMetrics(async_engine.sync_engine)
+metrics.instrument_engine(async_engine.sync_engine, "async")
+
+if config.QUERY_LOG_ENABLED:
+    query_log.instrument_engine(engine)
+    query_log.instrument_engine(async_engine.sync_engine)
 
 
 def get_db() -> Session:
-    session = scoped_session(sessionmaker(bind=engine))
+    session = SessionLocal()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    The async session factory, for handlers that must open a session themselves.
+
+    Sessions from `get_async_db` are closed as soon as the handler returns, before a
+    StreamingResponse body runs, so streaming handlers open their own.
+    """
+    return AsyncSessionLocal
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func
+from demo_auth_svc.credentials import EncryptedText
+from demo_auth_svc.models.base import Base
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class CalendarJob(Base):
+    """Outbox row asking a worker to create the Google Calendar event for a meeting."""
+    __tablename__ = 'calendar_jobs'
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    meeting_id = Column(Integer, ForeignKey('meetings.meeting_id', ondelete='CASCADE'), nullable=False, unique=True)
+    status = Column(String, nullable=False, server_default=JOB_PENDING)
+    # The caller's Google bearer token, needed until the event is created. It is
+    # encrypted at rest (see credentials.TokenCipher) so a dump or backup of this
+    # table does not leak live credentials, and cleared once the job reaches a final state.
+    oauth_token = Column(EncryptedText, nullable=True)
+    attempts = Column(Integer, nullable=False, server_default='0')
+    event_id = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_calendar_jobs_status_available_at', 'status', 'available_at'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<CalendarJob(job_id={self.job_id}, meeting_id={self.meeting_id}, status='{self.status}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, func, Index, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Text, DateTime, func, Index, ForeignKey, JSON, DDL, event
 from demo_auth_svc.models.base import Base
 
 
@@ -18,3 +18,25 @@ class ForumPost(Base):
 
     def __repr__(self) -> str:
         return f"<ForumPost(post_id={self.post_id}, user_id={self.user_id})>"
+
+
+# Full-text index over forum_posts.content on SQLite: an external-content FTS5 table
+# kept in sync by triggers. Migration e0b7d2c48a61 creates the same objects.
+FORUM_POSTS_FTS_TABLE = 'forum_posts_fts'
+
+FORUM_POSTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE forum_posts_fts USING fts5("
+    "content, content='forum_posts', content_rowid='post_id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER forum_posts_fts_ai AFTER INSERT ON forum_posts BEGIN "
+    "INSERT INTO forum_posts_fts(rowid, content) VALUES (new.post_id, new.content); END",
+    "CREATE TRIGGER forum_posts_fts_ad AFTER DELETE ON forum_posts BEGIN "
+    "INSERT INTO forum_posts_fts(forum_posts_fts, rowid, content) VALUES ('delete', old.post_id, old.content); END",
+    "CREATE TRIGGER forum_posts_fts_au AFTER UPDATE OF content ON forum_posts BEGIN "
+    "INSERT INTO forum_posts_fts(forum_posts_fts, rowid, content) VALUES ('delete', old.post_id, old.content); "
+    "INSERT INTO forum_posts_fts(rowid, content) VALUES (new.post_id, new.content); END",
+)
+
+for _statement in FORUM_POSTS_FTS_DDL:
+    event.listen(ForumPost.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(ForumPost.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS forum_posts_fts").execute_if(dialect="sqlite"))
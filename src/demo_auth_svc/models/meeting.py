@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, String, Text, CheckConstraint
+from sqlalchemy import Column, Integer, DateTime, String, Text, CheckConstraint, Index
 from demo_auth_svc.models.base import Base
 
 class Meeting(Base):
@@ -11,6 +11,7 @@ class Meeting(Base):
     participants = Column(Text, nullable=False)
     __table_args__ = (
         CheckConstraint("location <> ''", name="check_location_non_empty"),
+        Index("ix_meetings_user_id_time", "user_id", "time"),
     )
 
     def __repr__(self):
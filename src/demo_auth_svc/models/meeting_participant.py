@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from demo_auth_svc.models.base import Base
+
+
+def normalize_email(email: str) -> str:
+    """Key participant rows by a case-insensitive form of the address."""
+    return email.strip().lower()
+
+
+class MeetingParticipant(Base):
+    """One row per (meeting, participant email), the indexed form of Meeting.participants."""
+    __tablename__ = 'meeting_participants'
+
+    meeting_id = Column(Integer, ForeignKey('meetings.meeting_id', ondelete='CASCADE'), primary_key=True)
+    email = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_meeting_participants_email', 'email'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<MeetingParticipant(meeting_id={self.meeting_id}, email='{self.email}')>"
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, BigInteger, String
+from demo_auth_svc.models.base import Base
+
+
+class RowCounter(Base):
+    __tablename__ = 'row_counters'
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, server_default='0')
+
+    def __repr__(self) -> str:
+        return f"<RowCounter(name='{self.name}', value={self.value})>"
@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from demo_auth_svc import config
+
+DEFAULT_SCOPE = "openid email profile"
+INTENTS = ("signup", "login")
+
+
+class OAuthConfigError(ValueError):
+    """The Google OAuth client settings are missing or malformed."""
+
+
+class InvalidOAuthState(ValueError):
+    """The `state` returned to the callback is forged, expired or not bound to this browser."""
+
+
+class OAuthSettings:
+    """Google OAuth client settings, validated once when they are loaded."""
+
+    def __init__(self, client_id: Optional[str], client_secret: Optional[str], redirect_uri: Optional[str],
+                 auth_url: str = config.GOOGLE_AUTH_URL, scope: str = DEFAULT_SCOPE,
+                 state_secret: Optional[str] = None, state_ttl: int = config.OAUTH_STATE_TTL_SECONDS) -> None:
+        missing = [name for name, value in (("CLIENT_ID", client_id), ("CLIENT_SECRET", client_secret),
+                                            ("REDIRECT_URI", redirect_uri)) if not value]
+        if missing:
+            raise OAuthConfigError(f"OAuth configuration is missing: {', '.join(missing)}")
+        for name, url in (("REDIRECT_URI", redirect_uri), ("GOOGLE_AUTH_URL", auth_url)):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.netloc:
+                raise OAuthConfigError(f"{name} must be an absolute http(s) URL, got {url!r}")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.auth_url = auth_url
+        self.scope = scope
+        # The client secret is already shared by every worker, so by default the state key is derived from it.
+        self.state_key = hmac.new((state_secret or client_secret).encode(), b"demo_auth_svc oauth state",
+                                  hashlib.sha256).digest()
+        self.state_ttl = state_ttl
+
+    @classmethod
+    def from_config(cls) -> "OAuthSettings":
+        return cls(config.GOOGLE_CLIENT_ID, config.GOOGLE_CLIENT_SECRET, config.GOOGLE_REDIRECT_URI,
+                   auth_url=config.GOOGLE_AUTH_URL, state_secret=config.OAUTH_STATE_SECRET,
+                   state_ttl=config.OAUTH_STATE_TTL_SECONDS)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def code_challenge(verifier: str) -> str:
+    """The PKCE S256 challenge for `verifier` (RFC 7636, section 4.2)."""
+    return _b64encode(hashlib.sha256(verifier.encode()).digest())
+
+
+class StateSigner:
+    """
+    Issues and verifies signed, expiring OAuth `state` values.
+
+    A state is `<intent>.<issued_at>.<nonce>.<signature>`, HMAC-SHA256 signed with the
+    settings' state key. The nonce is also handed to the browser in a cookie, which
+    binds the state to the browser that started the flow. The PKCE verifier is an
+    HMAC of the state, so the callback can recompute it. Nothing is stored server
+    side, and verifying a state is a few hashes on any worker.
+    """
+
+    def __init__(self, settings: OAuthSettings, clock: Callable[[], float] = time.time) -> None:
+        self._key = settings.state_key
+        self.ttl = settings.state_ttl
+        self._clock = clock
+
+    def _sign(self, payload: str, purpose: bytes) -> str:
+        return _b64encode(hmac.new(self._key, purpose + payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, intent: str) -> Tuple[str, str]:
+        """
+        Return a new `(state, nonce)` pair for `intent`.
+
+        Raises:
+            ValueError: If `intent` is not one of INTENTS.
+        """
+        if intent not in INTENTS:
+            raise ValueError(f"Unknown OAuth intent {intent!r}")
+        nonce = secrets.token_urlsafe(16)
+        payload = f"{intent}.{int(self._clock())}.{nonce}"
+        return f"{payload}.{self._sign(payload, b'state:')}", nonce
+
+    def verify(self, state: Optional[str], nonce: Optional[str]) -> str:
+        """
+        Check `state` against its signature, its age and the browser's `nonce` and return its intent.
+
+        Raises:
+            InvalidOAuthState: If any check fails.
+        """
+        if not state or not nonce:
+            raise InvalidOAuthState("Missing OAuth state or state cookie")
+        payload, _, signature = state.rpartition(".")
+        if not hmac.compare_digest(signature.encode(), self._sign(payload, b"state:").encode()):
+            raise InvalidOAuthState("Bad OAuth state signature")
+        intent, issued_at, state_nonce = payload.split(".", 2)
+        if not hmac.compare_digest(state_nonce.encode(), nonce.encode()):
+            raise InvalidOAuthState("OAuth state was issued to another browser")
+        if not 0 <= self._clock() - int(issued_at) <= self.ttl:
+            raise InvalidOAuthState("OAuth state has expired")
+        return intent
+
+    def code_verifier(self, state: str) -> str:
+        """The PKCE code verifier for `state`: 43 URL-safe characters, as RFC 7636 requires."""
+        return self._sign(state, b"pkce:")
+
+
+class AuthorizationURLBuilder:
+    """
+    Builds Google authorization URLs.
+
+    The query parameters shared by every redirect are encoded once up front, so a
+    request only appends its own values to a ready-made prefix.
+    """
+
+    def __init__(self, settings: OAuthSettings) -> None:
+        static = urlencode({"response_type": "code", "scope": settings.scope, "client_id": settings.client_id,
+                            "redirect_uri": settings.redirect_uri})
+        self._prefix = f"{settings.auth_url}?{static}&state="
+
+    def build(self, state: str, **params: str) -> str:
+        url = self._prefix + quote(state, safe="")
+        if params:
+            url += "&" + urlencode(params)
+        return url
+
+
+_settings: Optional[OAuthSettings] = None
+_url_builder: Optional[AuthorizationURLBuilder] = None
+_state_signer: Optional[StateSigner] = None
+_lock = threading.Lock()
+
+
+def init_oauth(settings: Optional[OAuthSettings] = None) -> OAuthSettings:
+    """
+    Install `settings` (or settings loaded from config) as the process-wide OAuth client.
+
+    Called by the app lifespan, so misconfiguration fails startup.
+
+    Raises:
+        OAuthConfigError: If the settings are missing or malformed.
+    """
+    global _settings, _url_builder, _state_signer
+    with _lock:
+        _settings = settings or OAuthSettings.from_config()
+        _url_builder = AuthorizationURLBuilder(_settings)
+        _state_signer = StateSigner(_settings)
+        return _settings
+
+
+def get_settings() -> OAuthSettings:
+    """Return the process-wide OAuth settings, loading them from config on first use."""
+    if _settings is None:
+        init_oauth()
+    return _settings
+
+
+def get_url_builder() -> AuthorizationURLBuilder:
+    if _url_builder is None:
+        init_oauth()
+    return _url_builder
+
+
+def get_state_signer() -> StateSigner:
+    if _state_signer is None:
+        init_oauth()
+    return _state_signer
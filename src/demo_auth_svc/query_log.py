@@ -0,0 +1,135 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from demo_auth_svc import config
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block ran more SQL statements than allowed."""
+
+
+class QueryStats:
+    """Statements executed on behalf of one request (or one `assert_max_queries` block)."""
+
+    def __init__(self, scope: Optional[Scope] = None) -> None:
+        self.scope = scope
+        self.count = 0
+        self.statements: Counter = Counter()
+
+    @property
+    def label(self) -> str:
+        """The originating route, e.g. "GET /forum/{post_id}"; resolved lazily since routing runs later."""
+        if self.scope is None:
+            return "<no request>"
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', None) or self.scope['path']}"
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, the usual sign of an N+1 loop."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+_request: ContextVar[Optional[QueryStats]] = ContextVar("query_log_request", default=None)
+# Blocks under assert_max_queries; they see statements from any thread, including
+# the one TestClient runs the app in.
+_watchers: List[QueryStats] = []
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Log slow statements of `engine` and attribute every statement to the current request."""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_log_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_log_start"].pop()) * 1000
+    stats = _request.get()
+    if elapsed_ms >= config.QUERY_LOG_SLOW_MS:
+        label = stats.label if stats is not None else "<no request>"
+        logging.warning(f"Slow query ({elapsed_ms:.1f} ms) in {label}: {statement}")
+    if stats is not None:
+        stats.record(statement)
+    for watcher in _watchers:
+        watcher.record(statement)
+
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_log_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+class QueryLogMiddleware:
+    """
+    Counts the statements each request runs and reports the ones that look wrong.
+
+    Requests issuing the same statement `QUERY_LOG_REPEAT_THRESHOLD` times or more
+    are logged as likely N+1 queries. With `QUERY_LOG_MAX_QUERIES` set, a request
+    running more statements is logged, or fails with QueryBudgetExceeded when
+    `QUERY_LOG_STRICT` is on (for test runs). Does nothing unless
+    `QUERY_LOG_ENABLED`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not config.QUERY_LOG_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(scope)
+        token = _request.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request.reset(token)
+        report(stats)
+
+
+def report(stats: QueryStats) -> None:
+    logging.debug(f"{stats.label} ran {stats.count} queries")
+    for statement, n in stats.repeated(config.QUERY_LOG_REPEAT_THRESHOLD):
+        logging.warning(f"Possible N+1 in {stats.label}: {n} executions of {statement}")
+    if config.QUERY_LOG_MAX_QUERIES and stats.count > config.QUERY_LOG_MAX_QUERIES:
+        message = f"{stats.label} ran {stats.count} queries (limit {config.QUERY_LOG_MAX_QUERIES})"
+        if config.QUERY_LOG_STRICT:
+            raise QueryBudgetExceeded(message)
+        logging.warning(message)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fail if the block runs more than `max_queries` statements on instrumented engines.
+
+        with assert_max_queries(2):
+            client.get("/forum/1")
+    """
+    stats = QueryStats()
+    _watchers.append(stats)
+    try:
+        yield stats
+    finally:
+        _watchers.remove(stats)
+    if stats.count > max_queries:
+        statements = "\n".join(f"  {n} x {statement}" for statement, n in stats.statements.most_common())
+        raise QueryBudgetExceeded(f"Expected at most {max_queries} queries, ran {stats.count}:\n{statements}")
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import httpx
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is degraded.
+
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single probe through (half-open): a
+    success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opens = 0
+        self.rejections = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self.rejections += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logging.info(f"Circuit {self.name} closed")
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Free the probe slot of a call that ended without an outcome, such as a cancelled one."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.opens += 1
+                logging.warning(f"Circuit {self.name} opened after {self._consecutive_failures} failures")
+            self._state = self.OPEN
+            self._opened_at = self.clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "name": self.name,
+            "state": state,
+            "state_code": self.STATE_CODES[state],
+            "consecutive_failures": self._consecutive_failures,
+            "opens": self.opens,
+            "rejections": self.rejections,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of traffic so retries cannot multiply load on an
+    already struggling dependency. Every call deposits `ratio` tokens, every retry
+    spends one; the balance starts at and never exceeds `max_tokens`.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+
+    def record_call(self) -> None:
+        self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class Retrier:
+    """
+    Sends a request with exponential backoff and full jitter, honouring
+    Retry-After on 429/503, guarded by an optional circuit breaker and retry budget.
+
+    Only transport errors and `retry_statuses` are retried; other responses are
+    returned to the caller as-is. Waiting uses `asyncio.sleep`, so a degraded
+    dependency never pins a worker thread.
+    """
+
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 max_retry_after: float = 30.0, retry_statuses: Iterable[int] = RETRYABLE_STATUSES,
+                 breaker: Optional[CircuitBreaker] = None, budget: Optional[RetryBudget] = None,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+                 rng: Callable[[], float] = random.random) -> None:
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.breaker = breaker
+        self.budget = budget
+        self.sleep = sleep
+        self.rng = rng
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """Delay before the next attempt, or None if the server asked for longer than we wait."""
+        if response is not None and response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    async def send(self, request: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Run `request` until it returns a non-retryable response or attempts run out.
+
+        Returns:
+            httpx.Response: The last response received.
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call.
+            httpx.TransportError: If the last attempt failed to get a response.
+        """
+        self.calls += 1
+        if self.budget is not None:
+            self.budget.record_call()
+        for attempt in range(1, self.max_attempts + 1):
+            if self.breaker is not None and not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            response, error = None, None
+            try:
+                response = await request()
+            except httpx.TransportError as e:
+                error = e
+            except asyncio.CancelledError:
+                # The caller went away (e.g. a client disconnect), which says nothing about the
+                # dependency; just never leave a half-open probe outstanding.
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                raise
+            if error is None and response.status_code not in self.retry_statuses:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return response
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            logging.warning(f"{self.name} attempt {attempt} failed: {error or response.status_code}")
+            delay = self.backoff(attempt, response)
+            if attempt == self.max_attempts or delay is None:
+                break
+            if self.budget is not None and not self.budget.try_spend():
+                self.budget_exhausted += 1
+                break
+            self.retries += 1
+            await self.sleep(delay)
+        if error is not None:
+            raise error
+        return response
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = {"name": self.name, "calls": self.calls, "retries": self.retries,
+                 "budget_exhausted": self.budget_exhausted}
+        if self.breaker is not None:
+            stats["breaker"] = self.breaker.snapshot()
+        return stats
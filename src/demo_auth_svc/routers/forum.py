@@ -1,17 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import String, delete, insert, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+import csv
+import io
+import json
 import logging
-from typing import Optional, List, Dict
-from datetime import datetime
+from typing import Any, AsyncIterator, Optional, List, Dict
+from datetime import datetime, timezone
 
 from pydantic import BaseModel
 
+from demo_auth_svc import cache, config, counters, search
 from demo_auth_svc.models.forum_post import ForumPost
-from demo_auth_svc.models.base import get_db
-from jwt_module import create_token  # existing token creation, using stub for validation
+from demo_auth_svc.models.base import get_async_db, get_async_session_factory
+from demo_auth_svc.pagination import InvalidCursorError, decode_cursor, encode_cursor
+import jwt_module
 
 router = APIRouter(prefix="/forum", tags=["forum"])
 
+# Rendered list pages; every forum write bumps its version.
+forum_cache = cache.ResponseCache(cache.build_backend(), "forum", ttl=config.RESPONSE_CACHE_TTL_SECONDS)
+# Serialized single posts by post_id, dropped by update and delete.
+post_cache = cache.ObjectCache(
+    cache.build_backend(config.POST_CACHE_BACKEND, config.POST_CACHE_MAX_ENTRIES, config.POST_CACHE_TTL_SECONDS),
+    "post", ttl=config.POST_CACHE_TTL_SECONDS,
+)
+
+
+async def _invalidate_forum_pages() -> None:
+    # Runs after the write has committed; a cache outage must not turn that into an error.
+    try:
+        await forum_cache.invalidate()
+    except Exception as e:
+        logging.error(f"Forum page cache invalidation failed: {e}", exc_info=True)
+
+
+async def _invalidate_post(post_id: int) -> None:
+    # Like _invalidate_forum_pages, after the commit.
+    try:
+        await post_cache.invalidate(post_id)
+    except Exception as e:
+        logging.error(f"Post cache invalidation failed for {post_id}: {e}", exc_info=True)
+
+
+async def _counter_changed(name: str) -> None:
+    # Cached list pages carry the total; a reconcile that corrects it must drop them.
+    if name == counters.FORUM_POSTS:
+        await _invalidate_forum_pages()
+
+
+counters.add_change_listener(_counter_changed)
+
 # Pydantic models for request and response
 
 class ForumPostCreate(BaseModel):
@@ -31,26 +73,34 @@ class ForumPostResponse(BaseModel):
     content: str
     timestamp: datetime
 
+
+class ForumSearchHit(ForumPostResponse):
+    rank: float
+    snippet: str
+
 # Dependency for JWT token validation
 
-def verify_jwt_token(request: Request) -> str:
+async def verify_jwt_token(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid token")
     token = auth_header.split("Bearer ")[-1]
-    # Since we don't have a real verify function in jwt_module, accept only 'dummy-token'
-    if token != "dummy-token":
+    try:
+        jwt_module.verify_token(token)
+    except jwt_module.JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return token
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=ForumPostResponse)
-def create_forum_post(payload: ForumPostCreate, db: Session = Depends(get_db), token: str = Depends(verify_jwt_token)):
+async def create_forum_post(payload: ForumPostCreate, db: AsyncSession = Depends(get_async_db), token: str = Depends(verify_jwt_token)):
     try:
         new_post = ForumPost(user_id=payload.user_id, content=payload.content, additional_metadata=payload.additional_metadata)
         db.add(new_post)
-        db.commit()
-        db.refresh(new_post)
+        await counters.increment(db, counters.FORUM_POSTS)
+        await db.commit()
+        await _invalidate_forum_pages()
+        await db.refresh(new_post)
         return ForumPostResponse(
             post_id=new_post.post_id,
             user_id=new_post.user_id,
@@ -62,24 +112,110 @@ def create_forum_post(payload: ForumPostCreate, db: Session = Depends(get_db), t
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error creating forum post")
 
 
+_bulk_adapter = TypeAdapter(List[ForumPostCreate])
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    if content_type.split(";")[0].strip() in ("application/x-ndjson", "application/jsonl"):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Body must be a JSON array")
+    return items
+
+
+@router.post("/bulk", response_model=Dict)
+async def create_forum_posts_bulk(request: Request, db: AsyncSession = Depends(get_async_db), token: str = Depends(verify_jwt_token)):
+    """
+    Insert many forum posts in one request, from a JSON array or an NDJSON body.
+
+    All items are validated in one pass; invalid ones are reported and skipped. Valid
+    posts are inserted FORUM_BULK_CHUNK_SIZE at a time with a multi-row
+    INSERT ... RETURNING, one transaction per chunk, so a failing chunk does not undo
+    the ones before it. Returns one result per item, in request order.
+    """
+    try:
+        items = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No posts supplied")
+    if len(items) > config.FORUM_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"At most {config.FORUM_BULK_MAX_ITEMS} posts per request")
+
+    results: List[Dict[str, Any]] = [{"index": index, "success": True} for index in range(len(items))]
+    valid = list(range(len(items)))
+    try:
+        posts = _bulk_adapter.validate_python(items)
+    except ValidationError as ve:
+        for err in ve.errors():
+            result = results[err["loc"][0]]
+            message = f"{'.'.join(str(part) for part in err['loc'][1:]) or 'body'}: {err['msg']}"
+            result["error"] = f"{result['error']}; {message}" if "error" in result else message
+            result["success"] = False
+        valid = [index for index, result in enumerate(results) if result["success"]]
+        posts = _bulk_adapter.validate_python([items[index] for index in valid])
+
+    table = ForumPost.__table__
+    # SQLite has no insert sentinel, so sort_by_parameter_order would fall back to one
+    # INSERT per row. Its autoincrement ids follow the VALUES order within a statement,
+    # so sorting the returned ids lines them up with the rows instead.
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    statement = insert(table).returning(table.c.post_id, sort_by_parameter_order=not sqlite)
+    for start in range(0, len(valid), config.FORUM_BULK_CHUNK_SIZE):
+        chunk = valid[start:start + config.FORUM_BULK_CHUNK_SIZE]
+        rows = [{"user_id": post.user_id, "content": post.content, "additional_metadata": post.additional_metadata}
+                for post in posts[start:start + config.FORUM_BULK_CHUNK_SIZE]]
+        try:
+            post_ids = (await db.execute(statement, rows)).scalars().all()
+            if sqlite:
+                post_ids = sorted(post_ids)
+            await counters.increment(db, counters.FORUM_POSTS, len(post_ids))
+            await db.commit()
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            await db.rollback()
+            for index in chunk:
+                results[index].update(success=False, error="Error inserting forum post")
+            continue
+        for index, post_id in zip(chunk, post_ids):
+            results[index]["post_id"] = post_id
+
+    inserted = sum(1 for result in results if result["success"])
+    if inserted:
+        await _invalidate_forum_pages()
+    return {"inserted": inserted, "failed": len(results) - inserted, "results": results}
+
+
 @router.put("/{post_id}", response_model=ForumPostResponse)
 @router.patch("/{post_id}", response_model=ForumPostResponse)
-def update_forum_post(post_id: int, payload: ForumPostUpdate, db: Session = Depends(get_db), token: str = Depends(verify_jwt_token)):
+async def update_forum_post(post_id: int, payload: ForumPostUpdate, db: AsyncSession = Depends(get_async_db), token: str = Depends(verify_jwt_token)):
     try:
-        post = db.query(ForumPost).filter(ForumPost.post_id == post_id).first()
-        if not post:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forum post not found")
+        values = {}
         if payload.content is not None:
-            post.content = payload.content
+            values["content"] = payload.content
         if payload.additional_metadata is not None:
-            post.additional_metadata = payload.additional_metadata
-        db.commit()
-        db.refresh(post)
+            values["additional_metadata"] = payload.additional_metadata
+        columns = (ForumPost.post_id, ForumPost.user_id, ForumPost.content, ForumPost.timestamp)
+        if values:
+            # One UPDATE ... RETURNING both applies the change and reads back the row.
+            statement = (update(ForumPost).where(ForumPost.post_id == post_id).values(**values).returning(*columns)
+                         .execution_options(synchronize_session=False))
+        else:
+            statement = select(*columns).where(ForumPost.post_id == post_id)
+        row = (await db.execute(statement)).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forum post not found")
+        if values:
+            await db.commit()
+            await _invalidate_post(post_id)
+            await _invalidate_forum_pages()
         return ForumPostResponse(
-            post_id=post.post_id,
-            user_id=post.user_id,
-            content=post.content,
-            timestamp=post.timestamp
+            post_id=row.post_id,
+            user_id=row.user_id,
+            content=row.content,
+            timestamp=row.timestamp
         )
     except HTTPException:
         raise
@@ -89,13 +225,17 @@ def update_forum_post(post_id: int, payload: ForumPostUpdate, db: Session = Depe
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_forum_post(post_id: int, db: Session = Depends(get_db), token: str = Depends(verify_jwt_token)):
+async def delete_forum_post(post_id: int, db: AsyncSession = Depends(get_async_db), token: str = Depends(verify_jwt_token)):
     try:
-        post = db.query(ForumPost).filter(ForumPost.post_id == post_id).first()
-        if not post:
+        result = await db.execute(
+            delete(ForumPost).where(ForumPost.post_id == post_id).execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forum post not found")
-        db.delete(post)
-        db.commit()
+        await counters.increment(db, counters.FORUM_POSTS, -1)
+        await db.commit()
+        await _invalidate_post(post_id)
+        await _invalidate_forum_pages()
         return
     except HTTPException:
         raise
@@ -104,19 +244,258 @@ def delete_forum_post(post_id: int, db: Session = Depends(get_db), token: str =
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error deleting forum post")
 
 
-@router.get("", response_model=Dict)
-def get_forum_posts(page: int = 1, page_size: int = 10, db: Session = Depends(get_db), token: str = Depends(verify_jwt_token)):
+def _timestamp_key(db: AsyncSession):
+    # SQLite keeps DATETIME as text in whatever format the writer used
+    # (CURRENT_TIMESTAMP has no microseconds), so keyset comparisons must use
+    # the stored text to agree with the ordering of ix_forum_posts_timestamp.
+    if db.get_bind().dialect.name == "sqlite":
+        return type_coerce(ForumPost.timestamp, String)
+    return ForumPost.timestamp
+
+
+async def _forum_posts_page(page: int, page_size: int, cursor: Optional[str], include_total: Optional[bool],
+                            db: AsyncSession, session_factory: async_sessionmaker) -> Dict:
     try:
-        offset = (page - 1) * page_size
-        posts = db.query(ForumPost).offset(offset).limit(page_size).all()
-        total_posts = db.query(ForumPost).count()
+        ts_key = _timestamp_key(db)
+        query = select(ForumPost, ts_key.label("sort_timestamp")).order_by(ForumPost.timestamp, ForumPost.post_id)
+        if cursor is not None:
+            try:
+                after_ts, after_id = decode_cursor(cursor, 2)
+                if not isinstance(after_ts, str) or not isinstance(after_id, int):
+                    raise InvalidCursorError("Malformed cursor")
+                if db.get_bind().dialect.name != "sqlite":
+                    after_ts = datetime.fromisoformat(after_ts)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            query = query.where(tuple_(ts_key, ForumPost.post_id) > tuple_(after_ts, after_id))
+        else:
+            query = query.offset((page - 1) * page_size)
+        rows = (await db.execute(query.limit(page_size + 1))).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0].post_id) if has_more else None
         posts_data = [ForumPostResponse(
             post_id=post.post_id,
             user_id=post.user_id,
             content=post.content,
             timestamp=post.timestamp
-        ) for post in posts]
-        return {"data": posts_data, "page": page, "page_size": page_size, "total": total_posts}
+        ) for post, _ in rows]
+        result = {"data": posts_data, "page_size": page_size, "next_cursor": next_cursor}
+        if cursor is None:
+            result["page"] = page
+        if include_total is None:
+            include_total = cursor is None
+        if include_total:
+            result["total"] = await counters.get_count(db, counters.FORUM_POSTS, session_factory)
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error fetching forum posts")
+
+
+@router.get("", response_model=Dict)
+async def get_forum_posts(request: Request, page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=100),
+                          cursor: Optional[str] = None, include_total: Optional[bool] = None,
+                          db: AsyncSession = Depends(get_async_db),
+                          session_factory: async_sessionmaker = Depends(get_async_session_factory),
+                          token: str = Depends(verify_jwt_token)):
+    """
+    List forum posts ordered by (timestamp, post_id).
+
+    Without `cursor` the classic page/page_size offset pagination is used. Passing
+    the `next_cursor` of a previous response switches to keyset pagination, which
+    seeks on ix_forum_posts_timestamp so every page costs the same as the first.
+    The total count comes from the maintained counter and is returned by default
+    in offset mode only; pass `include_total` to override.
+
+    Rendered pages are cached per query and carry a strong ETag; a matching
+    If-None-Match is answered with 304. Cached pages are served without a
+    database round trip until the next forum write.
+    """
+    if not forum_cache.enabled:
+        return await _forum_posts_page(page, page_size, cursor, include_total, db, session_factory)
+    if_none_match = request.headers.get("if-none-match")
+    try:
+        key = await forum_cache.key({"page": page, "page_size": page_size, "cursor": cursor,
+                                     "include_total": include_total})
+        cached = await forum_cache.get(key)
+    except Exception as e:
+        # Serve from the database while the cache is unreachable.
+        logging.error(f"Forum page cache read failed: {e}", exc_info=True)
+        return await _forum_posts_page(page, page_size, cursor, include_total, db, session_factory)
+    if cached is not None:
+        etag, body = cached
+    else:
+        result = await _forum_posts_page(page, page_size, cursor, include_total, db, session_factory)
+        body = JSONResponse(jsonable_encoder(result)).body
+        try:
+            etag = await forum_cache.set(key, body)
+        except Exception as e:
+            logging.error(f"Forum page cache write failed: {e}", exc_info=True)
+            etag = cache.strong_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if cache.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+EXPORT_COLUMNS = ("post_id", "user_id", "content", "timestamp", "additional_metadata")
+
+
+def _timestamp_bound(db: AsyncSession, value: datetime):
+    # Bound for comparisons against _timestamp_key, in the stored text format (naive UTC) on SQLite.
+    if db.get_bind().dialect.name == "sqlite":
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _ndjson_chunk(posts: list) -> str:
+    return "".join(json.dumps({
+        "post_id": post.post_id,
+        "user_id": post.user_id,
+        "content": post.content,
+        "timestamp": post.timestamp.isoformat() if post.timestamp else None,
+        "additional_metadata": post.additional_metadata,
+    }) + "\n" for post in posts)
+
+
+def _csv_chunk(posts: list, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for post in posts:
+        writer.writerow([
+            post.post_id,
+            post.user_id,
+            post.content,
+            post.timestamp.isoformat() if post.timestamp else "",
+            json.dumps(post.additional_metadata) if post.additional_metadata is not None else "",
+        ])
+    return buffer.getvalue()
+
+
+async def _export_rows(session_factory: async_sessionmaker, format: str, user_id: Optional[int],
+                       start: Optional[datetime], end: Optional[datetime]) -> AsyncIterator[str]:
+    async with session_factory() as db:
+        ts_key = _timestamp_key(db)
+        # Plain column rows: no ORM identity map to grow while the export runs.
+        query = select(*(getattr(ForumPost, column) for column in EXPORT_COLUMNS)).order_by(ForumPost.post_id)
+        if user_id is not None:
+            query = query.where(ForumPost.user_id == user_id)
+        if start is not None:
+            query = query.where(ts_key >= _timestamp_bound(db, start))
+        if end is not None:
+            query = query.where(ts_key < _timestamp_bound(db, end))
+        # Stream through a server-side cursor, one partition of rows in memory at a time.
+        result = await db.stream(query.execution_options(yield_per=config.FORUM_EXPORT_BATCH_SIZE))
+        header = True
+        async for partition in result.partitions():
+            yield _csv_chunk(partition, header) if format == "csv" else _ndjson_chunk(partition)
+            header = False
+        if header and format == "csv":
+            yield _csv_chunk([], header)
+
+
+@router.get("/export")
+async def export_forum_posts(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), user_id: Optional[int] = None,
+                             start: Optional[datetime] = Query(None, alias="from"),
+                             end: Optional[datetime] = Query(None, alias="to"),
+                             session_factory: async_sessionmaker = Depends(get_async_session_factory),
+                             token: str = Depends(verify_jwt_token)):
+    """
+    Stream forum posts as NDJSON (default) or CSV, ordered by post_id.
+
+    Rows are read through a server-side cursor in batches of FORUM_EXPORT_BATCH_SIZE and
+    written out as they arrive, so memory use does not grow with the size of the table.
+    `user_id`, `from` (inclusive) and `to` (exclusive) narrow the export.
+    """
+    if format == "csv":
+        return StreamingResponse(_export_rows(session_factory, format, user_id, start, end), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="forum_posts.csv"'})
+    return StreamingResponse(_export_rows(session_factory, format, user_id, start, end),
+                             media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=Dict)
+async def search_forum_posts(q: str = Query(..., min_length=1, max_length=256), page_size: int = Query(10, ge=1, le=100),
+                             cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db),
+                             token: str = Depends(verify_jwt_token)):
+    """
+    Full-text search over forum post content.
+
+    Every word of `q` must match; a trailing `*` matches by prefix. Hits are ordered
+    best first and carry their rank (lower is better) and a highlighted snippet.
+    Pass the `next_cursor` of a response to get the following page. The backend is
+    chosen per database dialect (FTS5 on SQLite); see `search.get_backend`.
+    """
+    terms = search.parse_terms(q)
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query has no searchable words")
+    after = None
+    if cursor is not None:
+        try:
+            after_rank, after_id = decode_cursor(cursor, 2)
+            if not isinstance(after_rank, (int, float)) or not isinstance(after_id, int):
+                raise InvalidCursorError("Malformed cursor")
+            after = (float(after_rank), after_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        backend = search.get_backend(db.get_bind().dialect.name)
+        hits = await backend.search(db, terms, page_size + 1, after)
+        next_cursor = None
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            next_cursor = encode_cursor(hits[-1]["rank"], hits[-1]["post_id"])
+        return {"data": [ForumSearchHit(**hit) for hit in hits], "page_size": page_size, "next_cursor": next_cursor}
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error searching forum posts")
+
+
+@router.get("/{post_id}", response_model=ForumPostResponse)
+async def get_forum_post(post_id: int, db: AsyncSession = Depends(get_async_db), token: str = Depends(verify_jwt_token)):
+    """
+    Fetch a single forum post.
+
+    Served through a TTL'd read-through cache of serialized posts (POST_CACHE_BACKEND),
+    so hot posts skip the database; the X-Cache header says whether this read was a
+    HIT or a MISS. With the memory backend, `post_cache.backend.snapshot()` has the
+    running hit/miss counts.
+    """
+    body, epoch = None, None
+    if post_cache.enabled:
+        try:
+            body = await post_cache.get(post_id)
+            epoch = await post_cache.epoch() if body is None else None
+        except Exception as e:
+            # Serve from the database while the cache is unreachable.
+            logging.error(f"Post cache read failed: {e}", exc_info=True)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+    try:
+        post = (await db.execute(select(ForumPost).where(ForumPost.post_id == post_id))).scalars().first()
+        if not post:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forum post not found")
+        body = ForumPostResponse(
+            post_id=post.post_id,
+            user_id=post.user_id,
+            content=post.content,
+            timestamp=post.timestamp
+        ).model_dump_json().encode()
+        if epoch is not None:
+            try:
+                await post_cache.set(post_id, body, epoch)
+            except Exception as e:
+                logging.error(f"Post cache write failed: {e}", exc_info=True)
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Error fetching forum post")
@@ -1,90 +1,93 @@
-import os
 import logging
 from typing import Optional
 
 import httpx
-from urllib.parse import urlencode
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Cookie, HTTPException
+from fastapi.responses import Response
 
 import jwt_module  # Assumed to exist and provide a create_token function
+from demo_auth_svc import config, http_client, oauth
+from demo_auth_svc.jwks import GOOGLE_ISSUERS, JWKSCache
 
 router = APIRouter()
 
+# Google's ID-token signing keys, cached so verification is local CPU work.
+google_jwks = JWKSCache(
+    config.GOOGLE_JWKS_URL,
+    default_ttl=config.GOOGLE_JWKS_DEFAULT_TTL_SECONDS,
+    min_refetch_interval=config.GOOGLE_JWKS_MIN_REFETCH_SECONDS,
+)
+
+# Carries the state nonce, binding the OAuth flow to the browser that started it.
+STATE_COOKIE = "oauth_state"
+
+
+def _authorization_redirect(intent: str) -> Response:
+    signer = oauth.get_state_signer()
+    state, nonce = signer.issue(intent)
+    url = oauth.get_url_builder().build(state, code_challenge=oauth.code_challenge(signer.code_verifier(state)),
+                                        code_challenge_method="S256")
+    # The URL is fully encoded already; RedirectResponse would quote it a second time.
+    response = Response(status_code=302, headers={"location": url})
+    # SameSite=Lax still sends the cookie on Google's top-level redirect back to the callback.
+    response.set_cookie(STATE_COOKIE, nonce, max_age=signer.ttl, httponly=True, samesite="lax",
+                        secure=oauth.get_settings().redirect_uri.startswith("https://"))
+    return response
+
+
 @router.get("/auth/google/signup")
 async def google_signup():
-    try:
-        client_id = os.getenv("CLIENT_ID")
-        redirect_uri = os.getenv("REDIRECT_URI")
-        state = "signup"
-        if not client_id or not redirect_uri:
-            raise HTTPException(status_code=500, detail="OAuth configuration is missing.")
-        google_auth_url = "https://accounts.google.com/o/oauth2/v2/auth"
-        query_params = {
-            "response_type": "code",
-            "scope": "openid email profile",
-            "client_id": client_id,
-            "redirect_uri": redirect_uri,
-            "state": state
-        }
-        url = f"{google_auth_url}?{urlencode(query_params)}"
-        return RedirectResponse(url, status_code=302)
-    except Exception as e:
-        logging.error(e, exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to generate Google OAuth URL.")
+    return _authorization_redirect("signup")
+
 
 @router.get("/auth/google/login")
 async def google_login():
-    try:
-        client_id = os.getenv("CLIENT_ID")
-        redirect_uri = os.getenv("REDIRECT_URI")
-        state = "login"
-        if not client_id or not redirect_uri:
-            raise HTTPException(status_code=500, detail="OAuth configuration is missing.")
-        google_auth_url = "https://accounts.google.com/o/oauth2/v2/auth"
-        query_params = {
-            "response_type": "code",
-            "scope": "openid email profile",
-            "client_id": client_id,
-            "redirect_uri": redirect_uri,
-            "state": state
-        }
-        url = f"{google_auth_url}?{urlencode(query_params)}"
-        return RedirectResponse(url, status_code=302)
-    except Exception as e:
-        logging.error(e, exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to generate Google OAuth URL.")
+    return _authorization_redirect("login")
+
 
 @router.get("/auth/google/callback")
-async def google_callback(code: Optional[str] = None, error: Optional[str] = None, state: Optional[str] = None):
+async def google_callback(response: Response, code: Optional[str] = None, error: Optional[str] = None,
+                          state: Optional[str] = None, state_nonce: Optional[str] = Cookie(None, alias=STATE_COOKIE)):
     if error:
         logging.error(f"Error during Google OAuth callback: {error}")
         raise HTTPException(status_code=400, detail=f"Google OAuth error: {error}")
     if not code:
         raise HTTPException(status_code=400, detail="Authorization code not provided.")
+    signer = oauth.get_state_signer()
+    try:
+        intent = signer.verify(state, state_nonce)
+    except oauth.InvalidOAuthState as state_err:
+        logging.warning(f"Rejected Google OAuth callback: {state_err}")
+        raise HTTPException(status_code=400, detail="Invalid or expired OAuth state.")
+    response.delete_cookie(STATE_COOKIE)
     try:
-        client_id = os.getenv("CLIENT_ID")
-        client_secret = os.getenv("CLIENT_SECRET")
-        redirect_uri = os.getenv("REDIRECT_URI")
-        if not client_id or not client_secret or not redirect_uri:
-            raise HTTPException(status_code=500, detail="OAuth configuration is missing.")
+        settings = oauth.get_settings()
         payload = {
             "code": code,
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "redirect_uri": redirect_uri,
-            "grant_type": "authorization_code"
+            "client_id": settings.client_id,
+            "client_secret": settings.client_secret,
+            "redirect_uri": settings.redirect_uri,
+            "grant_type": "authorization_code",
+            "code_verifier": signer.code_verifier(state),
         }
-        token_response = httpx.post("https://oauth2.googleapis.com/token", data=payload)
+        token_response = await http_client.get_http_client().post(config.GOOGLE_TOKEN_URL, data=payload)
         token_response.raise_for_status()
         token_data = token_response.json()
+        id_token = token_data.get("id_token")
+        if not id_token:
+            raise HTTPException(status_code=401, detail="Google did not return an ID token.")
+        try:
+            claims = await google_jwks.verify(id_token, audience=settings.client_id, issuers=GOOGLE_ISSUERS)
+        except jwt_module.JWTError as jwt_err:
+            logging.error(f"Google ID token rejected: {jwt_err}")
+            raise HTTPException(status_code=401, detail="Invalid Google ID token.")
         user_data = {
-            "google_id": token_data.get("sub"),
-            "email": token_data.get("email"),
-            "name": token_data.get("name"),
-            "profile_picture": token_data.get("picture")
+            "google_id": claims.get("sub"),
+            "email": claims.get("email"),
+            "name": claims.get("name"),
+            "profile_picture": claims.get("picture")
         }
-        if state == "login":
+        if intent == "login":
             try:
                 jwt_token = jwt_module.create_token(user_data)
                 return {"token": jwt_token}
@@ -93,6 +96,8 @@ async def google_callback(code: Optional[str] = None, error: Optional[str] = Non
                 raise HTTPException(status_code=500, detail="Failed to generate JWT token.")
         else:
             return user_data
+    except HTTPException:
+        raise
     except httpx.HTTPStatusError as http_err:
         logging.error(http_err, exc_info=True)
         raise HTTPException(status_code=http_err.response.status_code, detail="Token exchange failed with Google.")
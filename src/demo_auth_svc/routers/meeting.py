@@ -1,13 +1,18 @@
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from pydantic import BaseModel, validator
+from fastapi import APIRouter, Body, HTTPException, Query, Response, status, Depends
+from pydantic import BaseModel, ValidationError, validator
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from demo_auth_svc.models.base import get_db
+from demo_auth_svc import calendar_worker, config
+from demo_auth_svc.models.base import get_async_db
+from demo_auth_svc.models.calendar_job import CalendarJob, JOB_PENDING
 from demo_auth_svc.models.meeting import Meeting
-import demo_auth_svc.google_calendar_integration as gc_integration
+from demo_auth_svc.models.meeting_participant import MeetingParticipant, normalize_email
+from demo_auth_svc.pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -81,18 +86,60 @@ class MeetingResponse(BaseModel):
     time: datetime
     location: str
     participants: str
+    # State of the Google Calendar job: pending, running, succeeded or failed.
+    calendar_status: Optional[str] = None
+    calendar_event_id: Optional[str] = None
+    calendar_error: Optional[str] = None
 
     class Config:
         orm_mode = True
         from_attributes = True
 
-@router.post("/meetings")
 
-def create_meeting(meeting: MeetingRequest, db=Depends(get_db)):
+def _meeting_with_job():
+    """Select meetings together with the state of their calendar job, if any."""
+    return (
+        select(Meeting, CalendarJob.status, CalendarJob.event_id, CalendarJob.last_error)
+        .outerjoin(CalendarJob, CalendarJob.meeting_id == Meeting.meeting_id)
+    )
+
+
+def _returning_with_job(meeting_id: int):
+    """RETURNING columns matching `_meeting_with_job` for one meeting, with its job looked up by scalar subqueries."""
+    # Bound to the id: RETURNING renders columns unqualified, so a correlated
+    # comparison would read as calendar_jobs.meeting_id = calendar_jobs.meeting_id.
+    def job(column):
+        return select(column).where(CalendarJob.meeting_id == meeting_id).scalar_subquery()
+    return Meeting, job(CalendarJob.status), job(CalendarJob.event_id), job(CalendarJob.last_error)
+
+
+def _participant_rows(meeting_id: int, emails: List[str]) -> List[Dict[str, Any]]:
+    return [{"meeting_id": meeting_id, "email": email} for email in dict.fromkeys(normalize_email(e) for e in emails)]
+
+
+async def _add_participants(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Insert meeting_participants rows with a single executemany."""
+    if rows:
+        await db.execute(insert(MeetingParticipant), rows)
+
+
+def _to_response(row) -> MeetingResponse:
+    meeting, job_status, event_id, last_error = row
+    response = MeetingResponse.from_orm(meeting)
+    response.calendar_status = job_status
+    response.calendar_event_id = event_id
+    response.calendar_error = last_error
+    return response
+
+
+@router.post("/meetings", status_code=status.HTTP_202_ACCEPTED)
+
+async def create_meeting(meeting: MeetingRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    Create a meeting and integrate with Google Calendar.
+    Create a meeting and queue its Google Calendar event.
     Validates meeting_time format, non-empty location, and participant emails.
-    On successful Google Calendar integration, stores the meeting in the database and returns the event details.
+    The meeting and a pending calendar job are stored in one transaction and the meeting is
+    returned immediately; a calendar worker creates the event and records the outcome on the job.
     Note: The user_id is hardcoded as 1 for demonstration purposes.
     """
     try:
@@ -109,32 +156,100 @@ def create_meeting(meeting: MeetingRequest, db=Depends(get_db)):
             except Exception as ve:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid email: {email}")
 
-        # Convert meeting to dict and update participants with validated emails
-        meeting_data = meeting.dict()
-        meeting_data["participants"] = valid_emails
-
-        # Call Google Calendar integration
-        result = gc_integration.add_google_calendar_event(
-            meeting_time=meeting.meeting_time,
+        new_meeting = Meeting(
+            user_id=1,  # Hardcoded; in production, use actual user id from auth context.
+            time=meeting.meeting_time,
             location=meeting.location,
-            participants=valid_emails,
-            oauth_token=meeting.oauth_token
+            participants=",".join(valid_emails)
         )
-        if result.get("success"):
-            # After successful integration, store meeting in DB
-            new_meeting = Meeting(
-                user_id=1,  # Hardcoded; in production, use actual user id from auth context.
-                time=meeting.meeting_time,
-                location=meeting.location,
-                participants=",".join(valid_emails)
+        db.add(new_meeting)
+        await db.flush()
+        await _add_participants(db, _participant_rows(new_meeting.meeting_id, valid_emails))
+        db.add(CalendarJob(meeting_id=new_meeting.meeting_id, oauth_token=meeting.oauth_token, status=JOB_PENDING))
+        await db.commit()
+        calendar_worker.notify()
+        response = MeetingResponse.from_orm(new_meeting)
+        response.calendar_status = JOB_PENDING
+        return response
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+
+@router.post("/meetings/batch", status_code=status.HTTP_202_ACCEPTED)
+
+async def create_meetings_batch(meetings: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    """
+    Create many meetings at once, e.g. when importing a schedule.
+    Each item is validated like a POST /meetings body. Valid items are inserted with a single
+    executemany together with their calendar jobs, which the calendar worker sends to Google
+    in batch requests of up to 50 events. Returns one result per item, in request order;
+    invalid items are reported with their error and skipped.
+    Note: The user_id is hardcoded as 1 for demonstration purposes.
+    """
+    if not meetings:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No meetings supplied")
+    if len(meetings) > config.MEETING_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"At most {config.MEETING_BATCH_MAX_ITEMS} meetings per batch")
+    try:
+        try:
+            from email_validator import validate_email
+        except ImportError:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Email validator not installed")
+
+        results: List[Dict[str, Any]] = []
+        accepted = []
+        for index, item in enumerate(meetings):
+            try:
+                meeting = MeetingRequest(**item)
+            except ValidationError as ve:
+                results.append({"index": index, "success": False, "error": _validation_message(ve)})
+                continue
+            valid_emails, invalid_email = [], None
+            for email in meeting.participants:
+                try:
+                    valid_emails.append(validate_email(email, check_deliverability=False).email)
+                except Exception:
+                    invalid_email = email
+                    break
+            if invalid_email is not None:
+                results.append({"index": index, "success": False, "error": f"Invalid email: {invalid_email}"})
+                continue
+            results.append({"index": index, "success": True})
+            accepted.append((results[-1], meeting, valid_emails))
+
+        if accepted:
+            # As in forum bulk inserts: SQLite has no insert sentinel, so ordered RETURNING would
+            # fall back to one INSERT per row, and sorted autoincrement ids follow the rows anyway.
+            sqlite = db.get_bind().dialect.name == "sqlite"
+            meeting_ids = (await db.execute(
+                insert(Meeting).returning(Meeting.meeting_id, sort_by_parameter_order=not sqlite),
+                [{"user_id": 1, "time": meeting.meeting_time, "location": meeting.location,
+                  "participants": ",".join(valid_emails)} for _, meeting, valid_emails in accepted],
+            )).scalars().all()
+            if sqlite:
+                meeting_ids = sorted(meeting_ids)
+            await db.execute(
+                insert(CalendarJob),
+                [{"meeting_id": meeting_id, "oauth_token": meeting.oauth_token, "status": JOB_PENDING}
+                 for meeting_id, (_, meeting, _) in zip(meeting_ids, accepted)],
             )
-            db.add(new_meeting)
-            db.commit()
-            db.refresh(new_meeting)
-            # Return only the Google Calendar response to match expected API response
-            return result.get("response")
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.get("message"))
+            await _add_participants(db, [row for meeting_id, (_, _, valid_emails) in zip(meeting_ids, accepted)
+                                         for row in _participant_rows(meeting_id, valid_emails)])
+            await db.commit()
+            calendar_worker.notify()
+            for meeting_id, (result, _, _) in zip(meeting_ids, accepted):
+                result["meeting_id"] = meeting_id
+                result["calendar_status"] = JOB_PENDING
+
+        return {"accepted": len(accepted), "failed": len(results) - len(accepted), "results": results}
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -144,22 +259,20 @@ def create_meeting(meeting: MeetingRequest, db=Depends(get_db)):
 
 @router.put("/meetings/{meeting_id}")
 
-def update_meeting(meeting_id: int, meeting_update: MeetingUpdateRequest, db=Depends(get_db)):
+async def update_meeting(meeting_id: int, meeting_update: MeetingUpdateRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Update meeting details for the given meeting_id.
     Validates updated fields: meeting_time format, non-empty location, and participant emails.
     Returns the updated meeting record on success.
     """
     try:
-        meeting = db.query(Meeting).filter(Meeting.meeting_id == meeting_id).first()
-        if not meeting:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+        values = {}
         if meeting_update.meeting_time is not None:
-            meeting.time = meeting_update.meeting_time
+            values["time"] = meeting_update.meeting_time
         if meeting_update.location is not None:
             if not meeting_update.location.strip():
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Location must not be empty")
-            meeting.location = meeting_update.location
+            values["location"] = meeting_update.location
         if meeting_update.participants is not None:
             try:
                 from email_validator import validate_email
@@ -172,10 +285,25 @@ def update_meeting(meeting_id: int, meeting_update: MeetingUpdateRequest, db=Dep
                     valid_emails.append(valid.email)
                 except Exception as ve:
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid email: {email}")
-            meeting.participants = ",".join(valid_emails)
-        db.commit()
-        db.refresh(meeting)
-        return MeetingResponse.from_orm(meeting)
+            values["participants"] = ",".join(valid_emails)
+        if not values:
+            row = (await db.execute(_meeting_with_job().where(Meeting.meeting_id == meeting_id))).first()
+        else:
+            # One UPDATE ... RETURNING both applies the change and reads back the row.
+            row = (await db.execute(
+                update(Meeting)
+                .where(Meeting.meeting_id == meeting_id)
+                .values(**values)
+                .returning(*_returning_with_job(meeting_id))
+                .execution_options(synchronize_session=False)
+            )).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+        if meeting_update.participants is not None:
+            await db.execute(delete(MeetingParticipant).where(MeetingParticipant.meeting_id == meeting_id))
+            await _add_participants(db, _participant_rows(meeting_id, valid_emails))
+        await db.commit()
+        return _to_response(row)
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -185,17 +313,21 @@ def update_meeting(meeting_id: int, meeting_update: MeetingUpdateRequest, db=Dep
 
 @router.delete("/meetings/{meeting_id}")
 
-def delete_meeting(meeting_id: int, db=Depends(get_db)):
+async def delete_meeting(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete the meeting with the specified meeting_id.
     Returns a success message upon deletion.
     """
     try:
-        meeting = db.query(Meeting).filter(Meeting.meeting_id == meeting_id).first()
-        if not meeting:
+        result = await db.execute(
+            delete(Meeting).where(Meeting.meeting_id == meeting_id).execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
-        db.delete(meeting)
-        db.commit()
+        # SQLite does not enforce ON DELETE CASCADE unless foreign keys are switched on.
+        await db.execute(delete(CalendarJob).where(CalendarJob.meeting_id == meeting_id))
+        await db.execute(delete(MeetingParticipant).where(MeetingParticipant.meeting_id == meeting_id))
+        await db.commit()
         return {"detail": "Meeting deleted"}
     except HTTPException as he:
         raise he
@@ -206,14 +338,84 @@ def delete_meeting(meeting_id: int, db=Depends(get_db)):
 
 @router.get("/meetings/user/{user_id}")
 
-def get_meetings_by_user(user_id: int, db=Depends(get_db)):
+async def get_meetings_by_user(user_id: int, response: Response,
+                               start: Optional[datetime] = Query(None, alias="from"),
+                               end: Optional[datetime] = Query(None, alias="to"),
+                               cursor: Optional[str] = None,
+                               limit: int = Query(100, ge=1, le=500),
+                               db: AsyncSession = Depends(get_async_db)):
     """
-    Retrieve all meetings associated with the provided user_id.
-    Returns a list of meeting records.
+    Retrieve the meetings associated with the provided user_id, ordered by (time, meeting_id).
+    `from` (inclusive) and `to` (exclusive) restrict the result to a time window, so a calendar
+    view is a single range scan of ix_meetings_user_id_time. At most `limit` meetings are
+    returned; when more remain, the X-Next-Cursor response header carries the cursor for the
+    next page.
     """
     try:
-        meetings = db.query(Meeting).filter(Meeting.user_id == user_id).all()
-        return [MeetingResponse.from_orm(m) for m in meetings]
+        query = (
+            _meeting_with_job()
+            .where(Meeting.user_id == user_id)
+            .order_by(Meeting.time, Meeting.meeting_id)
+        )
+        if start is not None:
+            query = query.where(Meeting.time >= start)
+        if end is not None:
+            query = query.where(Meeting.time < end)
+        if cursor is not None:
+            try:
+                after_time, after_id = decode_cursor(cursor, 2)
+                if not isinstance(after_time, str) or not isinstance(after_id, int):
+                    raise InvalidCursorError("Malformed cursor")
+                after_time = datetime.fromisoformat(after_time)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            query = query.where(tuple_(Meeting.time, Meeting.meeting_id) > tuple_(after_time, after_id))
+        rows = (await db.execute(query.limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            response.headers["X-Next-Cursor"] = encode_cursor(last.time.isoformat(), last.meeting_id)
+        return [_to_response(row) for row in rows]
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@router.get("/meetings/participant/{email}")
+
+async def get_meetings_by_participant(email: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieve the meetings the given email address is invited to, ordered by meeting time.
+    Served from the meeting_participants index, so it does not scan the meetings table.
+    """
+    try:
+        rows = (await db.execute(
+            _meeting_with_job()
+            .join(MeetingParticipant, MeetingParticipant.meeting_id == Meeting.meeting_id)
+            .where(MeetingParticipant.email == normalize_email(email))
+            .order_by(Meeting.time, Meeting.meeting_id)
+        )).all()
+        return [_to_response(row) for row in rows]
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@router.get("/meetings/{meeting_id}")
+
+async def get_meeting(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieve a single meeting, including the status of its Google Calendar event.
+    """
+    try:
+        row = (await db.execute(_meeting_with_job().where(Meeting.meeting_id == meeting_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+        return _to_response(row)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logging.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
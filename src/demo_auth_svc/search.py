@@ -0,0 +1,133 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from demo_auth_svc import config
+from demo_auth_svc.models.forum_post import ForumPost
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+MAX_TERMS = 16
+
+_TERM = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def parse_terms(q: str) -> List[str]:
+    """
+    Split a user query into search terms.
+
+    Only word characters are kept, so no query can produce a full-text syntax
+    error; a trailing `*` asks for a prefix match. All terms must match.
+    """
+    return _TERM.findall(q)[:MAX_TERMS]
+
+
+class SearchBackend:
+    """
+    Full-text search over forum post content for one kind of database.
+
+    `search` returns hits as dicts with post_id, user_id, content, timestamp, rank
+    and snippet, ordered by (rank, post_id) ascending, best match first. `after` is
+    the (rank, post_id) of the last hit of the previous page.
+    """
+
+    name = "base"
+
+    async def search(self, db: AsyncSession, terms: List[str], limit: int,
+                     after: Optional[Tuple[float, int]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class FTS5Backend(SearchBackend):
+    """SQLite FTS5 over the forum_posts_fts index, ranked by bm25 with highlighted snippets."""
+
+    name = "fts5"
+
+    @staticmethod
+    def match_expression(terms: List[str]) -> str:
+        phrases = []
+        for term in terms:
+            prefix = term.endswith("*")
+            phrases.append('"' + term.rstrip("*") + '"' + ("*" if prefix else ""))
+        return " ".join(phrases)
+
+    async def search(self, db: AsyncSession, terms: List[str], limit: int,
+                     after: Optional[Tuple[float, int]] = None) -> List[Dict[str, Any]]:
+        params = {"match": self.match_expression(terms), "limit": limit, "open": SNIPPET_OPEN,
+                  "close": SNIPPET_CLOSE, "ellipsis": SNIPPET_ELLIPSIS, "tokens": SNIPPET_TOKENS}
+        keyset = ""
+        if after is not None:
+            keyset = ("AND (bm25(forum_posts_fts) > :after_rank "
+                      "OR (bm25(forum_posts_fts) = :after_rank AND p.post_id > :after_id)) ")
+            params["after_rank"], params["after_id"] = after
+        query = text(
+            "SELECT p.post_id, p.user_id, p.content, p.timestamp, bm25(forum_posts_fts) AS rank, "
+            "snippet(forum_posts_fts, 0, :open, :close, :ellipsis, :tokens) AS snippet "
+            "FROM forum_posts_fts JOIN forum_posts p ON p.post_id = forum_posts_fts.rowid "
+            f"WHERE forum_posts_fts MATCH :match {keyset}"
+            "ORDER BY rank, p.post_id LIMIT :limit"
+        ).columns(timestamp=DateTime)
+        return [dict(row._mapping) for row in await db.execute(query, params)]
+
+
+def _like_snippet(content: str, terms: List[str]) -> str:
+    words = content.split()
+    needles = [term.rstrip("*").lower() for term in terms]
+    first = next((i for i, word in enumerate(words) if any(needle in word.lower() for needle in needles)), 0)
+    begin = max(first - 3, 0)
+    pattern = re.compile("|".join(re.escape(needle) for needle in needles), re.IGNORECASE)
+    snippet = pattern.sub(lambda m: f"{SNIPPET_OPEN}{m.group(0)}{SNIPPET_CLOSE}",
+                          " ".join(words[begin:begin + SNIPPET_TOKENS]))
+    return ((SNIPPET_ELLIPSIS if begin > 0 else "") + snippet
+            + (SNIPPET_ELLIPSIS if begin + SNIPPET_TOKENS < len(words) else ""))
+
+
+class LikeBackend(SearchBackend):
+    """
+    Portable fallback: a case-insensitive LIKE scan per term, in post_id order.
+
+    Works on any database but reads every row; all hits share rank 0.
+    """
+
+    name = "like"
+
+    async def search(self, db: AsyncSession, terms: List[str], limit: int,
+                     after: Optional[Tuple[float, int]] = None) -> List[Dict[str, Any]]:
+        conditions = []
+        for term in terms:
+            escaped = term.rstrip("*").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append(ForumPost.content.ilike(f"%{escaped}%", escape="\\"))
+        query = select(ForumPost.post_id, ForumPost.user_id, ForumPost.content, ForumPost.timestamp,
+                       literal(0.0).label("rank")).where(and_(*conditions))
+        if after is not None:
+            # Every hit ranks 0, so the keyset reduces to post_id.
+            query = query.where(ForumPost.post_id > after[1])
+        rows = await db.execute(query.order_by(ForumPost.post_id).limit(limit))
+        return [{**row._mapping, "snippet": _like_snippet(row.content, terms)} for row in rows]
+
+
+BACKENDS: Dict[str, SearchBackend] = {}
+DIALECT_BACKENDS: Dict[str, str] = {}
+
+
+def register_backend(backend: SearchBackend, dialects: Tuple[str, ...] = ()) -> None:
+    """Make a backend selectable by name, and the default for the given dialects."""
+    BACKENDS[backend.name] = backend
+    for dialect in dialects:
+        DIALECT_BACKENDS[dialect] = backend.name
+
+
+def get_backend(dialect_name: str) -> SearchBackend:
+    """The backend named by FORUM_SEARCH_BACKEND, or for "auto" the one registered for the dialect."""
+    name = config.FORUM_SEARCH_BACKEND
+    if name == "auto":
+        name = DIALECT_BACKENDS.get(dialect_name, LikeBackend.name)
+    return BACKENDS[name]
+
+
+register_backend(FTS5Backend(), dialects=("sqlite",))
+register_backend(LikeBackend())
@@ -0,0 +1,199 @@
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import Table, create_engine, delete, event, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine, make_url
+
+from demo_auth_svc import config
+from demo_auth_svc.counters import FORUM_POSTS
+from demo_auth_svc.models.base import Base
+from demo_auth_svc.models.forum_post import FORUM_POSTS_FTS_DDL, FORUM_POSTS_FTS_TABLE, ForumPost
+from demo_auth_svc.models.meeting import Meeting
+from demo_auth_svc.models.meeting_participant import MeetingParticipant
+from demo_auth_svc.models.row_counter import RowCounter
+from demo_auth_svc.models.user import User
+
+# Search terms are drawn from this vocabulary, so generated posts match realistic queries.
+WORDS = [f"word{i}" for i in range(2000)] + [
+    "meeting", "quarterly", "budget", "planning", "office", "lunch", "release", "review", "deadline", "roadmap",
+    "hiring", "onboarding", "incident", "customer", "feedback", "launch", "design", "sprint", "retro", "demo",
+]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Kim", "Smith", "Garcia", "Chen", "Patel", "Nguyen", "Müller", "Rossi", "Silva", "Okafor"]
+LOCATIONS = [f"Room {i}" for i in range(1, 41)] + ["Zoom", "Google Meet", "Lobby", "Cafeteria"]
+CLIENTS = ["web", "ios", "android", "api"]
+START = datetime(2023, 1, 1)
+
+# Per-connection settings for a bulk load: no fsync, an in-memory rollback
+# journal and a large page cache. None of them persist in the database file.
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+)
+
+
+def _batches(total: int, batch_size: int) -> Iterator[range]:
+    for start in range(0, total, batch_size):
+        yield range(start, min(start + batch_size, total))
+
+
+def _next_id(connection: Connection, column) -> int:
+    return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _email(user_id: int) -> str:
+    return f"user{user_id}@example.com"
+
+
+def _user_rows(rng: random.Random, ids: range) -> List[Dict[str, Any]]:
+    return [{"id": user_id, "google_id": f"seed-{user_id}", "email": _email(user_id),
+             "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             "profile_picture": f"https://example.com/avatars/{user_id}.png",
+             "created_at": START + timedelta(seconds=user_id)} for user_id in ids]
+
+
+def _phrases(rng: random.Random, count: int = 10000) -> List[str]:
+    # Post bodies join two phrases; drawing whole phrases is far cheaper than drawing every word.
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 30))) for _ in range(count)]
+
+
+def _post_rows(rng: random.Random, ids: range, users: range, phrases: List[str]) -> List[Dict[str, Any]]:
+    rand, n_users, n_phrases, tags = rng.random, len(users), len(phrases), WORDS[-20:]
+    return [{"post_id": post_id, "user_id": users[int(rand() * n_users)],
+             "content": f"{phrases[int(rand() * n_phrases)]} {phrases[int(rand() * n_phrases)]}",
+             # Roughly one post a minute, in post_id order like real traffic.
+             "timestamp": START + timedelta(seconds=60 * post_id + int(rand() * 60)),
+             "additional_metadata": {"client": CLIENTS[int(rand() * 4)],
+                                     "tags": tags[int(rand() * 20):][:int(rand() * 4)],
+                                     "edited": rand() < 0.1, "score": int(rand() * 500)}}
+            for post_id in ids]
+
+
+def _meeting_rows(rng: random.Random, ids: range, users: range, max_participants: int) -> tuple:
+    rand, n_users, n_locations = rng.random, len(users), len(LOCATIONS)
+    slots = 2 * 365 * 48
+    meetings, participants = [], []
+    for meeting_id in ids:
+        # dict.fromkeys drops repeated draws while keeping their order.
+        emails = list(dict.fromkeys(_email(users[int(rand() * n_users)])
+                                    for _ in range(1 + int(rand() * max_participants))))
+        meetings.append({"meeting_id": meeting_id, "user_id": users[int(rand() * n_users)],
+                         "time": START + timedelta(minutes=30 * int(rand() * slots)),
+                         "location": LOCATIONS[int(rand() * n_locations)], "participants": ",".join(emails)})
+        participants.extend({"meeting_id": meeting_id, "email": email} for email in emails)
+    return meetings, participants
+
+
+@contextmanager
+def _indexes_deferred(connection: Connection, *tables: Table) -> Iterator[None]:
+    """Drop the secondary indexes of `tables` for the load and build them once at the end."""
+    indexes = [index for table in tables for index in table.indexes]
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+    yield
+    for index in indexes:
+        index.create(connection)
+
+
+def _has_fts(connection: Connection) -> bool:
+    return connection.dialect.name == "sqlite" and inspect(connection).has_table(FORUM_POSTS_FTS_TABLE)
+
+
+def seed(engine: Engine, users: int, posts: int, meetings: int, seed: int = 0, batch_size: int = 20000,
+         max_participants: int = 5) -> Dict[str, int]:
+    """
+    Append generated users, forum posts and meetings to the database behind `engine`.
+
+    Rows are generated from `seed` alone, so the same arguments on an empty database
+    always produce the same data. Ids continue after the highest existing ones. Rows
+    go in with core INSERTs of `batch_size` rows in one transaction per table. On
+    SQLite the FTS5 insert trigger is suspended during the load and the index is
+    rebuilt once afterwards, which is much faster than indexing row by row.
+
+    Returns:
+        Dict[str, int]: Rows inserted per table.
+    """
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    counts = {"users": users, "forum_posts": posts, "meetings": meetings, "meeting_participants": 0}
+    with engine.begin() as connection:
+        first_user = _next_id(connection, User.id)
+        for ids in _batches(users, batch_size):
+            connection.execute(insert(User), _user_rows(rng, range(first_user + ids.start, first_user + ids.stop)))
+        user_ids = range(1, _next_id(connection, User.id))
+    if not user_ids and (posts or meetings):
+        raise ValueError("Posts and meetings need at least one user")
+
+    with engine.begin() as connection:
+        fts = _has_fts(connection)
+        if fts:
+            connection.execute(text("DROP TRIGGER IF EXISTS forum_posts_fts_ai"))
+        first_post = _next_id(connection, ForumPost.post_id)
+        phrases = _phrases(rng)
+        with _indexes_deferred(connection, ForumPost.__table__):
+            for ids in _batches(posts, batch_size):
+                connection.execute(insert(ForumPost), _post_rows(
+                    rng, range(first_post + ids.start, first_post + ids.stop), user_ids, phrases))
+        if fts:
+            connection.execute(text(f"INSERT INTO {FORUM_POSTS_FTS_TABLE}({FORUM_POSTS_FTS_TABLE}) VALUES ('rebuild')"))
+            connection.execute(text(FORUM_POSTS_FTS_DDL[1]))
+        # The next count read recomputes the maintained counter.
+        connection.execute(delete(RowCounter).where(RowCounter.name == FORUM_POSTS))
+
+    with engine.begin() as connection:
+        first_meeting = _next_id(connection, Meeting.meeting_id)
+        with _indexes_deferred(connection, Meeting.__table__, MeetingParticipant.__table__):
+            for ids in _batches(meetings, batch_size):
+                meeting_rows, participant_rows = _meeting_rows(
+                    rng, range(first_meeting + ids.start, first_meeting + ids.stop), user_ids, max_participants)
+                connection.execute(insert(Meeting), meeting_rows)
+                connection.execute(insert(MeetingParticipant), participant_rows)
+                counts["meeting_participants"] += len(participant_rows)
+    return counts
+
+
+def bulk_load_engine(url: str) -> Engine:
+    """An engine for seeding `url`, with BULK_LOAD_PRAGMAS applied on SQLite."""
+    engine = create_engine(url)
+    if make_url(url).get_backend_name() == "sqlite":
+        @event.listens_for(engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in BULK_LOAD_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+    return engine
+
+
+def main() -> None:
+    """Entry point: `demo_auth_svc-seed --users 100000 --posts 1000000 --meetings 500000`."""
+    parser = argparse.ArgumentParser(description="Fill the database with reproducible synthetic data.")
+    parser.add_argument("--database-url", default=config.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--meetings", type=int, default=50000)
+    parser.add_argument("--max-participants", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    args = parser.parse_args()
+    if make_url(args.database_url).database in (None, "", ":memory:"):
+        parser.error("Seeding an in-memory database is pointless; set DATABASE_URL or --database-url")
+
+    logging.basicConfig(level=logging.INFO)
+    engine = bulk_load_engine(args.database_url)
+    start = time.perf_counter()
+    counts = seed(engine, args.users, args.posts, args.meetings, seed=args.seed, batch_size=args.batch_size,
+                  max_participants=args.max_participants)
+    engine.dispose()
+    logging.info(f"Seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
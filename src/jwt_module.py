@@ -1,16 +1,348 @@
+import base64
+import hashlib
+import hmac
+import json
 import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from demo_auth_svc import config
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+except ImportError:  # HS256 works without it
+    serialization = None
+
+SUPPORTED_ALGORITHMS = ("HS256", "RS256", "ES256")
+
+
+class JWTError(Exception):
+    """Raised when a token cannot be signed or fails verification."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except ValueError as e:
+        raise JWTError("Malformed token") from e
+
+
+def _b64int(data: str) -> int:
+    return int.from_bytes(_b64decode(data), "big")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_header(header: Any) -> Dict[str, Any]:
+    # `kid` is looked up in a dict, so an unhashable value must not get that far.
+    if not isinstance(header, dict) or not isinstance(header.get("kid"), (str, type(None))):
+        raise JWTError("Malformed token")
+    return header
+
+
+def get_unverified_header(token: str) -> Dict[str, Any]:
+    """Decode a token's JOSE header without checking the signature, e.g. to find its `kid`."""
+    try:
+        header = json.loads(_b64decode(token.split(".", 1)[0]))
+    except ValueError as e:
+        raise JWTError("Malformed token") from e
+    return _check_header(header)
+
+
+def _require_cryptography(algorithm: str) -> None:
+    if serialization is None:
+        raise JWTError(f"{algorithm} requires the 'cryptography' package")
+
+
+class SigningKey:
+    """A parsed key bound to one algorithm. Holds the private half only when it can sign."""
+
+    def __init__(self, kid: str, algorithm: str, key: Any, can_sign: bool) -> None:
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise JWTError(f"Unsupported algorithm: {algorithm}")
+        self.kid = kid
+        self.algorithm = algorithm
+        self.key = key
+        self.can_sign = can_sign
+        if algorithm == "HS256":
+            self.public_key = key
+        else:
+            self.public_key = key.public_key() if can_sign else key
+
+    @classmethod
+    def from_secret(cls, kid: str, secret: bytes) -> "SigningKey":
+        return cls(kid, "HS256", secret, can_sign=True)
+
+    @classmethod
+    def from_pem(cls, kid: str, algorithm: str, pem: bytes) -> "SigningKey":
+        """Load a private key (sign + verify) or a public key (verify only) from PEM."""
+        _require_cryptography(algorithm)
+        if b"PRIVATE KEY" in pem:
+            key = serialization.load_pem_private_key(pem, password=None)
+            can_sign = True
+        else:
+            key = serialization.load_pem_public_key(pem)
+            can_sign = False
+        expected = rsa.RSAPublicKey if algorithm == "RS256" else ec.EllipticCurvePublicKey
+        public = key.public_key() if can_sign else key
+        if not isinstance(public, expected) or (algorithm == "ES256" and public.curve.name != "secp256r1"):
+            raise JWTError(f"Key {kid} does not match algorithm {algorithm}")
+        return cls(kid, algorithm, key, can_sign)
+
+    @classmethod
+    def from_jwk(cls, jwk: Dict[str, Any]) -> "SigningKey":
+        """Load a verification-only key from a JSON Web Key (RSA or P-256 EC)."""
+        kty = jwk.get("kty")
+        _require_cryptography(kty or "JWK")
+        try:
+            if kty == "RSA":
+                algorithm = "RS256"
+                key = rsa.RSAPublicNumbers(_b64int(jwk["e"]), _b64int(jwk["n"])).public_key()
+            elif kty == "EC" and jwk.get("crv") == "P-256":
+                algorithm = "ES256"
+                key = ec.EllipticCurvePublicNumbers(_b64int(jwk["x"]), _b64int(jwk["y"]), ec.SECP256R1()).public_key()
+            else:
+                raise JWTError(f"Unsupported JWK type: {kty}")
+        except (KeyError, ValueError) as e:
+            raise JWTError("Malformed JWK") from e
+        if jwk.get("alg", algorithm) != algorithm:
+            raise JWTError(f"JWK algorithm {jwk['alg']} does not match key type {kty}")
+        return cls(jwk.get("kid"), algorithm, key, can_sign=False)
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if not self.can_sign:
+            raise JWTError(f"Key {self.kid} is verification-only")
+        if self.algorithm == "HS256":
+            return hmac.new(self.key, signing_input, hashlib.sha256).digest()
+        if self.algorithm == "RS256":
+            return self.key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+        # JWS carries ES256 signatures as fixed-width r || s rather than DER
+        r, s = decode_dss_signature(self.key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if self.algorithm == "HS256":
+            expected = hmac.new(self.public_key, signing_input, hashlib.sha256).digest()
+            return hmac.compare_digest(expected, signature)
+        try:
+            if self.algorithm == "RS256":
+                self.public_key.verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+            else:
+                if len(signature) != 64:
+                    return False
+                der = encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+                self.public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+            return True
+        except InvalidSignature:
+            return False
+
+
+class KeyRing:
+    """
+    The signing key plus every verification key, indexed by `kid`.
+
+    Key material is parsed once when the ring is built, and verified tokens are
+    remembered in a bounded LRU so repeat requests with a hot token skip the
+    signature check and only re-validate the time-based claims.
+    """
+
+    def __init__(self, signing_key: Optional[SigningKey], issuer: Optional[str] = None,
+                 ttl_seconds: int = 3600, cache_size: int = 4096) -> None:
+        self.signing_key = signing_key
+        self.issuer = issuer
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self._keys: Dict[str, SigningKey] = {}
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if signing_key is not None:
+            self.add_key(signing_key)
+
+    def add_key(self, key: SigningKey) -> None:
+        with self._lock:
+            self._keys[key.kid] = key
+            self._verified.clear()
+
+    def remove_key(self, kid: str) -> None:
+        with self._lock:
+            self._keys.pop(kid, None)
+            self._verified.clear()
+
+    def get_key(self, kid: Optional[str]) -> Optional[SigningKey]:
+        return self._keys.get(kid)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        if self.signing_key is None:
+            raise JWTError("No signing key configured")
+        header = {"alg": self.signing_key.algorithm, "typ": "JWT", "kid": self.signing_key.kid}
+        segments = [
+            _b64encode(json.dumps(header, separators=(",", ":")).encode()),
+            _b64encode(json.dumps(claims, separators=(",", ":"), default=str).encode()),
+        ]
+        signing_input = ".".join(segments).encode()
+        segments.append(_b64encode(self.signing_key.sign(signing_input)))
+        return ".".join(segments)
+
+    def verify(self, token: str, audience: Optional[str] = None, leeway: int = 0) -> Dict[str, Any]:
+        """
+        Verify a compact JWS and return its claims.
+
+        Raises:
+            JWTError: If the token is malformed, signed by an unknown key, has a bad
+                signature, or is expired / not yet valid / for another issuer or audience.
+        """
+        with self._lock:
+            claims = self._verified.get(token)
+            if claims is not None:
+                self._verified.move_to_end(token)
+        if claims is None:
+            claims = self._verify_signature(token)
+        self._validate_claims(claims, audience, leeway)
+        if self.cache_size > 0:
+            with self._lock:
+                self._verified[token] = claims
+                self._verified.move_to_end(token)
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return claims
+
+    def _verify_signature(self, token: str) -> Dict[str, Any]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+        except ValueError as e:
+            raise JWTError("Malformed token") from e
+        try:
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+        except ValueError as e:
+            raise JWTError("Malformed token") from e
+        if not isinstance(claims, dict):
+            raise JWTError("Malformed token")
+        _check_header(header)
+        key = self.get_key(header.get("kid"))
+        if key is None and "kid" not in header and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        # The algorithm is pinned by the key, never chosen by the token.
+        if header.get("alg") != key.algorithm:
+            raise JWTError("Algorithm mismatch")
+        signing_input = f"{header_segment}.{payload_segment}".encode()
+        if not key.verify(signing_input, _b64decode(signature_segment)):
+            raise JWTError("Invalid signature")
+        return claims
+
+    def _validate_claims(self, claims: Dict[str, Any], audience: Optional[str], leeway: int) -> None:
+        now = time.time()
+        if not all(_is_number(claims[name]) for name in ("exp", "nbf") if claims.get(name) is not None):
+            raise JWTError("Malformed token")
+        exp = claims.get("exp")
+        if exp is not None and now > exp + leeway:
+            raise JWTError("Token expired")
+        nbf = claims.get("nbf")
+        if nbf is not None and now < nbf - leeway:
+            raise JWTError("Token not yet valid")
+        if self.issuer is not None and claims.get("iss") != self.issuer:
+            raise JWTError("Invalid issuer")
+        if audience is not None:
+            aud = claims.get("aud")
+            if audience != aud and not (isinstance(aud, list) and audience in aud):
+                raise JWTError("Invalid audience")
+
+
+def _parse_public_key_files(spec: str, algorithm: str) -> Tuple[SigningKey, ...]:
+    keys = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        kid, _, path = entry.partition("=")
+        with open(path, "rb") as f:
+            keys.append(SigningKey.from_pem(kid, algorithm, f.read()))
+    return tuple(keys)
+
+
+def load_keyring() -> KeyRing:
+    """Build a KeyRing from config. Called once at startup."""
+    algorithm = config.JWT_ALGORITHM
+    if algorithm == "HS256":
+        secret = config.JWT_SECRET
+        if not secret:
+            logging.warning("JWT_SECRET is not set; using a random per-process secret")
+            secret = secrets.token_urlsafe(32)
+        signing_key = SigningKey.from_secret(config.JWT_KEY_ID, secret.encode())
+    elif algorithm in SUPPORTED_ALGORITHMS:
+        if not config.JWT_PRIVATE_KEY_FILE:
+            raise JWTError(f"JWT_PRIVATE_KEY_FILE is required for {algorithm}")
+        with open(config.JWT_PRIVATE_KEY_FILE, "rb") as f:
+            signing_key = SigningKey.from_pem(config.JWT_KEY_ID, algorithm, f.read())
+    else:
+        raise JWTError(f"Unsupported algorithm: {algorithm}")
+    keyring = KeyRing(signing_key, issuer=config.JWT_ISSUER, ttl_seconds=config.JWT_TTL_SECONDS,
+                      cache_size=config.JWT_VERIFIED_CACHE_SIZE)
+    for key in _parse_public_key_files(config.JWT_PUBLIC_KEY_FILES, algorithm):
+        keyring.add_key(key)
+    return keyring
+
+
+_keyring: Optional[KeyRing] = None
+_keyring_lock = threading.Lock()
+
+
+def init_keys(keyring: Optional[KeyRing] = None) -> KeyRing:
+    """Install `keyring` (or one built from config) as the process-wide key ring."""
+    global _keyring
+    with _keyring_lock:
+        _keyring = keyring or load_keyring()
+        return _keyring
+
+
+def get_keyring() -> KeyRing:
+    """Return the process-wide key ring, building it from config on first use."""
+    global _keyring
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = load_keyring()
+    return _keyring
 
 
 def create_token(user_data: dict) -> str:
-    """Generates a JWT token for the provided user data.
+    """Generates a signed JWT for the provided user data.
 
-    This is a stub implementation for demonstration purposes.
-    In a production setting, replace this with actual JWT token generation logic.
+    The Google account id becomes the `sub` claim; email and name are carried along.
     """
     try:
-        # In actual implementation, you might use libraries like PyJWT to generate token
-        # For now, return a dummy token string
-        return "dummy-token"
+        keyring = get_keyring()
+        now = int(time.time())
+        claims = {
+            "sub": user_data.get("google_id"),
+            "email": user_data.get("email"),
+            "name": user_data.get("name"),
+            "iat": now,
+            "exp": now + keyring.ttl_seconds,
+        }
+        if keyring.issuer is not None:
+            claims["iss"] = keyring.issuer
+        return keyring.sign(claims)
     except Exception as e:
         logging.error(e, exc_info=True)
         raise
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Verifies a JWT issued by `create_token` and returns its claims.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    return get_keyring().verify(token)
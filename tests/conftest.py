@@ -1,10 +1,24 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiosqlite
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi.testclient import TestClient
 from sqlalchemy import StaticPool, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from demo_auth_svc import config, oauth
 from demo_auth_svc.app import app
-from demo_auth_svc.models.base import Base, get_db
+from demo_auth_svc.cache import MemoryCache, ObjectCache, ResponseCache
+from demo_auth_svc.models.base import Base, get_async_db, get_async_session_factory, get_db
+from demo_auth_svc.routers import forum
+from jwt_module import KeyRing, SigningKey, _b64encode
 
 
 # DO NOT MODIFY SECTION START
@@ -39,4 +53,127 @@ def client(session_local):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides[get_db] = get_db
-# DO NOT MODIFY SECTION END
\ No newline at end of file
+# DO NOT MODIFY SECTION END
+
+
+@pytest.fixture(autouse=True)
+def async_session_local(session_local):
+    """
+    Async session factory sharing the in-memory database of `session_local`.
+
+    The aiosqlite connection wraps the very sqlite3 connection held by the sync
+    StaticPool, so rows written through `db_session` are visible to the async
+    routers and vice versa.
+    """
+    raw_connection = session_local.kw["bind"].raw_connection().driver_connection
+
+    async def creator():
+        return await aiosqlite.Connection(lambda: raw_connection, 64)
+
+    engine = create_async_engine("sqlite+aiosqlite://", async_creator=creator, poolclass=StaticPool)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_async_session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_async_session
+    app.dependency_overrides[get_async_session_factory] = lambda: factory
+    yield factory
+    app.dependency_overrides.pop(get_async_db, None)
+    app.dependency_overrides.pop(get_async_session_factory, None)
+    asyncio.run(engine.dispose())
+
+
+class StubJWKSServer:
+    """A local JWKS endpoint serving RSA keys it can also sign ID tokens with."""
+
+    def __init__(self):
+        self.cache_control = "public, max-age=3600"
+        self.delay = 0.0
+        self.hits = 0
+        self._signers = {}
+        self._jwks = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps({"keys": stub._jwks}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", stub.cache_control)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/certs"
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def add_key(self, kid):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption())
+        self._signers[kid] = KeyRing(SigningKey.from_pem(kid, "RS256", pem))
+        numbers = private.public_key().public_numbers()
+        self._jwks.append({
+            "kty": "RSA", "alg": "RS256", "use": "sig", "kid": kid,
+            "n": _b64encode(numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, "big")),
+            "e": _b64encode(numbers.e.to_bytes(3, "big")),
+        })
+
+    def sign(self, claims, kid):
+        return self._signers[kid].sign(claims)
+
+    def id_token(self, kid="key-1", audience="test_client_id", **claims):
+        now = int(time.time())
+        return self.sign({"iss": "https://accounts.google.com", "aud": audience, "iat": now, "exp": now + 300,
+                          **claims}, kid)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def jwks_server():
+    server = StubJWKSServer()
+    server.add_key("key-1")
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def oauth_settings(monkeypatch):
+    """OAuth client settings for the app lifespan to load; any test may override them first."""
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_ID", "test_client_id")
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_SECRET", "test_client_secret")
+    monkeypatch.setattr(config, "GOOGLE_REDIRECT_URI", "http://localhost/callback")
+    monkeypatch.setattr(oauth, "_settings", None)
+    monkeypatch.setattr(oauth, "_url_builder", None)
+    monkeypatch.setattr(oauth, "_state_signer", None)
+
+
+@pytest.fixture(autouse=True)
+def no_in_process_calendar_worker(monkeypatch):
+    """Tests drive the calendar worker explicitly instead of from the app lifespan."""
+    monkeypatch.setattr("demo_auth_svc.config.CALENDAR_WORKER_IN_PROCESS", False)
+
+
+@pytest.fixture(autouse=True)
+def no_jwks_prefetch(monkeypatch):
+    """The app lifespan must not reach Google's key endpoint; tests that want the warm-up opt back in."""
+    monkeypatch.setattr("demo_auth_svc.config.GOOGLE_JWKS_PREFETCH", False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_forum_cache(monkeypatch):
+    """Each test gets empty response caches; its database starts empty too."""
+    monkeypatch.setattr(forum, "forum_cache", ResponseCache(MemoryCache(), "forum"))
+    monkeypatch.setattr(forum, "post_cache", ObjectCache(MemoryCache(max_entries=100, default_ttl=60), "post", ttl=60))
+    return forum.forum_cache
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, text
+
+from demo_auth_svc.models import base
+
+
+def test_get_db_uses_shared_session_factory(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("get_db must not build a sessionmaker per request")
+
+    monkeypatch.setattr(base, "sessionmaker", fail)
+    dependency = base.get_db()
+    session = next(dependency)
+    assert session.bind is base.engine
+    dependency.close()
+
+
+def test_engine_options_skip_pool_sizing_for_memory_sqlite():
+    assert base.engine_options("sqlite:///:memory:") == {}
+    options = base.engine_options("sqlite:////tmp/demo.db")
+    assert options["pool_size"] == base.DB_POOL_SIZE
+    assert options["pool_pre_ping"] == base.DB_POOL_PRE_PING
+
+
+def test_pool_metrics_counts_checkouts(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **base.engine_options(url))
+    metrics = base.PoolMetrics(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert metrics.snapshot()["checkedout"] == 1
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkins"] == 1
+    assert snapshot["checkedout"] == 0
+    engine.dispose()
@@ -0,0 +1,57 @@
+import json
+
+from fastapi import status
+
+import jwt_module
+from demo_auth_svc import config
+from demo_auth_svc.models.forum_post import ForumPost
+
+
+def auth_header():
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_bulk_insert_json_array_reports_per_item(client, db_session, monkeypatch):
+    monkeypatch.setattr(config, "FORUM_BULK_CHUNK_SIZE", 2)
+    payload = [
+        {"user_id": 1, "content": "one", "additional_metadata": {"source": "import"}},
+        {"user_id": "not-a-number", "content": "bad"},
+        {"user_id": 2, "content": "two"},
+        {"content": "missing user"},
+        {"user_id": 3, "content": "three"},
+    ]
+    response = client.post("/forum/bulk", json=payload, headers=auth_header())
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["inserted"] == 3
+    assert data["failed"] == 2
+    results = data["results"]
+    assert [r["success"] for r in results] == [True, False, True, False, True]
+    assert "user_id" in results[1]["error"]
+    assert "user_id" in results[3]["error"]
+
+    stored = {post.post_id: post for post in db_session.query(ForumPost).all()}
+    assert [stored[results[i]["post_id"]].content for i in (0, 2, 4)] == ["one", "two", "three"]
+    assert stored[results[0]["post_id"]].additional_metadata == {"source": "import"}
+
+    total = client.get("/forum", headers=auth_header()).json()["total"]
+    assert total == 3
+
+
+def test_bulk_insert_ndjson(client, db_session):
+    body = "\n".join(json.dumps({"user_id": 1, "content": f"post {i}"}) for i in range(50)) + "\n"
+    response = client.post("/forum/bulk", content=body,
+                           headers={**auth_header(), "Content-Type": "application/x-ndjson"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["inserted"] == 50
+    assert db_session.query(ForumPost).count() == 50
+
+
+def test_bulk_insert_rejects_bad_bodies(client):
+    headers = auth_header()
+    assert client.post("/forum/bulk", json=[], headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.post("/forum/bulk", json={"user_id": 1}, headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.post("/forum/bulk", content="{not json",
+                       headers={**headers, "Content-Type": "application/x-ndjson"}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.post("/forum/bulk", json=[{"user_id": 1, "content": "x"}]).status_code == status.HTTP_401_UNAUTHORIZED
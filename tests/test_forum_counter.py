@@ -0,0 +1,82 @@
+import asyncio
+
+import jwt_module
+
+from demo_auth_svc import counters
+from demo_auth_svc.models.forum_post import ForumPost
+from demo_auth_svc.models.row_counter import RowCounter
+
+
+def auth_header():
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_total_tracks_creates_and_deletes(client):
+    post_ids = []
+    for i in range(3):
+        resp = client.post("/forum", json={"user_id": 1, "content": f"Counted {i}"}, headers=auth_header())
+        post_ids.append(resp.json()["post_id"])
+    assert client.get("/forum", headers=auth_header()).json()["total"] == 3
+
+    client.delete(f"/forum/{post_ids[0]}", headers=auth_header())
+    assert client.get("/forum", headers=auth_header()).json()["total"] == 2
+
+
+def test_counter_initialised_from_existing_rows(db_session, async_session_local):
+    db_session.add_all([ForumPost(user_id=1, content="a"), ForumPost(user_id=1, content="b")])
+    db_session.commit()
+    assert db_session.get(RowCounter, counters.FORUM_POSTS) is None
+
+    async def count():
+        async with async_session_local() as session:
+            return await counters.get_count(session, counters.FORUM_POSTS, async_session_local)
+
+    assert asyncio.run(count()) == 2
+    assert db_session.get(RowCounter, counters.FORUM_POSTS).value == 2
+
+
+def test_reconcile_corrects_drift(db_session, async_session_local):
+    db_session.add(ForumPost(user_id=1, content="a"))
+    db_session.add(RowCounter(name=counters.FORUM_POSTS, value=42))
+    db_session.commit()
+
+    async def reconcile_and_count():
+        async with async_session_local() as session:
+            await counters.reconcile_all(session)
+            return await counters.get_count(session, counters.FORUM_POSTS, async_session_local)
+
+    assert asyncio.run(reconcile_and_count()) == 1
+
+
+def test_counter_initialised_without_ending_the_callers_transaction(db_session, async_session_local):
+    db_session.add(ForumPost(user_id=1, content="a"))
+    db_session.commit()
+
+    async def forbidden():
+        raise AssertionError("the caller's session must not be committed or rolled back")
+
+    async def count():
+        async with async_session_local() as session:
+            session.commit = session.rollback = forbidden
+            return await counters.get_count(session, counters.FORUM_POSTS, async_session_local)
+
+    assert asyncio.run(count()) == 1
+    assert db_session.get(RowCounter, counters.FORUM_POSTS).value == 1
+
+
+def test_reconcile_drops_cached_pages_with_a_stale_total(client, db_session, async_session_local):
+    client.post("/forum", json={"user_id": 1, "content": "Counted"}, headers=auth_header())
+    assert client.get("/forum", headers=auth_header()).json()["total"] == 1
+
+    # A row written behind the counter's back leaves the cached total stale.
+    db_session.add(ForumPost(user_id=1, content="Uncounted"))
+    db_session.commit()
+    assert client.get("/forum", headers=auth_header()).json()["total"] == 1
+
+    async def reconcile():
+        async with async_session_local() as session:
+            await counters.reconcile_all(session)
+
+    asyncio.run(reconcile())
+    assert client.get("/forum", headers=auth_header()).json()["total"] == 2
@@ -2,9 +2,11 @@ import time
 import pytest
 from fastapi import status
 
+import jwt_module
+
 
 def auth_header(valid: bool = True):
-    token = "dummy-token" if valid else "invalid-token"
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"}) if valid else "invalid-token"
     return {"Authorization": f"Bearer {token}"}
 
 
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from fastapi import status
+
+import jwt_module
+from demo_auth_svc import config
+from demo_auth_svc.models.forum_post import ForumPost
+
+
+def auth_header():
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_posts(db_session):
+    posts = [
+        ForumPost(user_id=1, content="first", timestamp=datetime(2024, 1, 1, 9, 0), additional_metadata={"k": 1}),
+        ForumPost(user_id=2, content="second, with comma", timestamp=datetime(2024, 1, 2, 9, 0)),
+        ForumPost(user_id=1, content="third", timestamp=datetime(2024, 1, 3, 9, 0)),
+        ForumPost(user_id=1, content="fourth", timestamp=datetime(2024, 1, 4, 9, 0)),
+    ]
+    db_session.add_all(posts)
+    db_session.commit()
+    return posts
+
+
+def test_export_ndjson_streams_all_posts(client, db_session, monkeypatch):
+    # Several server-side cursor batches.
+    monkeypatch.setattr(config, "FORUM_EXPORT_BATCH_SIZE", 3)
+    posts = seed_posts(db_session)
+
+    response = client.get("/forum/export", headers=auth_header())
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["post_id"] for row in rows] == [post.post_id for post in posts]
+    assert rows[0]["additional_metadata"] == {"k": 1}
+    assert rows[0]["timestamp"] == "2024-01-01T09:00:00"
+
+
+def test_export_csv_with_filters(client, db_session):
+    seed_posts(db_session)
+
+    response = client.get("/forum/export", headers=auth_header(),
+                          params={"format": "csv", "user_id": 1, "from": "2024-01-01T09:00:00", "to": "2024-01-04T09:00:00"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["content"] for row in rows] == ["first", "third"]
+    assert json.loads(rows[0]["additional_metadata"]) == {"k": 1}
+
+
+def test_export_converts_offset_bounds_to_utc(client, db_session):
+    seed_posts(db_session)
+
+    # 14:00+05:00 is 09:00 UTC, the stored time of "first" and "fourth".
+    response = client.get("/forum/export", headers=auth_header(),
+                          params={"user_id": 1, "from": "2024-01-01T14:00:00+05:00", "to": "2024-01-04T14:00:00+05:00"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [json.loads(line)["content"] for line in response.text.splitlines()] == ["first", "third"]
+
+
+def test_export_csv_empty_has_header(client):
+    response = client.get("/forum/export", headers=auth_header(), params={"format": "csv"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text.strip() == "post_id,user_id,content,timestamp,additional_metadata"
+
+
+def test_export_requires_token_and_known_format(client):
+    assert client.get("/forum/export").status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/forum/export", headers=auth_header(), params={"format": "xml"}).status_code == 422
@@ -1,9 +1,13 @@
 import pytest
 from fastapi import status
+from sqlalchemy import event
+
+import jwt_module
+from demo_auth_svc.routers import forum
 
 
 def auth_header(valid: bool = True):
-    token = "dummy-token" if valid else "invalid-token"
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"}) if valid else "invalid-token"
     return {"Authorization": f"Bearer {token}"}
 
 
@@ -28,6 +32,17 @@ def test_create_forum_post_invalid_token(client):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+@pytest.mark.parametrize("token", [
+    # Unsigned header whose kid cannot be looked up.
+    lambda: jwt_module._b64encode(b'{"alg":"HS256","kid":[1]}') + "." + jwt_module._b64encode(b"{}") + ".",
+    # Validly signed, but exp is not a number.
+    lambda: jwt_module.get_keyring().sign({"sub": "google123", "exp": "tomorrow"}),
+])
+def test_malformed_token_is_unauthorized(client, token):
+    response = client.get("/forum", headers={"Authorization": f"Bearer {token()}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 def test_update_forum_post_success(client):
     # First create a forum post
     payload = {"user_id": 2, "content": "Original content"}
@@ -75,3 +90,82 @@ def test_get_forum_posts(client):
     assert "page" in data
     assert "page_size" in data
     assert "total" in data
+
+
+def test_get_forum_posts_cursor_pagination(client):
+    created_ids = []
+    for i in range(5):
+        resp = client.post("/forum", json={"user_id": 5, "content": f"Cursor post {i}"}, headers=auth_header())
+        created_ids.append(resp.json()["post_id"])
+
+    first = client.get("/forum?page=1&page_size=2", headers=auth_header()).json()
+    seen = [p["post_id"] for p in first["data"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        response = client.get("/forum", params={"cursor": cursor, "page_size": 2}, headers=auth_header())
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert "total" not in data
+        seen.extend(p["post_id"] for p in data["data"])
+        cursor = data["next_cursor"]
+
+    assert seen == created_ids
+
+
+def test_get_forum_posts_cursor_with_total(client):
+    for i in range(3):
+        client.post("/forum", json={"user_id": 6, "content": f"Post {i}"}, headers=auth_header())
+    first = client.get("/forum?page_size=1", headers=auth_header()).json()
+    response = client.get("/forum", params={"cursor": first["next_cursor"], "page_size": 1, "include_total": True},
+                          headers=auth_header())
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == 3
+
+
+@pytest.mark.parametrize("params", [{"page": 0}, {"page": -1}, {"page_size": 0}, {"page_size": -5},
+                                    {"page_size": 101}])
+def test_get_forum_posts_rejects_out_of_range_paging(client, params):
+    response = client.get("/forum", params=params, headers=auth_header())
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_forum_posts_invalid_cursor(client):
+    response = client.get("/forum", params={"cursor": "not-a-cursor"}, headers=auth_header())
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_forum_post_read_through_cache(client, async_session_local):
+    post_id = client.post("/forum", json={"user_id": 1, "content": "hot post"}, headers=auth_header()).json()["post_id"]
+    statements = []
+    event.listen(async_session_local.kw["bind"].sync_engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    first = client.get(f"/forum/{post_id}", headers=auth_header())
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.json()["content"] == "hot post"
+    statements.clear()
+
+    second = client.get(f"/forum/{post_id}", headers=auth_header())
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert statements == []
+    assert forum.post_cache.backend.snapshot()["hits"] == 1
+    assert forum.post_cache.backend.snapshot()["misses"] == 1
+
+
+def test_get_forum_post_invalidated_by_update_and_delete(client):
+    post_id = client.post("/forum", json={"user_id": 1, "content": "before"}, headers=auth_header()).json()["post_id"]
+    client.get(f"/forum/{post_id}", headers=auth_header())
+
+    client.put(f"/forum/{post_id}", json={"content": "after"}, headers=auth_header())
+    response = client.get(f"/forum/{post_id}", headers=auth_header())
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["content"] == "after"
+
+    client.delete(f"/forum/{post_id}", headers=auth_header())
+    assert client.get(f"/forum/{post_id}", headers=auth_header()).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_forum_post_requires_token(client):
+    assert client.get("/forum/1").status_code == status.HTTP_401_UNAUTHORIZED
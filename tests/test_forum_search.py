@@ -0,0 +1,96 @@
+import pytest
+from fastapi import status
+
+import jwt_module
+from demo_auth_svc import config, search
+from demo_auth_svc.models.forum_post import ForumPost
+
+
+def auth_header():
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def posts(db_session):
+    contents = [
+        "The quarterly planning meeting moved to Thursday",
+        "Lunch options near the office",
+        "Planning notes: planning, planning and more planning",
+        "Reminder: submit travel expenses",
+        "Office planning for the new floor",
+    ]
+    rows = [ForumPost(user_id=1, content=content) for content in contents]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+def test_parse_terms_drops_syntax():
+    assert search.parse_terms('plan* "meeting" OR (NEAR') == ["plan*", "meeting", "OR", "NEAR"]
+    assert search.FTS5Backend.match_expression(["plan*", "OR"]) == '"plan"* "OR"'
+
+
+def test_search_ranks_and_highlights(client, posts):
+    response = client.get("/forum/search", params={"q": "planning"}, headers=auth_header())
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()["data"]
+    assert {hit["post_id"] for hit in data} == {posts[0].post_id, posts[2].post_id, posts[4].post_id}
+    # The post that repeats the term ranks first.
+    assert data[0]["post_id"] == posts[2].post_id
+    assert data[0]["rank"] <= data[1]["rank"] <= data[2]["rank"]
+    assert "<mark>planning</mark>" in data[0]["snippet"].lower()
+
+
+def test_search_requires_every_term_and_supports_prefix(client, posts):
+    data = client.get("/forum/search", params={"q": "office planning"}, headers=auth_header()).json()["data"]
+    assert [hit["post_id"] for hit in data] == [posts[4].post_id]
+    data = client.get("/forum/search", params={"q": "expen*"}, headers=auth_header()).json()["data"]
+    assert [hit["post_id"] for hit in data] == [posts[3].post_id]
+
+
+def test_search_index_follows_update_and_delete(client, posts):
+    post_id = posts[1].post_id
+    client.put(f"/forum/{post_id}", json={"content": "Planning lunch"}, headers=auth_header())
+    data = client.get("/forum/search", params={"q": "lunch"}, headers=auth_header()).json()["data"]
+    assert [hit["content"] for hit in data] == ["Planning lunch"]
+    assert client.get("/forum/search", params={"q": "options"}, headers=auth_header()).json()["data"] == []
+
+    client.delete(f"/forum/{post_id}", headers=auth_header())
+    assert client.get("/forum/search", params={"q": "lunch"}, headers=auth_header()).json()["data"] == []
+
+
+@pytest.mark.parametrize("backend", ["fts5", "like"])
+def test_search_cursor_pagination(client, db_session, monkeypatch, backend):
+    monkeypatch.setattr(config, "FORUM_SEARCH_BACKEND", backend)
+    db_session.add_all([ForumPost(user_id=1, content=f"budget review {i} " + "budget " * (i % 3)) for i in range(7)])
+    db_session.add(ForumPost(user_id=1, content="unrelated"))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "budget", "page_size": 3}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/forum/search", params=params, headers=auth_header()).json()
+        assert len(body["data"]) <= 3
+        seen.extend(hit["post_id"] for hit in body["data"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+
+def test_like_backend_snippet(client, posts, monkeypatch):
+    monkeypatch.setattr(config, "FORUM_SEARCH_BACKEND", "like")
+    data = client.get("/forum/search", params={"q": "travel"}, headers=auth_header()).json()["data"]
+    assert [hit["post_id"] for hit in data] == [posts[3].post_id]
+    assert data[0]["snippet"] == "Reminder: submit <mark>travel</mark> expenses"
+
+
+def test_search_rejects_bad_input(client):
+    headers = auth_header()
+    assert client.get("/forum/search", params={"q": "!!!"}, headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/forum/search", params={"q": "a", "cursor": "zz"}, headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/forum/search", params={"q": "a"}).status_code == status.HTTP_401_UNAUTHORIZED
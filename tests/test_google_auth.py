@@ -3,14 +3,16 @@ import json
 import httpx
 import pytest
 from fastapi import HTTPException
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, parse_qsl
 
 
-def test_signup_redirect(client, monkeypatch):
-    # Setup environment variables
-    monkeypatch.setenv("CLIENT_ID", "test_client_id")
-    monkeypatch.setenv("REDIRECT_URI", "http://localhost/callback")
-    
+def start_flow(client, intent="signup"):
+    """Follow the signup/login redirect as a browser would and return the state sent to Google."""
+    response = client.get(f"/auth/google/{intent}", follow_redirects=False)
+    return parse_qs(urlparse(response.headers["location"]).query)["state"][0]
+
+
+def test_signup_redirect(client):
     # Using 'follow_redirects' due to behavior of TestClient
     response = client.get("/auth/google/signup", follow_redirects=False)
     
@@ -29,14 +31,12 @@ def test_signup_redirect(client, monkeypatch):
     assert query_params.get("scope") == ["openid email profile"]
     assert query_params.get("client_id") == ["test_client_id"]
     assert query_params.get("redirect_uri") == ["http://localhost/callback"]
-    assert query_params.get("state") == ["signup"]
+    assert query_params.get("state")[0].startswith("signup.")
+    assert query_params.get("code_challenge_method") == ["S256"]
+    assert "oauth_state" in response.cookies
 
 
-def test_login_redirect(client, monkeypatch):
-    # Setup environment variables for login endpoint
-    monkeypatch.setenv("CLIENT_ID", "test_client_id")
-    monkeypatch.setenv("REDIRECT_URI", "http://localhost/callback")
-
+def test_login_redirect(client):
     response = client.get("/auth/google/login", follow_redirects=False)
     
     # Verify redirection status code is 302
@@ -53,21 +53,40 @@ def test_login_redirect(client, monkeypatch):
     assert query_params.get("scope") == ["openid email profile"]
     assert query_params.get("client_id") == ["test_client_id"]
     assert query_params.get("redirect_uri") == ["http://localhost/callback"]
-    assert query_params.get("state") == ["login"]
+    assert query_params.get("state")[0].startswith("login.")
 
 
-def fake_httpx_post_success(url, data):
-    class FakeResponse:
-        def raise_for_status(self):
-            pass
-        def json(self):
-            return {
-                "sub": "google123",
-                "email": "user@example.com",
-                "name": "Test User",
-                "picture": "http://example.com/pic.jpg"
-            }
-    return FakeResponse()
+@pytest.fixture
+def token_requests():
+    """Form bodies posted to the fake Google token endpoint."""
+    return []
+
+
+@pytest.fixture
+def google_tokens(jwks_server, monkeypatch, token_requests):
+    """Point ID-token verification at the stub JWKS server and fake the token exchange."""
+    import demo_auth_svc.routers.google_auth as google_auth
+    from demo_auth_svc import http_client
+    from demo_auth_svc.jwks import JWKSCache
+
+    monkeypatch.setattr(google_auth, "google_jwks", JWKSCache(jwks_server.url))
+    token_data = {
+        "access_token": "access123",
+        "id_token": jwks_server.id_token(
+            sub="google123", email="user@example.com", name="Test User", picture="http://example.com/pic.jpg"
+        ),
+    }
+
+    def fake_token_endpoint(request):
+        if str(request.url) == jwks_server.url:
+            upstream = httpx.get(jwks_server.url)
+            return httpx.Response(upstream.status_code, headers=upstream.headers, content=upstream.content)
+        token_requests.append(dict(parse_qsl(request.content.decode())))
+        return httpx.Response(200, json=token_data)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake_token_endpoint))
+    monkeypatch.setattr(http_client, "get_http_client", lambda: client)
+    return token_data
 
 
 def fake_httpx_post_failure(url, data):
@@ -76,16 +95,9 @@ def fake_httpx_post_failure(url, data):
     raise HTTPStatusError(message="Error", request=None, response=fake_response)
 
 
-def test_callback_success(client, monkeypatch):
-    # Setup environment variables
-    monkeypatch.setenv("CLIENT_ID", "test_client_id")
-    monkeypatch.setenv("CLIENT_SECRET", "test_client_secret")
-    monkeypatch.setenv("REDIRECT_URI", "http://localhost/callback")
-
-    # Monkey patch httpx.post to simulate successful token exchange
-    monkeypatch.setattr(httpx, "post", fake_httpx_post_success)
-
-    response = client.get("/auth/google/callback", params={"code": "valid_code"})
+def test_callback_success(client, google_tokens):
+    state = start_flow(client)
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": state})
     assert response.status_code == 200
     data = response.json()
     assert data["google_id"] == "google123"
@@ -101,15 +113,7 @@ def test_callback_error(client):
     assert "Google OAuth error" in data["detail"]
 
 
-def test_callback_login_success(client, monkeypatch):
-    # Setup environment variables
-    monkeypatch.setenv("CLIENT_ID", "test_client_id")
-    monkeypatch.setenv("CLIENT_SECRET", "test_client_secret")
-    monkeypatch.setenv("REDIRECT_URI", "http://localhost/callback")
-
-    # Monkey patch httpx.post to simulate successful token exchange
-    monkeypatch.setattr(httpx, "post", fake_httpx_post_success)
-
+def test_callback_login_success(client, monkeypatch, google_tokens):
     # Patch the jwt_module in the google_auth router to simulate JWT token generation
     import demo_auth_svc.routers.google_auth as google_auth
 
@@ -120,8 +124,120 @@ def test_callback_login_success(client, monkeypatch):
 
     monkeypatch.setattr(google_auth, "jwt_module", FakeJWTModule)
 
-    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": "login"})
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": start_flow(client, "login")})
     assert response.status_code == 200
     data = response.json()
     assert "token" in data
     assert data["token"] == "fake-jwt-token"
+
+
+def test_callback_rejects_unverifiable_id_token(client, google_tokens, jwks_server):
+    google_tokens["id_token"] = jwks_server.id_token(audience="another_client_id", sub="google123")
+
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": start_flow(client)})
+    assert response.status_code == 401
+
+
+def test_callback_requires_id_token(client, google_tokens):
+    del google_tokens["id_token"]
+
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": start_flow(client)})
+    assert response.status_code == 401
+
+
+def test_callback_sends_pkce_verifier_matching_challenge(client, google_tokens, token_requests):
+    from demo_auth_svc import oauth
+
+    response = client.get("/auth/google/login", follow_redirects=False)
+    query_params = parse_qs(urlparse(response.headers["location"]).query)
+    state = query_params["state"][0]
+
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": state})
+    assert response.status_code == 200
+    verifier = token_requests[0]["code_verifier"]
+    assert 43 <= len(verifier) <= 128
+    assert oauth.code_challenge(verifier) == query_params["code_challenge"][0]
+    # The state is spent: the cookie is cleared, so replaying the callback fails.
+    assert "oauth_state" not in client.cookies
+    assert client.get("/auth/google/callback", params={"code": "valid_code", "state": state}).status_code == 400
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda state: None,
+    lambda state: "login",
+    lambda state: state.replace("signup.", "login.", 1),
+    lambda state: state[:-2] + ("AA" if not state.endswith("AA") else "BB"),
+])
+def test_callback_rejects_forged_state(client, google_tokens, token_requests, tamper):
+    state = start_flow(client)
+    params = {"code": "valid_code"}
+    if tamper(state) is not None:
+        params["state"] = tamper(state)
+
+    response = client.get("/auth/google/callback", params=params)
+    assert response.status_code == 400
+    assert token_requests == []
+
+
+def test_callback_rejects_state_from_another_browser(client, google_tokens):
+    state = start_flow(client)
+    client.cookies.clear()
+    start_flow(client)
+
+    response = client.get("/auth/google/callback", params={"code": "valid_code", "state": state})
+    assert response.status_code == 400
+
+
+def test_state_signer_expires_states():
+    from demo_auth_svc.oauth import InvalidOAuthState, OAuthSettings, StateSigner
+
+    now = [1000.0]
+    signer = StateSigner(OAuthSettings("id", "secret", "https://example.com/cb", state_ttl=60), clock=lambda: now[0])
+    state, nonce = signer.issue("login")
+    now[0] += 60
+    assert signer.verify(state, nonce) == "login"
+    now[0] += 1
+    with pytest.raises(InvalidOAuthState, match="expired"):
+        signer.verify(state, nonce)
+
+
+def test_state_signer_keys_are_shared_across_processes():
+    from demo_auth_svc.oauth import InvalidOAuthState, OAuthSettings, StateSigner
+
+    state, nonce = StateSigner(OAuthSettings("id", "secret", "https://example.com/cb")).issue("signup")
+    # Another worker builds its signer from the same settings and accepts the state.
+    other_worker = StateSigner(OAuthSettings("id", "secret", "https://example.com/cb"))
+    assert other_worker.verify(state, nonce) == "signup"
+    rotated = StateSigner(OAuthSettings("id", "secret", "https://example.com/cb", state_secret="rotated"))
+    with pytest.raises(InvalidOAuthState):
+        rotated.verify(state, nonce)
+
+
+def test_startup_fails_without_oauth_settings(monkeypatch):
+    from fastapi.testclient import TestClient
+    from demo_auth_svc import config, oauth
+    from demo_auth_svc.app import app
+
+    monkeypatch.setattr(config, "GOOGLE_CLIENT_SECRET", None)
+    with pytest.raises(oauth.OAuthConfigError, match="CLIENT_SECRET"):
+        with TestClient(app):
+            pass
+
+
+def test_oauth_settings_reject_relative_redirect_uri():
+    from demo_auth_svc.oauth import OAuthConfigError, OAuthSettings
+
+    with pytest.raises(OAuthConfigError, match="REDIRECT_URI"):
+        OAuthSettings("id", "secret", "/callback")
+
+
+def test_authorization_url_builder_matches_urlencode():
+    from demo_auth_svc.oauth import AuthorizationURLBuilder, OAuthSettings
+
+    settings = OAuthSettings("id 1", "secret", "https://example.com/cb?x=1")
+    builder = AuthorizationURLBuilder(settings)
+    expected = {"response_type": "code", "scope": "openid email profile", "client_id": "id 1",
+                "redirect_uri": "https://example.com/cb?x=1", "state": "a/b c", "code_challenge": "xyz"}
+    url = builder.build("a/b c", code_challenge="xyz")
+    assert url.startswith(settings.auth_url + "?")
+    assert parse_qs(urlparse(url).query) == {name: [value] for name, value in expected.items()}
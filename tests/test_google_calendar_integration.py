@@ -1,64 +1,116 @@
+import asyncio
 import json
 from datetime import datetime
 
 import httpx
 import pytest
 
-from demo_auth_svc.google_calendar_integration import add_google_calendar_event
+from demo_auth_svc import google_calendar_integration, http_client
+from demo_auth_svc.google_calendar_integration import add_google_calendar_event, add_google_calendar_events_batch
+from demo_auth_svc.retry import CircuitBreaker, Retrier
 
-class DummyResponse:
-    def __init__(self, json_data, status_code):
-        self._json_data = json_data
-        self.status_code = status_code
-        self.text = json.dumps(json_data)
 
-    def json(self):
-        return self._json_data
+@pytest.fixture(autouse=True)
+def fresh_retrier(monkeypatch):
+    """A fresh breaker per test, with backoff sleeps recorded instead of awaited."""
+    delays = []
 
-    def raise_for_status(self):
-        if not (200 <= self.status_code < 300):
-            # Include the error message from the response to aid debugging
-            raise httpx.HTTPStatusError(self.text, request=None, response=self)
+    async def no_sleep(delay):
+        delays.append(delay)
+
+    retrier = Retrier("google_calendar", max_attempts=3, breaker=CircuitBreaker("google_calendar", failure_threshold=5),
+                      sleep=no_sleep)
+    monkeypatch.setattr(google_calendar_integration, "calendar_retrier", retrier)
+    retrier.delays = delays
+    return retrier
+
+
+def mock_client(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "get_http_client", lambda: client)
+    return client
 
 
 def test_add_google_calendar_event_success(monkeypatch):
     # Setup dummy successful response
-    def dummy_post(url, json, headers, timeout):
-        return DummyResponse({"id": "event123", "status": "confirmed"}, 200)
+    requests = []
 
-    monkeypatch.setattr(httpx, 'post', dummy_post)
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "event123", "status": "confirmed"})
+
+    mock_client(monkeypatch, handler)
     meeting_time = datetime(2023, 10, 26, 15, 30)
     location = "Conference Room A"
     participants = ["user1@example.com", "user2@example.com"]
     oauth_token = "valid_token"
     
-    result = add_google_calendar_event(meeting_time, location, participants, oauth_token)
+    result = asyncio.run(add_google_calendar_event(meeting_time, location, participants, oauth_token))
     
     assert result["success"] is True
     assert "id" in result["response"]
+    assert requests[0].headers["Authorization"] == "Bearer valid_token"
+    assert json.loads(requests[0].content)["attendees"] == [{"email": email} for email in participants]
     
 
 def test_add_google_calendar_event_failure(monkeypatch):
     # Setup dummy failure response to simulate API error
     call_count = {'count': 0}
 
-    def dummy_post_fail(url, json, headers, timeout):
+    def handler(request):
         call_count['count'] += 1
         # simulate failure on each call
-        return DummyResponse({"error": "Bad Request"}, 400)
+        return httpx.Response(400, json={"error": "Bad Request"})
 
-    monkeypatch.setattr(httpx, 'post', dummy_post_fail)
+    mock_client(monkeypatch, handler)
     meeting_time = datetime(2023, 10, 26, 15, 30)
     location = "Conference Room B"
     participants = ["user3@example.com"]
     oauth_token = "invalid_token"
     
-    result = add_google_calendar_event(meeting_time, location, participants, oauth_token)
+    result = asyncio.run(add_google_calendar_event(meeting_time, location, participants, oauth_token))
 
-    # Should have attempted retries (3 attempts)
-    assert call_count['count'] == 3
+    # Client errors are not retried
+    assert call_count['count'] == 1
     assert result["success"] is False
-    assert "Bad Request" in result["message"]
+    assert "400 Bad Request" in result["message"]
+
+
+def test_add_google_calendar_event_retries_unavailable(monkeypatch, fresh_retrier):
+    call_count = {'count': 0}
+
+    def handler(request):
+        call_count['count'] += 1
+        if call_count['count'] < 3:
+            return httpx.Response(503, headers={"Retry-After": "2"})
+        return httpx.Response(200, json={"id": "event123"})
+
+    mock_client(monkeypatch, handler)
+    result = asyncio.run(add_google_calendar_event(datetime(2023, 10, 26, 15, 30), "Room", ["a@example.com"], "token"))
+
+    assert result["success"] is True
+    assert call_count['count'] == 3
+    assert fresh_retrier.delays == [2.0, 2.0]
+
+
+def test_add_google_calendar_event_fails_fast_when_circuit_open(monkeypatch, fresh_retrier):
+    call_count = {'count': 0}
+
+    def handler(request):
+        call_count['count'] += 1
+        return httpx.Response(500)
+
+    mock_client(monkeypatch, handler)
+    meeting_time = datetime(2023, 10, 26, 15, 30)
+    for _ in range(2):
+        asyncio.run(add_google_calendar_event(meeting_time, "Room", ["a@example.com"], "token"))
+    assert fresh_retrier.breaker.state == CircuitBreaker.OPEN
+    calls_before = call_count['count']
+
+    result = asyncio.run(add_google_calendar_event(meeting_time, "Room", ["a@example.com"], "token"))
+
+    assert result == {"success": False, "message": "Google Calendar is temporarily unavailable.", "retryable": True}
+    assert call_count['count'] == calls_before
 
 
 def test_invalid_meeting_time(monkeypatch):
@@ -69,7 +121,80 @@ def test_invalid_meeting_time(monkeypatch):
     participants = ["user4@example.com"]
     oauth_token = "token"
     
-    result = add_google_calendar_event(meeting_time, location, participants, oauth_token)
+    result = asyncio.run(add_google_calendar_event(meeting_time, location, participants, oauth_token))
     
     assert result["success"] is False
     assert result["message"] == "Invalid meeting_time format."
+
+
+def batch_response(parts):
+    """A multipart/mixed batch response with (index, status, body) parts."""
+    boundary = "batch_response_boundary"
+    chunks = []
+    for index, status_code, body in parts:
+        chunks.append(
+            f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-item-{index}>\r\n\r\n"
+            f"HTTP/1.1 {status_code} Status\r\nContent-Type: application/json\r\n\r\n{json.dumps(body)}\r\n"
+        )
+    chunks.append(f"--{boundary}--\r\n")
+    return httpx.Response(200, content="".join(chunks).encode(),
+                          headers={"Content-Type": f"multipart/mixed; boundary={boundary}"})
+
+
+def batch_meetings(count):
+    return [{"meeting_time": datetime(2023, 10, 26, 9, 0), "location": f"Room {i}",
+             "participants": [f"user{i}@example.com"]} for i in range(count)]
+
+
+def test_add_google_calendar_events_batch_reports_per_item(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        # Parts may come back in any order.
+        return batch_response([
+            (2, 400, {"error": {"message": "Invalid attendee"}}),
+            (0, 200, {"id": "event0"}),
+            (1, 503, {"error": {"message": "Backend Error"}}),
+        ])
+
+    mock_client(monkeypatch, handler)
+    results = asyncio.run(add_google_calendar_events_batch(batch_meetings(3), "token"))
+
+    assert len(requests) == 1
+    assert requests[0].url == "https://www.googleapis.com/batch/calendar/v3"
+    assert requests[0].headers["Authorization"] == "Bearer token"
+    assert requests[0].headers["Content-Type"].startswith("multipart/mixed; boundary=")
+    body = requests[0].content.decode()
+    assert body.count("POST /calendar/v3/calendars/primary/events HTTP/1.1") == 3
+    assert '"location": "Room 2"' in body
+
+    assert results[0] == {"success": True, "response": {"id": "event0"}}
+    assert results[1]["success"] is False and results[1]["retryable"] is True
+    assert results[2]["success"] is False and results[2]["retryable"] is False
+    assert "Invalid attendee" in results[2]["message"]
+
+
+def test_add_google_calendar_events_batch_splits_into_batches_of_50(monkeypatch):
+    sizes = []
+
+    def handler(request):
+        count = request.content.decode().count("Content-Type: application/http")
+        sizes.append(count)
+        return batch_response([(i, 200, {"id": f"event{i}"}) for i in range(count)])
+
+    mock_client(monkeypatch, handler)
+    results = asyncio.run(add_google_calendar_events_batch(batch_meetings(120), "token"))
+
+    assert sizes == [50, 50, 20]
+    assert all(result["success"] for result in results)
+    assert results[55]["response"] == {"id": "event5"}
+
+
+def test_add_google_calendar_events_batch_failed_request_fails_every_item(monkeypatch):
+    mock_client(monkeypatch, lambda request: httpx.Response(401, json={"error": "unauthorized"}))
+
+    results = asyncio.run(add_google_calendar_events_batch(batch_meetings(2), "expired"))
+
+    assert [result["success"] for result in results] == [False, False]
+    assert all("401" in result["message"] and result["retryable"] is False for result in results)
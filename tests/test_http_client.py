@@ -0,0 +1,27 @@
+import asyncio
+
+from demo_auth_svc import config, http_client
+
+
+def test_client_is_shared_and_recreated_after_close():
+    client = http_client.get_http_client()
+    assert http_client.get_http_client() is client
+
+    asyncio.run(http_client.close_http_client())
+    assert client.is_closed
+    assert http_client.get_http_client() is not client
+    asyncio.run(http_client.close_http_client())
+
+
+def test_client_pool_limits_follow_config():
+    client = http_client.build_client()
+    pool = client._transport._pool
+    assert pool._max_connections == config.HTTP_CLIENT_MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == config.HTTP_CLIENT_MAX_KEEPALIVE
+    assert pool._http2 == (config.HTTP_CLIENT_HTTP2 and http_client._http2_available())
+    asyncio.run(client.aclose())
+
+
+def test_lifespan_opens_shared_client(client):
+    shared = http_client.get_http_client()
+    assert not shared.is_closed
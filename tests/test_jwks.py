@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+
+from demo_auth_svc.jwks import GOOGLE_ISSUERS, JWKSCache, cache_ttl
+from jwt_module import JWTError
+
+
+def verify(cache, token, **kwargs):
+    return asyncio.run(cache.verify(token, audience="test_client_id", issuers=GOOGLE_ISSUERS, **kwargs))
+
+
+def test_cache_ttl_honours_max_age_and_age():
+    assert cache_ttl(httpx.Headers({"Cache-Control": "public, max-age=600", "Age": "100"}), 60) == 500
+    assert cache_ttl(httpx.Headers({"Cache-Control": "no-store"}), 60) == 0
+    assert cache_ttl(httpx.Headers({}), 60) == 60
+
+
+def test_verify_uses_cached_keys(jwks_server):
+    cache = JWKSCache(jwks_server.url)
+    for _ in range(3):
+        claims = verify(cache, jwks_server.id_token(sub="google123"))
+        assert claims["sub"] == "google123"
+    assert jwks_server.hits == 1
+
+
+def test_expired_key_set_is_refetched(jwks_server):
+    jwks_server.cache_control = "max-age=0"
+    cache = JWKSCache(jwks_server.url, min_refetch_interval=0)
+    verify(cache, jwks_server.id_token())
+    verify(cache, jwks_server.id_token())
+    assert jwks_server.hits == 2
+
+
+def test_unknown_kid_triggers_single_refetch(jwks_server):
+    cache = JWKSCache(jwks_server.url, min_refetch_interval=0)
+    verify(cache, jwks_server.id_token())
+    jwks_server.add_key("key-2")
+    jwks_server.delay = 0.2
+
+    async def verify_many():
+        token = jwks_server.id_token(kid="key-2", sub="rotated")
+        return await asyncio.gather(*(cache.verify(token, audience="test_client_id") for _ in range(10)))
+
+    results = asyncio.run(verify_many())
+    assert all(claims["sub"] == "rotated" for claims in results)
+    assert jwks_server.hits == 2
+
+
+def test_unknown_kid_refetch_is_rate_limited(jwks_server):
+    cache = JWKSCache(jwks_server.url, min_refetch_interval=3600)
+    verify(cache, jwks_server.id_token())
+    jwks_server.add_key("key-2")
+    with pytest.raises(JWTError, match="Unknown signing key"):
+        verify(cache, jwks_server.id_token(kid="key-2"))
+    assert jwks_server.hits == 1
+
+
+def test_stale_keys_served_when_refresh_fails(jwks_server):
+    cache = JWKSCache(jwks_server.url, min_refetch_interval=0)
+    verify(cache, jwks_server.id_token())
+    cache._expires_at = 0
+    token = jwks_server.id_token(sub="still-valid")
+    jwks_server.close()
+    assert verify(cache, token)["sub"] == "still-valid"
+
+
+def test_rejects_wrong_audience_and_issuer(jwks_server):
+    cache = JWKSCache(jwks_server.url)
+    with pytest.raises(JWTError, match="audience"):
+        verify(cache, jwks_server.id_token(audience="someone-else"))
+    with pytest.raises(JWTError, match="issuer"):
+        verify(cache, jwks_server.id_token(iss="https://evil.example.com"))
+
+
+def test_app_startup_warms_the_key_set(jwks_server, monkeypatch):
+    from fastapi.testclient import TestClient
+    from demo_auth_svc import config
+    from demo_auth_svc.app import app
+    import demo_auth_svc.routers.google_auth as google_auth
+
+    cache = JWKSCache(jwks_server.url)
+    monkeypatch.setattr(google_auth, "google_jwks", cache)
+    monkeypatch.setattr(config, "GOOGLE_JWKS_PREFETCH", True)
+    with TestClient(app):
+        assert cache.loaded
+        assert jwks_server.hits == 1
+
+
+def test_periodic_refresh_waits_at_least_min_refetch_interval(jwks_server, monkeypatch):
+    import demo_auth_svc.jwks as jwks
+
+    jwks_server.cache_control = "no-store"
+    cache = JWKSCache(jwks_server.url, min_refetch_interval=30)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            raise asyncio.CancelledError
+
+    async def run():
+        await cache.warm_up()
+        monkeypatch.setattr(jwks.asyncio, "sleep", fake_sleep)
+        with pytest.raises(asyncio.CancelledError):
+            await cache.refresh_periodically()
+
+    asyncio.run(run())
+    assert sleeps and min(sleeps) >= 30
+    assert jwks_server.hits == 3
@@ -0,0 +1,139 @@
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+import jwt_module
+from jwt_module import JWTError, KeyRing, SigningKey
+
+
+def pem_pair(algorithm):
+    if algorithm == "RS256":
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                        serialization.NoEncryption())
+    public_pem = private.public_key().public_bytes(serialization.Encoding.PEM,
+                                                   serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem, public_pem
+
+
+def hs256_ring(**kwargs):
+    return KeyRing(SigningKey.from_secret("k1", b"secret"), issuer="test", **kwargs)
+
+
+def test_hs256_round_trip():
+    ring = hs256_ring()
+    token = ring.sign({"sub": "abc", "iss": "test", "exp": time.time() + 60})
+    assert ring.verify(token)["sub"] == "abc"
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256"])
+def test_asymmetric_round_trip_with_public_key_only(algorithm):
+    private_pem, public_pem = pem_pair(algorithm)
+    signer = KeyRing(SigningKey.from_pem("k1", algorithm, private_pem))
+    token = signer.sign({"sub": "abc"})
+
+    verifier = KeyRing(None)
+    verifier.add_key(SigningKey.from_pem("k1", algorithm, public_pem))
+    assert verifier.verify(token)["sub"] == "abc"
+
+
+def test_tampered_payload_rejected():
+    ring = hs256_ring()
+    header, _, signature = ring.sign({"sub": "abc", "iss": "test"}).split(".")
+    forged = jwt_module._b64encode(b'{"sub":"admin","iss":"test"}')
+    with pytest.raises(JWTError):
+        ring.verify(f"{header}.{forged}.{signature}")
+
+
+def test_expired_token_rejected():
+    ring = hs256_ring()
+    token = ring.sign({"sub": "abc", "iss": "test", "exp": time.time() - 10})
+    with pytest.raises(JWTError, match="expired"):
+        ring.verify(token)
+
+
+def test_algorithm_is_pinned_by_key():
+    ring = hs256_ring()
+    header = jwt_module._b64encode(b'{"alg":"none","kid":"k1"}')
+    payload = jwt_module._b64encode(b'{"sub":"abc","iss":"test"}')
+    with pytest.raises(JWTError, match="Algorithm mismatch"):
+        ring.verify(f"{header}.{payload}.")
+
+
+def test_non_string_kid_rejected():
+    header = jwt_module._b64encode(b'{"alg":"HS256","kid":{"a":1}}')
+    payload = jwt_module._b64encode(b'{"sub":"abc"}')
+    with pytest.raises(JWTError, match="Malformed"):
+        hs256_ring().verify(f"{header}.{payload}.")
+    with pytest.raises(JWTError, match="Malformed"):
+        jwt_module.get_unverified_header(f"{header}.{payload}.")
+
+
+@pytest.mark.parametrize("claim", ["exp", "nbf"])
+def test_non_numeric_time_claims_rejected(claim):
+    ring = hs256_ring()
+    for value in ("soon", True, [1]):
+        with pytest.raises(JWTError, match="Malformed"):
+            ring.verify(ring.sign({"sub": "abc", "iss": "test", claim: value}))
+
+
+def test_unknown_kid_rejected():
+    token = KeyRing(SigningKey.from_secret("other", b"secret")).sign({"sub": "abc"})
+    ring = hs256_ring()
+    ring.add_key(SigningKey.from_secret("k2", b"another"))
+    with pytest.raises(JWTError, match="Unknown signing key"):
+        ring.verify(token)
+
+
+def test_verified_tokens_skip_signature_check(monkeypatch):
+    ring = hs256_ring()
+    token = ring.sign({"sub": "abc", "iss": "test", "exp": time.time() + 60})
+    calls = []
+    original = SigningKey.verify
+
+    def counting_verify(self, signing_input, signature):
+        calls.append(signing_input)
+        return original(self, signing_input, signature)
+
+    monkeypatch.setattr(SigningKey, "verify", counting_verify)
+    for _ in range(5):
+        ring.verify(token)
+    assert len(calls) == 1
+
+
+def test_cached_token_still_expires(monkeypatch):
+    ring = hs256_ring()
+    token = ring.sign({"sub": "abc", "iss": "test", "exp": time.time() + 60})
+    ring.verify(token)
+    monkeypatch.setattr(time, "time", lambda: 10 ** 12)
+    with pytest.raises(JWTError, match="expired"):
+        ring.verify(token)
+
+
+def test_verified_cache_is_bounded():
+    ring = hs256_ring(cache_size=2)
+    for i in range(5):
+        ring.verify(ring.sign({"sub": str(i), "iss": "test"}))
+    assert len(ring._verified) == 2
+
+
+def test_removing_key_invalidates_cached_tokens():
+    ring = hs256_ring()
+    token = ring.sign({"sub": "abc", "iss": "test"})
+    ring.verify(token)
+    ring.remove_key("k1")
+    with pytest.raises(JWTError):
+        ring.verify(token)
+
+
+def test_create_token_round_trip(monkeypatch):
+    monkeypatch.setattr(jwt_module, "_keyring", hs256_ring(ttl_seconds=60))
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    claims = jwt_module.verify_token(token)
+    assert claims["sub"] == "google123"
+    assert claims["email"] == "user@example.com"
+    assert claims["exp"] - claims["iat"] == 60
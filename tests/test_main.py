@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from demo_auth_svc import config, main
+from demo_auth_svc.app import app
+
+
+def test_app_debug_is_off_by_default():
+    assert app.debug is False
+
+
+def test_worker_count_defaults_to_available_cores(monkeypatch):
+    monkeypatch.setattr(config, "SERVICE_WORKERS", 0)
+    assert main.worker_count() == main.available_cores() >= 1
+    monkeypatch.setattr(config, "SERVICE_WORKERS", 3)
+    assert main.worker_count() == 3
+
+
+def test_server_options_follow_config(monkeypatch):
+    monkeypatch.setattr(config, "SERVICE_LOOP", "asyncio")
+    monkeypatch.setattr(config, "SERVICE_HTTP", "auto")
+    monkeypatch.setattr(main.importlib.util, "find_spec", lambda name: None)
+    options = main.server_options(4)
+    assert options["workers"] == 4
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+    assert options["timeout_keep_alive"] == config.SERVICE_KEEPALIVE_SECONDS
+    assert options["backlog"] == config.SERVICE_BACKLOG
+    assert options["timeout_graceful_shutdown"] == config.SERVICE_GRACEFUL_SHUTDOWN_SECONDS
+
+
+def test_server_options_prefer_uvloop_and_httptools(monkeypatch):
+    monkeypatch.setattr(config, "SERVICE_LOOP", "auto")
+    monkeypatch.setattr(config, "SERVICE_HTTP", "auto")
+    monkeypatch.setattr(main.importlib.util, "find_spec", lambda name: object())
+    options = main.server_options(1)
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+
+
+def test_multiple_workers_need_a_shared_jwt_secret(monkeypatch):
+    monkeypatch.setattr(config, "JWT_ALGORITHM", "HS256")
+    monkeypatch.setattr(config, "JWT_SECRET", None)
+    assert main.prepare_workers(1) is None
+    with pytest.raises(SystemExit, match="JWT_SECRET"):
+        main.prepare_workers(2)
+
+
+def test_multiple_workers_share_a_metrics_directory(monkeypatch):
+    monkeypatch.setattr(config, "JWT_SECRET", "secret")
+    monkeypatch.setattr(config, "RESPONSE_CACHE_BACKEND", "redis")
+    monkeypatch.setattr(config, "POST_CACHE_BACKEND", "redis")
+    # Empty counts as unset; setenv makes monkeypatch restore the variable afterwards.
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    directory = main.prepare_workers(2)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == directory
+    assert os.path.isdir(directory) and not os.listdir(directory)
+    os.rmdir(directory)
+
+
+@pytest.mark.parametrize("setting", ["RESPONSE_CACHE_BACKEND", "POST_CACHE_BACKEND"])
+def test_multiple_workers_disable_per_process_caches(monkeypatch, setting):
+    monkeypatch.setattr(config, "JWT_SECRET", "secret")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/unused")
+    for name in ("RESPONSE_CACHE_BACKEND", "POST_CACHE_BACKEND"):
+        monkeypatch.setenv(name, "redis")
+        monkeypatch.setattr(config, name, "redis")
+    monkeypatch.setenv(setting, "memory")
+    monkeypatch.setattr(config, setting, "memory")
+    main.prepare_workers(1)
+    assert os.environ[setting] == "memory"
+    main.prepare_workers(2)
+    assert os.environ[setting] == "none"
+
+    monkeypatch.setenv(setting, "redis")
+    monkeypatch.setattr(config, setting, "redis")
+    main.prepare_workers(2)
+    assert os.environ[setting] == "redis"
+
+
+def test_main_runs_the_app_by_import_string(monkeypatch):
+    calls = []
+    monkeypatch.setattr(config, "SERVICE_WORKERS", 1)
+    monkeypatch.setattr(main.uvicorn, "run", lambda app, **options: calls.append((app, options)))
+    main.main()
+    assert calls == [("demo_auth_svc.app:app", main.server_options(1))]
@@ -5,6 +5,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from demo_auth_svc.app import app
+from demo_auth_svc.models.calendar_job import CalendarJob
 from demo_auth_svc.models.meeting import Meeting
 
 
@@ -107,3 +108,104 @@ def test_get_meetings_by_user(client_instance, db_session):
     assert 'Room 1' in meeting_locations
     assert 'Room 2' in meeting_locations
 
+
+
+# Test retrieving meetings by participant email
+def test_get_meetings_by_participant(client_instance, db_session):
+    payload = [
+        {"meeting_time": "2023-10-26T11:00:00", "location": "Room 2",
+         "participants": ["Alice@Example.com", "bob@example.com"], "oauth_token": "token"},
+        {"meeting_time": "2023-10-26T09:00:00", "location": "Room 1",
+         "participants": ["alice@example.com"], "oauth_token": "token"},
+        {"meeting_time": "2023-10-26T10:00:00", "location": "Room 3",
+         "participants": ["carol@example.com"], "oauth_token": "token"},
+    ]
+    response = client_instance.post("/meetings/batch", json=payload)
+    assert response.status_code == 202, response.text
+
+    response = client_instance.get("/meetings/participant/ALICE@example.com")
+    assert response.status_code == 200, response.text
+    assert [m.get('location') for m in response.json()] == ['Room 1', 'Room 2']
+    assert client_instance.get("/meetings/participant/nobody@example.com").json() == []
+
+
+# Test that updating and deleting a meeting keeps the participant index in step
+def test_participant_index_follows_update_and_delete(client_instance, db_session):
+    payload = {"meeting_time": "2023-10-26T09:00:00", "location": "Room 1",
+               "participants": ["alice@example.com"], "oauth_token": "token"}
+    meeting_id = client_instance.post("/meetings", json=payload).json()["meeting_id"]
+    assert len(client_instance.get("/meetings/participant/alice@example.com").json()) == 1
+
+    response = client_instance.put(f"/meetings/{meeting_id}", json={"participants": ["dave@example.com"]})
+    assert response.status_code == 200, response.text
+    assert client_instance.get("/meetings/participant/alice@example.com").json() == []
+    assert [m.get('meeting_id') for m in client_instance.get("/meetings/participant/dave@example.com").json()] == [meeting_id]
+
+    client_instance.delete(f"/meetings/{meeting_id}")
+    assert client_instance.get("/meetings/participant/dave@example.com").json() == []
+
+
+# Test the time window filters on meetings by user
+def test_get_meetings_by_user_time_window(client_instance, db_session):
+    for day in range(20, 30):
+        create_meeting_in_db(db_session, user_id=7, meeting_time_str=f'2023-10-{day}T10:00:00', location=f'Day {day}')
+    create_meeting_in_db(db_session, user_id=8, meeting_time_str='2023-10-23T10:00:00', location='Other user')
+
+    response = client_instance.get("/meetings/user/7", params={"from": "2023-10-23T00:00:00", "to": "2023-10-27T00:00:00"})
+    assert response.status_code == 200, response.text
+    assert [m.get('location') for m in response.json()] == ['Day 23', 'Day 24', 'Day 25', 'Day 26']
+    assert "X-Next-Cursor" not in response.headers
+
+
+# Test cursor pagination of meetings by user
+def test_get_meetings_by_user_cursor_pagination(client_instance, db_session):
+    # Two meetings share a time, so the cursor must break ties on meeting_id.
+    for time_str in ['2023-10-26T09:00:00', '2023-10-26T10:00:00', '2023-10-26T10:00:00',
+                     '2023-10-26T11:00:00', '2023-10-26T12:00:00']:
+        create_meeting_in_db(db_session, user_id=9, meeting_time_str=time_str)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client_instance.get("/meetings/user/9", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(m.get('meeting_id') for m in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_get_meetings_by_user_invalid_cursor(client_instance):
+    response = client_instance.get("/meetings/user/1", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+# Test that an update reports the calendar job of the updated meeting, not another one
+def test_update_meeting_returns_own_calendar_job(client_instance, db_session):
+    first = create_meeting_in_db(db_session, location='Room 1')
+    second = create_meeting_in_db(db_session, location='Room 2')
+    db_session.add_all([
+        CalendarJob(meeting_id=first.meeting_id, status="failed", last_error="boom"),
+        CalendarJob(meeting_id=second.meeting_id, status="succeeded", event_id="evt-2"),
+    ])
+    db_session.commit()
+
+    response = client_instance.put(f"/meetings/{second.meeting_id}", json={"location": "Room 2b"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["location"] == "Room 2b"
+    assert data["calendar_status"] == "succeeded"
+    assert data["calendar_event_id"] == "evt-2"
+    assert data["calendar_error"] is None
+
+
+def test_update_and_delete_missing_meeting(client_instance):
+    assert client_instance.put("/meetings/9999", json={"location": "Nowhere"}).status_code == 404
+    assert client_instance.put("/meetings/9999", json={}).status_code == 404
+    assert client_instance.delete("/meetings/9999").status_code == 404
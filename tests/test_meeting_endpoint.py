@@ -1,10 +1,16 @@
+import asyncio
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
+from cryptography.fernet import Fernet
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text
 
+from demo_auth_svc import credentials
 from demo_auth_svc.app import app
+from demo_auth_svc.calendar_worker import CalendarJobWorker, utcnow
+from demo_auth_svc.models.calendar_job import CalendarJob
 
 
 # Use the existing client fixture from conftest.py
@@ -17,7 +23,7 @@ def client_instance(client):
 # Fixture to simulate successful Google Calendar integration
 @pytest.fixture
 def dummy_success(monkeypatch):
-    def dummy_add_google_calendar_event(meeting_time, location, participants, oauth_token):
+    async def dummy_add_google_calendar_event(meeting_time, location, participants, oauth_token):
         return {"success": True, "response": {"id": "dummy_event_id", "status": "confirmed"}}
     monkeypatch.setattr(
         "demo_auth_svc.google_calendar_integration.add_google_calendar_event",
@@ -28,15 +34,19 @@ def dummy_success(monkeypatch):
 # Fixture to simulate failure in Google Calendar integration
 @pytest.fixture
 def dummy_failure(monkeypatch):
-    def dummy_add_google_calendar_event(meeting_time, location, participants, oauth_token):
-        return {"success": False, "message": "Failed to create event"}
+    async def dummy_add_google_calendar_event(meeting_time, location, participants, oauth_token):
+        return {"success": False, "message": "Failed to create event", "retryable": False}
     monkeypatch.setattr(
         "demo_auth_svc.google_calendar_integration.add_google_calendar_event",
         dummy_add_google_calendar_event
     )
 
 
-def test_create_meeting_success(client_instance, dummy_success):
+def run_worker(session_factory, **kwargs):
+    return asyncio.run(CalendarJobWorker(session_factory=session_factory, **kwargs).run_once())
+
+
+def test_create_meeting_success(client_instance, dummy_success, async_session_local):
     payload = {
         "meeting_time": "2023-10-26T15:30:00",
         "location": "Conference Room A",
@@ -44,13 +54,18 @@ def test_create_meeting_success(client_instance, dummy_success):
         "oauth_token": "valid_token"
     }
     response = client_instance.post("/meetings", json=payload)
-    assert response.status_code == 200
+    assert response.status_code == 202
     data = response.json()
-    assert data.get("id") == "dummy_event_id"
-    assert data.get("status") == "confirmed"
+    assert data.get("calendar_status") == "pending"
+    assert data.get("calendar_event_id") is None
 
+    assert run_worker(async_session_local) == 1
+    data = client_instance.get(f"/meetings/{data['meeting_id']}").json()
+    assert data.get("calendar_status") == "succeeded"
+    assert data.get("calendar_event_id") == "dummy_event_id"
 
-def test_create_meeting_failure(client_instance, dummy_failure):
+
+def test_create_meeting_failure(client_instance, dummy_failure, async_session_local):
     payload = {
         "meeting_time": "2023-10-26T16:00:00",
         "location": "Conference Room B",
@@ -58,9 +73,74 @@ def test_create_meeting_failure(client_instance, dummy_failure):
         "oauth_token": "invalid_token"
     }
     response = client_instance.post("/meetings", json=payload)
-    assert response.status_code == 400
-    data = response.json()
-    assert "Failed to create event" in data.get("detail")
+    # The meeting is accepted before Google is contacted; the failure lands on the job.
+    assert response.status_code == 202
+    meeting_id = response.json()["meeting_id"]
+
+    assert run_worker(async_session_local) == 1
+    data = client_instance.get(f"/meetings/{meeting_id}").json()
+    assert data.get("calendar_status") == "failed"
+    assert "Failed to create event" in data.get("calendar_error")
+    # Final jobs do not keep the user's token around.
+    assert run_worker(async_session_local) == 0
+
+
+def test_create_meeting_retryable_failure_is_requeued(client_instance, monkeypatch, db_session, async_session_local):
+    async def flaky_add_google_calendar_event(meeting_time, location, participants, oauth_token):
+        return {"success": False, "message": "503 Service Unavailable", "retryable": True}
+    monkeypatch.setattr(
+        "demo_auth_svc.google_calendar_integration.add_google_calendar_event",
+        flaky_add_google_calendar_event
+    )
+    payload = {
+        "meeting_time": "2023-10-26T16:00:00",
+        "location": "Conference Room B",
+        "participants": ["user3@example.com"],
+        "oauth_token": "valid_token"
+    }
+    meeting_id = client_instance.post("/meetings", json=payload).json()["meeting_id"]
+
+    assert run_worker(async_session_local, retry_delay=60, max_attempts=2) == 1
+    job = db_session.query(CalendarJob).filter_by(meeting_id=meeting_id).one()
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert job.available_at > utcnow()
+    # Not due yet.
+    assert run_worker(async_session_local, max_attempts=2) == 0
+
+    job.available_at = utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert run_worker(async_session_local, max_attempts=2) == 1
+    data = client_instance.get(f"/meetings/{meeting_id}").json()
+    assert data.get("calendar_status") == "failed"
+    assert "503" in data.get("calendar_error")
+
+
+def test_orphaned_running_job_is_reclaimed(client_instance, dummy_success, db_session, async_session_local):
+    payload = {
+        "meeting_time": "2023-10-26T15:30:00",
+        "location": "Conference Room A",
+        "participants": ["user1@example.com"],
+        "oauth_token": "valid_token"
+    }
+    meeting_id = client_instance.post("/meetings", json=payload).json()["meeting_id"]
+    job = db_session.query(CalendarJob).filter_by(meeting_id=meeting_id).one()
+    job.status = "running"
+    job.updated_at = utcnow()
+    db_session.commit()
+
+    # Still leased to another worker.
+    assert run_worker(async_session_local, lease_seconds=300) == 0
+
+    job.updated_at = utcnow() - timedelta(seconds=600)
+    db_session.commit()
+    assert run_worker(async_session_local, lease_seconds=300) == 1
+    assert client_instance.get(f"/meetings/{meeting_id}").json().get("calendar_status") == "succeeded"
+
+
+def test_get_meeting_not_found(client_instance):
+    response = client_instance.get("/meetings/9999")
+    assert response.status_code == 404
 
 
 def test_create_meeting_invalid_input(client_instance):
@@ -72,3 +152,112 @@ def test_create_meeting_invalid_input(client_instance):
     }
     response = client_instance.post("/meetings", json=payload)
     assert response.status_code == 422  # Unprocessable Entity due to validation error
+
+
+def test_create_meetings_batch_reports_per_item(client_instance, monkeypatch, db_session, async_session_local):
+    calls = []
+
+    async def dummy_add_google_calendar_events_batch(meetings, oauth_token):
+        calls.append((len(meetings), oauth_token))
+        return [{"success": True, "response": {"id": f"event_{m['location']}"}} for m in meetings]
+    monkeypatch.setattr(
+        "demo_auth_svc.google_calendar_integration.add_google_calendar_events_batch",
+        dummy_add_google_calendar_events_batch
+    )
+    payload = [
+        {"meeting_time": "2023-10-26T09:00:00", "location": "A", "participants": ["a@example.com"],
+         "oauth_token": "token"},
+        {"meeting_time": "2023-10-26T10:00:00", "location": "B", "participants": ["not-an-email"],
+         "oauth_token": "token"},
+        {"meeting_time": "2023-10-26T11:00:00", "location": "C", "participants": ["c@example.com"]},
+        {"meeting_time": "2023-10-26 12:00 PM", "location": "D", "participants": ["d@example.com"],
+         "oauth_token": "token"},
+    ]
+    response = client_instance.post("/meetings/batch", json=payload)
+    assert response.status_code == 202, response.text
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["failed"] == 2
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[1]["error"] == "Invalid email: not-an-email"
+    assert "oauth_token" in results[2]["error"]
+    assert results[0]["calendar_status"] == "pending"
+    assert db_session.query(CalendarJob).count() == 2
+
+    # Both jobs share a token, so the worker sends them in one batch.
+    assert run_worker(async_session_local) == 2
+    assert calls == [(2, "token")]
+    meeting = client_instance.get(f"/meetings/{results[3]['meeting_id']}").json()
+    assert meeting["location"] == "D"
+    assert meeting["calendar_status"] == "succeeded"
+    assert meeting["calendar_event_id"] == "event_D"
+
+
+def test_create_meetings_batch_inserts_meetings_in_one_statement(client_instance, async_session_local):
+    statements = []
+    event.listen(async_session_local.kw["bind"].sync_engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+    payload = [{"meeting_time": "2023-10-26T09:00:00", "location": f"Room {i}",
+                "participants": [f"p{i}@example.com"], "oauth_token": "token"} for i in range(200)]
+
+    response = client_instance.post("/meetings/batch", json=payload)
+    assert response.status_code == 202, response.text
+    assert len([s for s in statements if s.startswith("INSERT INTO meetings ")]) == 1
+    results = response.json()["results"]
+    meeting = client_instance.get(f"/meetings/{results[137]['meeting_id']}").json()
+    assert meeting["location"] == "Room 137"
+
+
+def test_create_meetings_batch_rejects_empty(client_instance):
+    response = client_instance.post("/meetings/batch", json=[])
+    assert response.status_code == 400
+
+
+def queue_meeting(client_instance, oauth_token):
+    payload = {"meeting_time": "2023-10-26T09:00:00", "location": "A", "participants": ["a@example.com"],
+               "oauth_token": oauth_token}
+    response = client_instance.post("/meetings", json=payload)
+    assert response.status_code in (200, 201, 202), response.text
+    return response.json()
+
+
+def fake_batch_insert(monkeypatch, calls):
+    async def dummy_add_google_calendar_events_batch(meetings, oauth_token):
+        calls.append(oauth_token)
+        return [{"success": True, "response": {"id": "event"}} for _ in meetings]
+    monkeypatch.setattr("demo_auth_svc.google_calendar_integration.add_google_calendar_events_batch",
+                        dummy_add_google_calendar_events_batch)
+
+
+def test_queued_oauth_tokens_are_encrypted_at_rest(client_instance, monkeypatch, db_session, async_session_local):
+    calls = []
+    fake_batch_insert(monkeypatch, calls)
+    queue_meeting(client_instance, "ya29.secret-token")
+
+    stored = db_session.execute(text("SELECT oauth_token FROM calendar_jobs")).scalar()
+    assert stored and "secret-token" not in stored
+    assert run_worker(async_session_local) == 1
+    assert calls == ["ya29.secret-token"]
+    assert db_session.execute(text("SELECT oauth_token FROM calendar_jobs")).scalar() is None
+
+
+def test_undecryptable_oauth_token_fails_the_job(client_instance, monkeypatch, db_session, async_session_local):
+    calls = []
+    fake_batch_insert(monkeypatch, calls)
+    queue_meeting(client_instance, "ya29.secret-token")
+    # The key the token was written with is no longer configured.
+    monkeypatch.setattr(credentials, "_cipher", credentials.TokenCipher([Fernet.generate_key()]))
+
+    assert run_worker(async_session_local) == 1
+    assert calls == []
+    job = db_session.query(CalendarJob).one()
+    assert (job.status, job.last_error) == ("failed", "OAuth token unavailable")
+
+
+def test_token_cipher_decrypts_with_rotated_keys():
+    old, new = Fernet.generate_key(), Fernet.generate_key()
+    ciphertext = credentials.TokenCipher([old]).encrypt("token")
+    assert credentials.TokenCipher([new, old]).decrypt(ciphertext) == "token"
+    assert credentials.TokenCipher([new]).decrypt(ciphertext) is None
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import httpx
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from demo_auth_svc import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_metrics_use_route_template(client):
+    before = sample("http_requests_total", method="GET", route="/meetings/{meeting_id}", status="404")
+    response = client.get("/meetings/424242")
+    assert response.status_code == 404
+    assert sample("http_requests_total", method="GET", route="/meetings/{meeting_id}", status="404") == before + 1
+    assert sample("http_request_duration_seconds_count", method="GET", route="/meetings/{meeting_id}") >= 1
+    assert sample("http_requests_in_flight", method="GET") == 0
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = sample("http_requests_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="404")
+    client.get("/no/such/path")
+    client.get("/another/missing/path")
+    assert sample("http_requests_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="404") == before + 2
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    client.get("/forum")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/forum"}' in body
+    assert 'cache_lookups_total{cache="forum_pages",result="miss"}' in body
+    assert 'retrier_calls_total{retrier="google_calendar"}' in body
+    assert "db_pool_size" in body
+
+
+def test_instrument_engine_counts_queries_and_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'metrics.db'}"
+    engine = create_engine(url)
+    metrics.instrument_engine(engine, "test_engine")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+        conn.execute(text("SELECT x FROM t"))
+        assert sample("db_pool_checked_out", engine="test_engine") == 1
+    assert sample("db_queries_total", engine="test_engine", operation="SELECT") == 1
+    assert sample("db_queries_total", engine="test_engine", operation="INSERT") == 1
+    assert sample("db_query_duration_seconds_count", engine="test_engine", operation="OTHER") == 1
+    assert sample("db_pool_checked_out", engine="test_engine") == 0
+    assert sample("db_pool_events_total", engine="test_engine", event="checkout") == 1
+    engine.dispose()
+
+
+def test_instrumented_transport_times_google_calls(monkeypatch):
+    async def fake_send(self, request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={})
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", fake_send)
+
+    async def call():
+        async with httpx.AsyncClient(transport=metrics.InstrumentedTransport()) as client:
+            await client.get("https://metrics-test.example/calendar")
+            try:
+                await client.get("https://metrics-test.example/down")
+            except httpx.ConnectError:
+                pass
+
+    labels = {"host": "metrics-test.example", "method": "GET"}
+    before = sample("google_http_request_duration_seconds_count", status="200", **labels)
+    errors = sample("google_http_errors_total", **labels)
+    asyncio.run(call())
+    assert sample("google_http_request_duration_seconds_count", status="200", **labels) == before + 1
+    assert sample("google_http_errors_total", **labels) == errors + 1
+
+
+def test_multiprocess_mode_aggregates_workers(tmp_path):
+    # prometheus_client picks its value store at import, so each worker is a fresh interpreter.
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": "src"}
+    worker = textwrap.dedent("""
+        from demo_auth_svc import metrics
+        metrics.HTTP_REQUESTS.labels("GET", "/forum", "200").inc(3)
+    """)
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    scrape = textwrap.dedent("""
+        from prometheus_client import generate_latest
+        from demo_auth_svc import metrics
+        print(generate_latest(metrics.build_registry()).decode())
+    """)
+    output = subprocess.run([sys.executable, "-c", scrape], env=env, check=True, capture_output=True,
+                            text=True).stdout
+    assert 'http_requests_total{method="GET",route="/forum",status="200"} 6.0' in output
@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+
+from demo_auth_svc import config, query_log
+from tests.test_forum_router import auth_header
+
+
+@pytest.fixture
+def query_logging(monkeypatch, session_local, async_session_local):
+    monkeypatch.setattr(config, "QUERY_LOG_ENABLED", True)
+    query_log.instrument_engine(session_local.kw["bind"])
+    query_log.instrument_engine(async_session_local.kw["bind"].sync_engine)
+
+
+def create_post(client, content="hello"):
+    response = client.post("/forum", json={"user_id": 1, "content": content}, headers=auth_header())
+    assert response.status_code == 201
+    return response.json()["post_id"]
+
+
+def test_slow_queries_are_logged_with_route(client, query_logging, monkeypatch, caplog):
+    monkeypatch.setattr(config, "QUERY_LOG_SLOW_MS", 0)
+    with caplog.at_level(logging.WARNING):
+        client.get("/meetings/1")
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Slow query")]
+    assert slow
+    assert "in GET /meetings/{meeting_id}: SELECT" in slow[0]
+
+
+def test_fast_queries_are_not_logged(client, query_logging, caplog):
+    with caplog.at_level(logging.WARNING):
+        client.get("/meetings/1")
+    assert not [r for r in caplog.records if r.getMessage().startswith("Slow query")]
+
+
+def test_repeated_statements_are_flagged(monkeypatch, caplog):
+    monkeypatch.setattr(config, "QUERY_LOG_REPEAT_THRESHOLD", 3)
+    stats = query_log.QueryStats()
+    for _ in range(3):
+        stats.record("SELECT * FROM users WHERE id = ?")
+    stats.record("SELECT * FROM forum_posts")
+    with caplog.at_level(logging.WARNING):
+        query_log.report(stats)
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == ["Possible N+1 in <no request>: 3 executions of SELECT * FROM users WHERE id = ?"]
+
+
+def test_strict_mode_fails_requests_over_the_limit(client, query_logging, monkeypatch):
+    monkeypatch.setattr(config, "QUERY_LOG_MAX_QUERIES", 1)
+    monkeypatch.setattr(config, "QUERY_LOG_STRICT", True)
+    client.get("/meetings/1")
+    with pytest.raises(query_log.QueryBudgetExceeded, match=r"POST /forum ran \d+ queries \(limit 1\)"):
+        create_post(client)
+
+
+def test_disabled_query_log_counts_nothing(client, session_local, monkeypatch):
+    query_log.instrument_engine(session_local.kw["bind"])
+    monkeypatch.setattr(config, "QUERY_LOG_MAX_QUERIES", 1)
+    monkeypatch.setattr(config, "QUERY_LOG_STRICT", True)
+    create_post(client)
+
+
+def test_post_reads_stay_within_query_budget(client, query_logging):
+    post_id = create_post(client)
+    with query_log.assert_max_queries(1):
+        assert client.get(f"/forum/{post_id}", headers=auth_header()).status_code == 200
+    # Served from the post cache.
+    with query_log.assert_max_queries(0):
+        assert client.get(f"/forum/{post_id}", headers=auth_header()).status_code == 200
+    with query_log.assert_max_queries(2):
+        assert client.delete(f"/forum/{post_id}", headers=auth_header()).status_code == 204
+
+
+def test_assert_max_queries_lists_statements(client, query_logging):
+    with pytest.raises(query_log.QueryBudgetExceeded) as excinfo:
+        with query_log.assert_max_queries(0):
+            client.get("/meetings/1")
+    assert "Expected at most 0 queries, ran 1" in str(excinfo.value)
+    assert "1 x SELECT" in str(excinfo.value)
@@ -0,0 +1,230 @@
+import asyncio
+
+from fastapi import status
+from sqlalchemy import event
+
+import jwt_module
+from demo_auth_svc.cache import CacheBackend, MemoryCache, ObjectCache, RedisCache, ResponseCache, etag_matches, strong_etag
+
+
+def auth_header():
+    token = jwt_module.create_token({"google_id": "google123", "email": "user@example.com"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FakeRedis:
+    """The slice of the redis.asyncio client API used by RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+        return int(self.data[key])
+
+    async def eval(self, script, numkeys, counter_key, key, expected, value, px):
+        # SET_IF_COUNTER_SCRIPT, which Redis runs as one step.
+        if int(self.data.get(counter_key, b"0")) != int(expected):
+            return 0
+        self.data[key] = value
+        return 1
+
+
+class UnreachableCache(CacheBackend):
+    """A backend whose server is down."""
+
+    async def get(self, key, *args, **kwargs):
+        raise ConnectionError("cache is down")
+
+    set = delete = incr = counter = set_if_counter = get
+
+
+def count_queries(async_session_local):
+    statements = []
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_memory_cache_lru_and_ttl():
+    now = [0.0]
+    memory = MemoryCache(max_entries=2, default_ttl=10, clock=lambda: now[0])
+    memory.set_sync("a", b"1")
+    memory.set_sync("b", b"2")
+    assert memory.get_sync("a") == b"1"
+    memory.set_sync("c", b"3")  # evicts b, the least recently used
+    assert memory.get_sync("b") is None
+    assert memory.evictions == 1
+    now[0] = 11
+    assert memory.get_sync("a") is None
+    assert memory.snapshot()["hits"] == 1
+
+
+def test_memory_cache_counters_survive_eviction():
+    memory = MemoryCache(max_entries=1)
+    assert asyncio.run(memory.incr("forum:version")) == 1
+    memory.set_sync("x", b"1")
+    memory.set_sync("y", b"2")
+    assert asyncio.run(memory.get("forum:version")) == b"1"
+
+
+def test_etag_matching():
+    etag = strong_etag(b"body")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_response_cache_on_redis_compatible_backend():
+    async def scenario():
+        response_cache = ResponseCache(RedisCache(client=FakeRedis()), "forum")
+        key = await response_cache.key({"page": 1})
+        assert await response_cache.get(key) is None
+        etag = await response_cache.set(key, b'{"data":[]}')
+        assert await response_cache.get(key) == (etag, b'{"data":[]}')
+        await response_cache.invalidate()
+        assert await response_cache.key({"page": 1}) != key
+    asyncio.run(scenario())
+
+
+def test_object_cache_invalidation_reaches_every_process():
+    async def scenario():
+        shared = FakeRedis()
+        # Two workers, each with its own client to the same server.
+        first, second = (ObjectCache(RedisCache(client=shared), "post", ttl=60) for _ in range(2))
+        assert await first.set(1, b"old", await first.epoch())
+        assert await second.get(1) == b"old"
+
+        await first.invalidate(1)
+        assert await second.get(1) is None
+
+        # A load that started before another worker's write is not stored.
+        epoch = await second.epoch()
+        await first.invalidate(1)
+        assert not await second.set(1, b"stale", epoch)
+        assert await first.get(1) is None
+
+    asyncio.run(scenario())
+
+
+class InterleavingBackend(MemoryCache):
+    """Runs `between` just before each store, as a write in another worker might."""
+
+    def __init__(self):
+        super().__init__()
+        self.between = None
+
+    async def set(self, key, value, ttl=None):
+        if self.between is not None:
+            await self.between()
+        await super().set(key, value, ttl)
+
+    set_if_counter = CacheBackend.set_if_counter
+
+
+def test_object_cache_store_racing_an_invalidation_is_not_kept():
+    async def scenario():
+        backend = InterleavingBackend()
+        reader, writer = ObjectCache(backend, "post"), ObjectCache(backend, "post")
+        epoch = await reader.epoch()
+        # The writer invalidates after the reader's epoch check but before its store.
+        backend.between = lambda: writer.invalidate(1)
+        assert not await reader.set(1, b"stale", epoch)
+        backend.between = None
+        assert await reader.get(1) is None
+
+    asyncio.run(scenario())
+
+
+def test_forum_list_served_from_cache_and_revalidated(client, db_session, async_session_local):
+    headers = auth_header()
+    client.post("/forum", json={"user_id": 1, "content": "first"}, headers=headers)
+    statements = count_queries(async_session_local)
+
+    first = client.get("/forum", headers=headers)
+    assert first.status_code == status.HTTP_200_OK
+    etag = first.headers["ETag"]
+    assert statements
+
+    statements.clear()
+    second = client.get("/forum", headers=headers)
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == etag
+    not_modified = client.get("/forum", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.content == b""
+    assert statements == []
+
+    # A different query is a different entry.
+    assert client.get("/forum", params={"page_size": 5}, headers=headers).headers["ETag"] != etag
+
+
+def test_forum_writes_invalidate_cached_pages(client, db_session):
+    headers = auth_header()
+    created = client.post("/forum", json={"user_id": 1, "content": "first"}, headers=headers).json()
+    etag = client.get("/forum", headers=headers).headers["ETag"]
+
+    client.put(f"/forum/{created['post_id']}", json={"content": "edited"}, headers=headers)
+    response = client.get("/forum", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"][0]["content"] == "edited"
+    etag = response.headers["ETag"]
+
+    client.post("/forum/bulk", json=[{"user_id": 1, "content": "bulk"}], headers=headers)
+    response = client.get("/forum", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == 2
+    etag = response.headers["ETag"]
+
+    client.delete(f"/forum/{created['post_id']}", headers=headers)
+    response = client.get("/forum", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == 1
+
+
+def test_forum_list_requires_token_even_when_cached(client):
+    client.get("/forum", headers=auth_header())
+    assert client.get("/forum").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_forum_survives_a_cache_outage(client, db_session, monkeypatch):
+    from demo_auth_svc.routers import forum
+
+    monkeypatch.setattr(forum, "forum_cache", ResponseCache(UnreachableCache(), "forum"))
+    headers = auth_header()
+    created = client.post("/forum", json={"user_id": 1, "content": "first"}, headers=headers)
+    assert created.status_code == status.HTTP_201_CREATED
+    post_id = created.json()["post_id"]
+    assert client.post("/forum/bulk", json=[{"user_id": 1, "content": "bulk"}], headers=headers).json()["inserted"] == 1
+    assert client.put(f"/forum/{post_id}", json={"content": "edited"}, headers=headers).status_code == 200
+    assert client.delete(f"/forum/{post_id}", headers=headers).status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/forum", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["content"] for post in response.json()["data"]] == ["bulk"]
+
+
+def test_forum_post_survives_a_post_cache_outage(client, db_session, monkeypatch):
+    from demo_auth_svc.routers import forum
+
+    monkeypatch.setattr(forum, "post_cache", ObjectCache(UnreachableCache(), "post"))
+    headers = auth_header()
+    post_id = client.post("/forum", json={"user_id": 1, "content": "first"}, headers=headers).json()["post_id"]
+    response = client.get(f"/forum/{post_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["content"] == "first"
+    assert client.put(f"/forum/{post_id}", json={"content": "edited"}, headers=headers).status_code == 200
+    assert client.delete(f"/forum/{post_id}", headers=headers).status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/forum/{post_id}", headers=headers).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+
+from demo_auth_svc.retry import CircuitBreaker, CircuitOpenError, Retrier, RetryBudget, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def scripted(*outcomes):
+    """An async request callable returning (or raising) the given outcomes in order."""
+    calls = []
+
+    async def request():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    request.calls = calls
+    return request
+
+
+def make_retrier(**kwargs):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    retrier = Retrier("test", sleep=sleep, rng=lambda: 1.0, **kwargs)
+    return retrier, delays
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_exponential_backoff_with_jitter_cap():
+    retrier, delays = make_retrier(max_attempts=4, base_delay=1.0, max_delay=3.0)
+    request = scripted(500, 502, 504, 200)
+    response = asyncio.run(retrier.send(request))
+    assert response.status_code == 200
+    assert delays == [1.0, 2.0, 3.0]
+
+
+def test_transport_errors_are_retried_then_raised():
+    retrier, _ = make_retrier(max_attempts=2)
+    request = scripted(httpx.ConnectError("down"), httpx.ConnectError("down"))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(retrier.send(request))
+    assert len(request.calls) == 2
+
+
+def test_long_retry_after_gives_up_immediately():
+    retrier, delays = make_retrier(max_attempts=3, max_retry_after=5)
+
+    async def request():
+        return httpx.Response(429, headers={"Retry-After": "120"})
+
+    response = asyncio.run(retrier.send(request))
+    assert response.status_code == 429
+    assert delays == []
+
+
+def test_retry_budget_limits_retries():
+    budget = RetryBudget(ratio=0.0, max_tokens=1)
+    retrier, delays = make_retrier(max_attempts=5, budget=budget)
+    asyncio.run(retrier.send(scripted(503, 503, 503)))
+    assert len(delays) == 1
+    assert retrier.budget_exhausted == 1
+
+
+def test_circuit_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+    retrier, _ = make_retrier(max_attempts=1, breaker=breaker)
+
+    asyncio.run(retrier.send(scripted(500)))
+    asyncio.run(retrier.send(scripted(500)))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(retrier.send(scripted(200)))
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    snapshot = breaker.snapshot()
+    assert snapshot["opens"] == 1
+    assert snapshot["rejections"] == 2
+
+
+def test_failed_probe_reopens_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["state_code"] == 2
+
+
+def test_cancelled_calls_do_not_count_as_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+    retrier, _ = make_retrier(max_attempts=1, breaker=breaker)
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    for _ in range(5):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(retrier.send(cancelled))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+    # A cancelled half-open probe frees the slot for the next probe.
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 10
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(retrier.send(cancelled))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    asyncio.run(retrier.send(scripted(200)))
+    assert breaker.state == CircuitBreaker.CLOSED
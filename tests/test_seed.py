@@ -0,0 +1,73 @@
+from sqlalchemy import func, inspect, select, text
+
+from demo_auth_svc import seed
+from demo_auth_svc.models.forum_post import ForumPost
+from demo_auth_svc.models.meeting import Meeting
+from demo_auth_svc.models.meeting_participant import MeetingParticipant
+from demo_auth_svc.models.row_counter import RowCounter
+from demo_auth_svc.models.user import User
+
+
+def seeded_engine(path, **kwargs):
+    engine = seed.bulk_load_engine(f"sqlite:///{path}")
+    counts = seed.seed(engine, **{"users": 50, "posts": 500, "meetings": 200, "batch_size": 64, **kwargs})
+    return engine, counts
+
+
+def test_seed_fills_every_table(tmp_path):
+    engine, counts = seeded_engine(tmp_path / "seed.db")
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(User)).scalar() == 50
+        assert connection.execute(select(func.count()).select_from(ForumPost)).scalar() == 500
+        assert connection.execute(select(func.count()).select_from(Meeting)).scalar() == 200
+        participants = connection.execute(select(func.count()).select_from(MeetingParticipant)).scalar()
+        assert participants == counts["meeting_participants"] > 200
+        post = connection.execute(select(ForumPost).where(ForumPost.post_id == 1)).one()
+        assert set(post.additional_metadata) == {"client", "tags", "edited", "score"}
+        meeting = connection.execute(select(Meeting).where(Meeting.meeting_id == 1)).one()
+        emails = connection.execute(select(MeetingParticipant.email)
+                                    .where(MeetingParticipant.meeting_id == 1)).scalars().all()
+        assert sorted(emails) == sorted(meeting.participants.split(","))
+    engine.dispose()
+
+
+def test_seed_restores_indexes_and_full_text_search(tmp_path):
+    engine, _ = seeded_engine(tmp_path / "seed.db")
+    indexes = {index["name"] for table in ("forum_posts", "meetings", "meeting_participants")
+               for index in inspect(engine).get_indexes(table)}
+    assert {"ix_forum_posts_user_id", "ix_forum_posts_timestamp", "ix_meetings_user_id_time",
+            "ix_meeting_participants_email"} <= indexes
+    with engine.begin() as connection:
+        indexed = connection.execute(text("SELECT count(*) FROM forum_posts_fts WHERE forum_posts_fts MATCH 'meeting'"))
+        scanned = connection.execute(text("SELECT count(*) FROM forum_posts WHERE ' ' || content || ' ' LIKE '% meeting %'"))
+        assert indexed.scalar() == scanned.scalar() > 0
+        # The insert trigger is back in place for regular writes.
+        connection.execute(text("INSERT INTO forum_posts (user_id, content) VALUES (1, 'zyzzyva')"))
+        assert connection.execute(text("SELECT count(*) FROM forum_posts_fts WHERE forum_posts_fts MATCH 'zyzzyva'")).scalar() == 1
+        assert connection.execute(select(RowCounter)).first() is None
+    engine.dispose()
+
+
+def test_seed_is_reproducible(tmp_path):
+    def dump(engine):
+        with engine.connect() as connection:
+            return (connection.execute(select(ForumPost.content, ForumPost.user_id, ForumPost.timestamp)).all(),
+                    connection.execute(select(Meeting.time, Meeting.participants)).all())
+
+    first, _ = seeded_engine(tmp_path / "a.db", seed=7)
+    again, _ = seeded_engine(tmp_path / "b.db", seed=7)
+    other, _ = seeded_engine(tmp_path / "c.db", seed=8)
+    assert dump(first) == dump(again)
+    assert dump(first) != dump(other)
+    for engine in (first, again, other):
+        engine.dispose()
+
+
+def test_seed_appends_after_existing_rows(tmp_path):
+    engine, _ = seeded_engine(tmp_path / "seed.db")
+    seed.seed(engine, users=10, posts=100, meetings=10, seed=1)
+    with engine.connect() as connection:
+        assert connection.execute(select(func.max(User.id))).scalar() == 60
+        assert connection.execute(select(func.count()).select_from(ForumPost)).scalar() == 600
+        assert connection.execute(select(func.max(Meeting.meeting_id))).scalar() == 210
+    engine.dispose()